@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+End-to-end turn throughput of career_lobby against the replay device.
+
+Runs the real lobby loop for N in-game turns on a replayed session
+(session.json or a recorded session corpus) with a simple device model:
+
+    --capture-ms        cost of one screen capture on the real device
+    --input-ms          cost of one adb input command
+    --input-latency-ms  delay between an input and the next frame appearing
+
+Reports turns per minute, time split by category (capture, match, OCR,
+sleep, input), captures / OCR calls / inputs per turn, and the screen probes
+the screen model (utils.screen_model) saved. Turns are counted
+from the lobby loop's turn-ending decisions (train, rest, race, ...).
+
+Uses the project's config.json (the bot modules read it on import).
+
+Usage:
+    python benchmarks/bench_career_lobby.py SESSION_DIR --turns 20 --mode unity
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from collections import Counter
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Device model sleeps must not show up as bot sleeps once the profiler wraps time.sleep
+_device_sleep = time.sleep
+
+CATEGORIES = ("capture", "match", "ocr", "sleep", "input")
+
+
+class TurnCounter:
+    """Mark listener counting lobby decisions and the turns they end"""
+
+    def __init__(self):
+        from utils.bot_control import TURN_ACTIONS
+        self.turn_actions = TURN_ACTIONS
+        self.turns = 0
+        self.actions = Counter()
+
+    def __call__(self, name, args):
+        if name != "decision":
+            return
+        action = args.get("action")
+        self.actions[action] += 1
+        if action in self.turn_actions:
+            self.turns += 1
+
+
+def category_of(operation):
+    if operation == "take_screenshot":
+        return "capture"
+    if operation in ("match_template", "max_match_confidence"):
+        return "match"
+    if operation.startswith("ocr."):
+        return "ocr"
+    if operation.startswith("sleep:"):
+        return "sleep"
+    if operation == "run_adb":
+        return "input"
+    # tap/swipe wrap run_adb; counting them too would double the input time
+    return None
+
+
+def run(args):
+    from utils import profiler
+    from utils.replay import ReplayFinished
+    from utils.device import set_adb_interceptor
+    from utils.screenshot_unified import use_replay_capture
+    from utils.trace import add_mark_listener
+    from utils.screen_model import get_matcher
+
+    unified = use_replay_capture(args.session, advance=args.advance, on_end=args.on_end,
+                                 input_latency_ms=args.input_latency_ms)
+    capture, sink = unified.replay_capture, unified.replay_sink
+    counter = TurnCounter()
+    add_mark_listener(counter)
+
+    started = [None]
+    replay_screenshot = capture.screenshot
+
+    def screenshot():
+        if counter.turns >= args.turns:
+            raise ReplayFinished(f"{counter.turns} turns done")
+        if args.max_seconds and time.perf_counter() - started[0] > args.max_seconds:
+            raise ReplayFinished(f"time limit of {args.max_seconds}s reached")
+        if args.capture_ms:
+            _device_sleep(args.capture_ms / 1000.0)
+        return replay_screenshot()
+
+    def handle_adb(command, binary=False):
+        if args.input_ms and list(command[:2]) == ["shell", "input"]:
+            _device_sleep(args.input_ms / 1000.0)
+        return sink.handle_adb(command, binary)
+
+    capture.screenshot = screenshot
+    set_adb_interceptor(handle_adb)
+
+    if args.mode == "unity":
+        from core.Unity.execute import career_lobby
+    else:
+        from core.Ura.execute import career_lobby
+
+    profiler.enable(output_dir=tempfile.mkdtemp(prefix="bench_career_lobby_"), time_sleeps=True)
+    started[0] = time.perf_counter()
+    stop_reason = "career_lobby returned"
+    try:
+        career_lobby()
+    except ReplayFinished as e:
+        stop_reason = str(e)
+    except Exception as e:
+        stop_reason = f"error: {type(e).__name__}: {e}"
+    wall = time.perf_counter() - started[0]
+    report = profiler.get_report()
+    profiler.disable()
+
+    operations = report.get("operations", {})
+    categories = {name: 0.0 for name in CATEGORIES}
+    for operation, stats in operations.items():
+        category = category_of(operation)
+        if category:
+            categories[category] += stats["total_ms"] / 1000.0
+    categories["other"] = max(wall - sum(categories.values()), 0.0)
+
+    turns = counter.turns
+    per_turn = max(turns, 1)
+    captures = operations.get("take_screenshot", {}).get("count", 0)
+    ocr_calls = sum(stats["count"] for operation, stats in operations.items() if operation.startswith("ocr."))
+    return {
+        "session": args.session,
+        "mode": args.mode,
+        "stop_reason": stop_reason,
+        "device_model": {"capture_ms": args.capture_ms, "input_ms": args.input_ms,
+                         "input_latency_ms": args.input_latency_ms},
+        "turns": turns,
+        "wall_s": round(wall, 3),
+        "turns_per_minute": round(turns / wall * 60, 3) if wall > 0 else 0.0,
+        "time_s": {name: round(seconds, 3) for name, seconds in categories.items()},
+        "per_turn": {
+            "seconds": round(wall / per_turn, 3),
+            "captures": round(captures / per_turn, 2),
+            "ocr_calls": round(ocr_calls / per_turn, 2),
+            "inputs": round(len(sink.log) / per_turn, 2),
+        },
+        "decisions": dict(counter.actions),
+        "screen_checks": get_matcher().stats(),
+        "top_operations": dict(list(operations.items())[:15]),
+    }
+
+
+def print_report(result):
+    print(f"Stopped: {result['stop_reason']}")
+    print(f"Turns: {result['turns']} in {result['wall_s']:.1f}s -> {result['turns_per_minute']:.2f} turns/min")
+    print("\nTime by category:")
+    wall = result["wall_s"] or 1.0
+    for name, seconds in result["time_s"].items():
+        print(f"  {name:<8}{seconds:>10.2f}s {seconds / wall:>7.1%}")
+    print("\nPer turn:")
+    for name, value in result["per_turn"].items():
+        print(f"  {name:<10}{value:>10}")
+    print("\nDecisions:", ", ".join(f"{k}={v}" for k, v in sorted(result["decisions"].items(), key=lambda i: -i[1])))
+    screens = result["screen_checks"]
+    print(f"\nScreen checks: {screens['probes']} probes for {screens['identifications']} screens, "
+          f"{screens['probes_saved']} saved vs fixed order ({screens['probes_saved_per_turn']}/turn)")
+    print("\nSlowest operations (total):")
+    for name, stats in result["top_operations"].items():
+        print(f"  {name:<50}{stats['count']:>7}x {stats['total_ms']:>11.1f}ms  p95 {stats['p95_ms']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure career_lobby turn throughput against the replay device")
+    parser.add_argument("session", help="replay session directory (session.json or recorded index.jsonl)")
+    parser.add_argument("--mode", choices=("unity", "ura"), default="unity")
+    parser.add_argument("--turns", type=int, default=10, help="stop after this many in-game turns")
+    parser.add_argument("--max-seconds", type=float, default=600, help="wall-clock limit (0 for none)")
+    parser.add_argument("--advance", choices=("on_input", "on_capture"), default=None)
+    parser.add_argument("--on-end", choices=("stop", "hold", "loop"), default="loop")
+    parser.add_argument("--capture-ms", type=float, default=0, help="simulated capture cost")
+    parser.add_argument("--input-ms", type=float, default=0, help="simulated adb input command cost")
+    parser.add_argument("--input-latency-ms", type=float, default=0, help="simulated input-to-frame latency")
+    parser.add_argument("--json", help="also write the report to this path")
+    args = parser.parse_args()
+
+    args.session = os.path.abspath(args.session)
+    json_path = os.path.abspath(args.json) if args.json else None
+    # The bot resolves config.json and assets relative to the project root
+    os.chdir(PROJECT_ROOT)
+
+    result = run(args)
+    print_report(result)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Energy bar: midline profile reader against the full-crop scan.
+
+Compares, on the same frames,
+
+    full_scan         check_energy_bar_full_scan (contour / saturation scan of the whole crop)
+    profile           utils.energy_bar.EnergyBarReader alone (cached pill geometry, midline profile)
+    check_energy_bar  profile with the full-scan fallback below the confidence (what the bot runs)
+
+and reports the mean/max error in percentage points, how many readings are
+within --tolerance, p50/p95 latency and how often check_energy_bar fell back.
+
+Frames come from a recognizer corpus (labels.json with "energy" expectations,
+see bench_recognizers.py) and/or --synthetic FRAME: the pill interior of a
+lobby frame is repainted at known fill levels with the blue -> green ->
+yellow gradient of analyze_gradient_energy.py, gray (117,117,117) after it.
+For live captures use "Energy test/quick_test.py".
+
+Usage:
+    python benchmarks/bench_energy.py --corpus CORPUS_DIR
+    python benchmarks/bench_energy.py --synthetic lobby.png --mode ura
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import cv2
+import numpy as np
+from PIL import Image
+
+LEVELS = [0, 3, 10, 17.5, 25, 33, 40, 50, 62.5, 70, 80, 90, 96, 100]
+EMPTY_GRAY = (117, 117, 117)
+
+
+def gradient_color(ratio):
+    """Colour of the filled bar at ratio (0-1) of the filled width, as in analyze_gradient_energy.py"""
+    if ratio < 0.25:
+        return int(100 * (ratio / 0.25)), int(100 + 155 * (ratio / 0.25)), 255
+    if ratio < 0.5:
+        return int(100 + 155 * ((ratio - 0.25) / 0.25)), 255, int(255 - 155 * ((ratio - 0.25) / 0.25))
+    if ratio < 0.75:
+        return 255, 255, int(100 - 100 * ((ratio - 0.5) / 0.25))
+    return 255, int(255 - 100 * ((ratio - 0.75) / 0.25)), 0
+
+
+def _interior_mask(crop):
+    """Pixels of the pill interior: the filled colours and the empty gray, largest connected area"""
+    rows = crop.astype(np.int16)
+    chroma = rows.max(axis=2) - rows.min(axis=2)
+    value = rows.max(axis=2)
+    mask = ((chroma >= 40) | ((chroma <= 12) & (value >= 95) & (value <= 145))).astype(np.uint8)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=4)
+    if count < 2:
+        return None
+    largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+    return labels == largest
+
+
+def synthetic_frames(path, region):
+    with Image.open(path) as img:
+        base = img.convert("RGBA")
+    x, y, width, height = region
+    crop = np.array(base.crop((x, y, x + width, y + height)))
+    mask = _interior_mask(crop[..., :3])
+    if mask is None:
+        raise SystemExit(f"No energy pill interior found in {path}")
+    # Fill levels are measured along the midline of the interior
+    mid = int(np.mean(np.where(mask.any(axis=1))[0]))
+    cols = np.where(mask[mid])[0]
+    c0, span = int(cols[0]), int(cols[-1]) - int(cols[0]) + 1
+
+    frames = []
+    for level in LEVELS:
+        boundary = c0 + int(round(level / 100.0 * span))
+        painted = crop.copy()
+        filled = max(boundary - c0, 1)
+        for col in range(c0, c0 + span):
+            color = gradient_color((col - c0) / filled) if col < boundary else EMPTY_GRAY
+            painted[mask[:, col], col, :3] = color
+        frame = base.copy()
+        frame.paste(Image.fromarray(painted), (x, y))
+        frames.append((f"synthetic {level:g}%", frame, (boundary - c0) / span * 100.0))
+    return frames
+
+
+def corpus_frames(corpus_dir, mode):
+    from bench_recognizers import load_corpus
+
+    _, frames = load_corpus(corpus_dir)
+    return [(name, image, float(expect["energy"])) for name, frame_mode, image, expect in frames
+            if "energy" in expect and frame_mode == mode]
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def run(frames, mode, repeat, tolerance):
+    from utils.energy_bar import EnergyBarReader
+
+    state = importlib.import_module(f"core.{'Unity' if mode == 'unity' else 'Ura'}.state")
+    min_confidence = float(state.config.get("energy_profile_min_confidence", 0.9))
+    reader = EnergyBarReader(state.ENERGY_REGION)
+
+    methods = {
+        "full_scan": state.check_energy_bar_full_scan,
+        "profile": lambda image: reader.read(image).percentage,
+        "check_energy_bar": state.check_energy_bar,
+    }
+    results = {}
+    for name, method in methods.items():
+        errors, samples, misses = [], [], []
+        for frame_name, image, want in frames:
+            # First call is untimed: it locates the pill for the profile reader
+            got = method(image)
+            for _ in range(repeat):
+                start = time.perf_counter()
+                method(image)
+                samples.append(time.perf_counter() - start)
+            errors.append(abs(got - want))
+            if abs(got - want) > tolerance:
+                misses.append(f"{frame_name}: got {got:.1f}, want {want:.1f}")
+        results[name] = {
+            "mean_error": sum(errors) / len(errors),
+            "max_error": max(errors),
+            "within": sum(1 for e in errors if e <= tolerance) / len(errors),
+            "p50_ms": _percentile(samples, 50) * 1000,
+            "p95_ms": _percentile(samples, 95) * 1000,
+            "misses": misses,
+        }
+
+    confidences = [reader.read(image).confidence for _, image, _ in frames]
+    results["check_energy_bar"]["fallback_rate"] = sum(1 for c in confidences if c < min_confidence) / len(frames)
+    results["profile"]["min_confidence"] = min(confidences)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the energy bar profile reader against the full scan")
+    parser.add_argument("--corpus", help="recognizer corpus directory (labels.json with energy expectations)")
+    parser.add_argument("--synthetic", help="lobby frame whose energy pill is repainted at known levels")
+    parser.add_argument("--mode", choices=("unity", "ura"), default="unity")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per frame and method")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="allowed error in percentage points")
+    args = parser.parse_args()
+    if not args.corpus and not args.synthetic:
+        parser.error("give --corpus and/or --synthetic")
+
+    corpus = os.path.abspath(args.corpus) if args.corpus else None
+    synthetic = os.path.abspath(args.synthetic) if args.synthetic else None
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    # config.json is resolved relative to the project root
+    os.chdir(PROJECT_ROOT)
+
+    state = importlib.import_module(f"core.{'Unity' if args.mode == 'unity' else 'Ura'}.state")
+    frames = []
+    if corpus:
+        frames.extend(corpus_frames(corpus, args.mode))
+    if synthetic:
+        frames.extend(synthetic_frames(synthetic, state.ENERGY_REGION))
+    if not frames:
+        print("No frames with an energy label")
+        return 1
+
+    results = run(frames, args.mode, max(args.repeat, 1), args.tolerance)
+    print(f"{len(frames)} frames ({args.mode}), tolerance {args.tolerance:g} points\n")
+    print(f"{'method':<18}{'mean err':>10}{'max err':>10}{'within':>9}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<18}{result['mean_error']:>10.2f}{result['max_error']:>10.2f}{result['within']:>9.0%}"
+              f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+    print(f"\nLowest profile confidence {results['profile']['min_confidence']:.2f}; "
+          f"check_energy_bar fell back to the full scan on {results['check_energy_bar']['fallback_rate']:.0%} of the frames")
+    for name, result in results.items():
+        for miss in result["misses"]:
+            print(f"  {name}: {miss}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
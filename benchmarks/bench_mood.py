@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Mood detection: colour signature classifier against the template matches.
+
+Compares, on the same frames,
+
+    templates   check_mood_by_templates (five max_match_confidence calls)
+    signature   utils.mood_classifier.classify_mood alone (no fallback)
+    check_mood  signature with the template fallback below the margin (what the bot runs)
+
+and reports accuracy, p50/p95 latency and how often check_mood fell back.
+
+Frames come from a recognizer corpus (labels.json with "mood" expectations,
+see bench_recognizers.py) and/or --synthetic FRAME: the mood badge area of a
+lobby frame is cleared and each mood template pasted in, one frame per mood.
+
+Usage:
+    python benchmarks/bench_mood.py --corpus CORPUS_DIR
+    python benchmarks/bench_mood.py --synthetic lobby.png --mode ura
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from PIL import Image, ImageDraw
+
+# Badge area inside the mood region, and where synthetic badges are pasted
+BADGE_AREA = (800, 205, 1075, 285)
+BADGE_POSITION = (834, 223)
+
+
+def synthetic_frames(path):
+    from utils.mood_classifier import MOOD_TEMPLATES
+
+    frames = []
+    with Image.open(path) as img:
+        base = img.convert("RGBA")
+    for label, template_path in MOOD_TEMPLATES.items():
+        frame = base.copy()
+        ImageDraw.Draw(frame).rectangle(BADGE_AREA, fill=(245, 245, 248, 255))
+        with Image.open(os.path.join(PROJECT_ROOT, template_path)) as template:
+            frame.paste(template.convert("RGBA"), BADGE_POSITION)
+        frames.append((f"synthetic {label}", frame, label))
+    return frames
+
+
+def corpus_frames(corpus_dir, mode):
+    from bench_recognizers import load_corpus
+
+    _, frames = load_corpus(corpus_dir)
+    return [(name, image, expect["mood"]) for name, frame_mode, image, expect in frames
+            if "mood" in expect and frame_mode == mode]
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def run(frames, mode, repeat):
+    from utils.mood_classifier import classify_mood
+
+    state = importlib.import_module(f"core.{'Unity' if mode == 'unity' else 'Ura'}.state")
+    min_margin = float(state.config.get("mood_signature_min_margin", 0.3))
+
+    def signature(image):
+        label, _, _ = classify_mood(image.crop(state.MOOD_SEARCH_REGION))
+        return label or "UNKNOWN"
+
+    methods = {"templates": state.check_mood_by_templates, "signature": signature, "check_mood": state.check_mood}
+    results = {}
+    for name, method in methods.items():
+        correct, samples, mismatches = 0, [], []
+        for frame_name, image, want in frames:
+            # First call is untimed: it loads templates and builds the signatures
+            got = method(image)
+            for _ in range(repeat):
+                start = time.perf_counter()
+                method(image)
+                samples.append(time.perf_counter() - start)
+            if got == want:
+                correct += 1
+            else:
+                mismatches.append(f"{frame_name}: got {got}, want {want}")
+        results[name] = {
+            "accuracy": correct / len(frames),
+            "p50_ms": _percentile(samples, 50) * 1000,
+            "p95_ms": _percentile(samples, 95) * 1000,
+            "mismatches": mismatches,
+        }
+
+    fallbacks = 0
+    for _, image, _ in frames:
+        label, margin, _ = classify_mood(image.crop(state.MOOD_SEARCH_REGION))
+        if label is None or margin < min_margin:
+            fallbacks += 1
+    results["check_mood"]["fallback_rate"] = fallbacks / len(frames)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mood colour signature against template matching")
+    parser.add_argument("--corpus", help="recognizer corpus directory (labels.json with mood expectations)")
+    parser.add_argument("--synthetic", help="lobby frame to paste each mood badge into")
+    parser.add_argument("--mode", choices=("unity", "ura"), default="unity")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per frame and method")
+    args = parser.parse_args()
+    if not args.corpus and not args.synthetic:
+        parser.error("give --corpus and/or --synthetic")
+
+    corpus = os.path.abspath(args.corpus) if args.corpus else None
+    synthetic = os.path.abspath(args.synthetic) if args.synthetic else None
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    # Templates and config.json are resolved relative to the project root
+    os.chdir(PROJECT_ROOT)
+
+    frames = []
+    if corpus:
+        frames.extend(corpus_frames(corpus, args.mode))
+    if synthetic:
+        frames.extend(synthetic_frames(synthetic))
+    if not frames:
+        print("No frames with a mood label")
+        return 1
+
+    results = run(frames, args.mode, max(args.repeat, 1))
+    print(f"{len(frames)} frames ({args.mode})\n")
+    print(f"{'method':<12}{'accuracy':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<12}{result['accuracy']:>10.1%}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}")
+    print(f"\ncheck_mood fell back to the templates on {results['check_mood']['fallback_rate']:.0%} of the frames")
+    for name, result in results.items():
+        for mismatch in result["mismatches"]:
+            print(f"  {name}: {mismatch}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
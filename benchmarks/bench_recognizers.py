@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Recognizer benchmark over a labelled frame corpus.
+
+Reports per-recognizer accuracy, p50/p95 latency and peak allocation, and
+compares them against a stored baseline so performance work cannot silently
+regress detection quality.
+
+Corpus layout (labels.json next to the frames):
+
+    {
+      "mode": "unity",                      # default mode for frames (unity / ura)
+      "session": "sessions/session_x",      # optional: recorded session the "frame" ids refer to
+      "tolerances": {"energy": 3.0},        # optional numeric tolerances per expectation key
+      "frames": [
+        {
+          "file": "lobby_01.png",           # or "frame": "f000123" from the recorded session
+          "mode": "ura",                    # optional per-frame override
+          "expect": {
+            "mood": "GOOD",
+            "energy": 64,
+            "stats": {"spd": 312, "sta": 250, "pwr": 180, "guts": 160, "wit": 220},
+            "year": "Classic Year Early Apr",
+            "failure": {"spd": 12},
+            "support_cards": {"spd": 2, "friend": 1},
+            "bonds": {"spd": [3, 4], "friend": [2]},
+            "hint": true,
+            "spirit_training": 2, "spirit_burst": 1, "spirit_training_extra": 0,
+            "event_choices": 3,
+            "event_name": "Extra Training",
+            "skill_rows": [{"button": [946, 809], "name": "Corner Adept ○"}],
+            "screen": "ok"                  # lobby-loop screen, whichever screen the model promotes
+          }
+        }
+      ]
+    }
+
+Only the recognizers whose expectation key is present are run on a frame.
+
+Usage:
+    python benchmarks/bench_recognizers.py CORPUS_DIR                  # compare with baseline
+    python benchmarks/bench_recognizers.py CORPUS_DIR --save-baseline  # record a new baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from PIL import Image
+
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baselines", "recognizers.json")
+DEFAULT_TOLERANCES = {"energy": 3.0, "stats": 0, "failure": 0}
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    return value
+
+
+def _equal(got, want, tolerance=0):
+    if isinstance(want, (int, float)) and not isinstance(want, bool) and isinstance(got, (int, float)):
+        return abs(got - want) <= tolerance
+    return _normalize(got) == _normalize(want)
+
+
+def _mode_modules(mode):
+    package = "Unity" if mode == "unity" else "Ura"
+    modules = {
+        "state": importlib.import_module(f"core.{package}.state"),
+        "training": importlib.import_module(f"core.{package}.training_handling"),
+        "events": importlib.import_module(f"core.{package}.event_handling"),
+        "ocr": importlib.import_module(f"core.{package}.ocr"),
+        "skills": importlib.import_module(f"core.{package}.skill_recognizer"),
+        "constants": importlib.import_module(f"utils.constants_{'unity' if mode == 'unity' else 'ura'}"),
+    }
+    return modules
+
+
+# Each recognizer: (expectation key, run(frame, expected, modules, tolerance) -> [(got, want, ok), ...])
+def _run_mood(img, want, m, tol):
+    got = m["state"].check_mood(img)
+    return [(got, want, _equal(got, want))]
+
+
+def _run_energy(img, want, m, tol):
+    got = m["state"].check_energy_bar(img)
+    return [(got, want, _equal(got, want, tol))]
+
+
+def _run_stats(img, want, m, tol):
+    got = m["state"].stat_state(img)
+    return [(got.get(stat), value, _equal(got.get(stat), value, tol)) for stat, value in want.items()]
+
+
+def _run_year(img, want, m, tol):
+    got = m["state"].check_current_year(img)
+    return [(got, want, _equal(got, want))]
+
+
+def _run_failure(img, want, m, tol):
+    cases = []
+    for train_type, rate in want.items():
+        got, _ = m["training"].check_failure(img, train_type)
+        cases.append((got, rate, _equal(got, rate, tol)))
+    return cases
+
+
+def _run_support_cards(img, want, m, tol):
+    got = m["training"].check_support_card(img)
+    keys = set(want) | {k for k, v in got.items() if v}
+    if not keys:
+        return [({}, want, True)]
+    return [(got.get(k, 0), want.get(k, 0), got.get(k, 0) == want.get(k, 0)) for k in sorted(keys)]
+
+
+def _run_bonds(img, want, m, tol):
+    detail = m["training"].check_support_bonds(img)
+    got = {k: sorted(entry["bond_level"] for entry in entries) for k, entries in detail.items()}
+    keys = set(want) | set(got)
+    if not keys:
+        return [({}, want, True)]
+    return [(got.get(k, []), sorted(want.get(k, [])), got.get(k, []) == sorted(want.get(k, []))) for k in sorted(keys)]
+
+
+def _run_hint(img, want, m, tol):
+    got = bool(m["training"].check_hint(img))
+    return [(got, want, got == bool(want))]
+
+
+def _spirit(name):
+    def run(img, want, m, tol):
+        training = m["training"]
+        if not hasattr(training, "check_spirit_training"):
+            raise RuntimeError("spirit detectors are Unity Cup only")
+        if name == "spirit_training_extra":
+            got = training.check_spirit_training_extra(img, training._get_spirit_training_boxes(img))
+        else:
+            got = getattr(training, f"check_{name}")(img)
+        return [(got, want, got == want)]
+    return run
+
+
+def _run_event_choices(img, want, m, tol):
+    got, _ = m["events"].count_event_choices(img)
+    return [(got, want, got == want)]
+
+
+def _run_event_name(img, want, m, tol):
+    got = m["ocr"].extract_event_name_text(img.crop(m["constants"].EVENT_REGION)).strip()
+    return [(got, want, _equal(got, want))]
+
+
+def _run_screen(img, want, m, tol):
+    # The screen must not depend on the probe order: identify it once with the
+    # fixed order and once with each screen promoted by the screen model
+    from utils.screen_model import ScreenMatcher, TransitionModel
+
+    execute = importlib.import_module(f"{m['state'].__package__}.execute")
+    probes = execute.lobby_screen_probes(img)
+    cases = []
+    for promoted in [None] + [name for name, _ in probes]:
+        model = TransitionModel({"unknown|": {promoted: 5}}) if promoted else None
+        matcher = ScreenMatcher(model, min_probability=0.5, min_samples=5)
+        got, _ = matcher.identify(probes)
+        got = got or "unknown"
+        cases.append((f"{got} ({promoted or 'fixed order'} first)", want, got == want))
+        if promoted == want:
+            # A right prediction skips the full screens ahead of it that cannot show with it
+            names = [name for name, _ in probes]
+            skippable = sum(1 for name in names[:names.index(want)] if not matcher.can_overlap(name, want))
+            saved = matcher.stats()["probes_saved"]
+            cases.append((f"{saved} probe(s) saved ({want} first)", skippable, saved == skippable))
+    return cases
+
+
+def _run_skill_rows(img, want, m, tol):
+    cases = []
+    for row in want:
+        x, y = row["button"]
+        got = m["skills"].extract_skill_info(img, x, y).get("name")
+        cases.append((got, row["name"], _equal(got, row["name"])))
+    return cases
+
+
+RECOGNIZERS = {
+    "check_mood": ("mood", _run_mood),
+    "check_energy_bar": ("energy", _run_energy),
+    "stat_state": ("stats", _run_stats),
+    "check_current_year": ("year", _run_year),
+    "check_failure": ("failure", _run_failure),
+    "check_support_card": ("support_cards", _run_support_cards),
+    "bond_classification": ("bonds", _run_bonds),
+    "check_hint": ("hint", _run_hint),
+    "check_spirit_training": ("spirit_training", _spirit("spirit_training")),
+    "check_spirit_burst": ("spirit_burst", _spirit("spirit_burst")),
+    "check_spirit_training_extra": ("spirit_training_extra", _spirit("spirit_training_extra")),
+    "count_event_choices": ("event_choices", _run_event_choices),
+    "event_name_ocr": ("event_name", _run_event_name),
+    "skill_row_ocr": ("skill_rows", _run_skill_rows),
+    "lobby_screen": ("screen", _run_screen),
+}
+
+
+def load_corpus(corpus_dir):
+    """Returns (labels dict, [(frame name, mode, PIL image, expect), ...])"""
+    with open(os.path.join(corpus_dir, "labels.json"), "r", encoding="utf-8") as f:
+        labels = json.load(f)
+
+    reader = None
+    if labels.get("session"):
+        from utils.session_recorder import SessionReader
+        session_dir = labels["session"]
+        if not os.path.isabs(session_dir):
+            session_dir = os.path.join(corpus_dir, session_dir)
+        reader = SessionReader(session_dir)
+
+    frames = []
+    for entry in labels.get("frames", []):
+        if "frame" in entry:
+            name = entry["frame"]
+            image = reader.load_frame(name)
+        else:
+            name = entry["file"]
+            with Image.open(os.path.join(corpus_dir, name)) as img:
+                image = img.convert("RGBA")
+        frames.append((name, entry.get("mode", labels.get("mode", "unity")).lower(), image, entry.get("expect", {})))
+    return labels, frames
+
+
+def _percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_benchmark(corpus_dir, repeat=5, only=None, verbose=False):
+    labels, frames = load_corpus(corpus_dir)
+    tolerances = dict(DEFAULT_TOLERANCES)
+    tolerances.update(labels.get("tolerances", {}))
+    modules = {}
+    results = {}
+
+    for name, (key, run) in RECOGNIZERS.items():
+        if only and name not in only:
+            continue
+        stats = {"cases": 0, "correct": 0, "errors": 0, "samples": [], "peak_bytes": 0, "failures": []}
+        for frame_name, mode, image, expect in frames:
+            if key not in expect:
+                continue
+            if mode not in modules:
+                modules[mode] = _mode_modules(mode)
+            m = modules[mode]
+            want = expect[key]
+            tol = tolerances.get(key, 0)
+            try:
+                # First call is untimed: it loads templates and builds caches
+                cases = run(image, want, m, tol)
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    run(image, want, m, tol)
+                    stats["samples"].append(time.perf_counter() - start)
+                tracemalloc.start()
+                tracemalloc.reset_peak()
+                run(image, want, m, tol)
+                stats["peak_bytes"] = max(stats["peak_bytes"], tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            except Exception as e:
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+                stats["errors"] += 1
+                cases = [(f"error: {e}", want, False)]
+            for got, expected, ok in cases:
+                stats["cases"] += 1
+                if ok:
+                    stats["correct"] += 1
+                else:
+                    stats["failures"].append({"frame": frame_name, "got": got, "want": expected})
+        if not stats["cases"]:
+            continue
+        results[name] = {
+            "cases": stats["cases"],
+            "accuracy": round(stats["correct"] / stats["cases"], 4),
+            "errors": stats["errors"],
+            "p50_ms": round(_percentile(stats["samples"], 50) * 1000, 3),
+            "p95_ms": round(_percentile(stats["samples"], 95) * 1000, 3),
+            "peak_kb": round(stats["peak_bytes"] / 1024, 1),
+            "failures": stats["failures"],
+        }
+        if verbose:
+            for failure in stats["failures"]:
+                print(f"  {name}: {failure['frame']}: got {failure['got']!r}, want {failure['want']!r}")
+    return results
+
+
+def compare(results, baseline, accuracy_tolerance, latency_tolerance, alloc_tolerance, latency_slack_ms=1.0):
+    """Returns a list of gate violations (empty when everything is within tolerance)"""
+    violations = []
+    for name, base in baseline.get("recognizers", {}).items():
+        current = results.get(name)
+        if current is None:
+            violations.append(f"{name}: missing from this run (baseline has {base['cases']} cases)")
+            continue
+        if current["accuracy"] < base["accuracy"] - accuracy_tolerance:
+            violations.append(f"{name}: accuracy {current['accuracy']:.2%} < baseline {base['accuracy']:.2%}")
+        if latency_tolerance is not None:
+            limit = base["p95_ms"] * (1 + latency_tolerance) + latency_slack_ms
+            if current["p95_ms"] > limit:
+                violations.append(f"{name}: p95 {current['p95_ms']:.2f}ms > {limit:.2f}ms (baseline {base['p95_ms']:.2f}ms)")
+        if alloc_tolerance is not None:
+            limit = base["peak_kb"] * (1 + alloc_tolerance) + 64
+            if current["peak_kb"] > limit:
+                violations.append(f"{name}: peak alloc {current['peak_kb']:.0f}KB > {limit:.0f}KB (baseline {base['peak_kb']:.0f}KB)")
+    return violations
+
+
+def print_table(results, baseline):
+    base = baseline.get("recognizers", {}) if baseline else {}
+    print(f"{'recognizer':<30}{'cases':>7}{'accuracy':>10}{'base':>8}{'p50 ms':>10}{'p95 ms':>10}{'base p95':>10}{'peak KB':>10}")
+    for name, r in results.items():
+        b = base.get(name, {})
+        base_acc = f"{b['accuracy']:.0%}" if b else "-"
+        base_p95 = f"{b['p95_ms']:.2f}" if b else "-"
+        errors = f" ({r['errors']} errors)" if r["errors"] else ""
+        print(f"{name:<30}{r['cases']:>7}{r['accuracy']:>10.1%}{base_acc:>8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{base_p95:>10}{r['peak_kb']:>10.0f}{errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recognizers for accuracy, latency and allocations")
+    parser.add_argument("corpus", help="directory containing labels.json and the frames")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare with / save to")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per frame")
+    parser.add_argument("--only", help="comma-separated recognizer names")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.0, help="allowed accuracy drop (fraction)")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed relative p95 growth")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.25, help="allowed relative peak allocation growth")
+    parser.add_argument("--no-latency-gate", action="store_true", help="only gate accuracy (e.g. on a different machine)")
+    parser.add_argument("--json", help="also write the full report (with failures) to this path")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every mismatch")
+    args = parser.parse_args()
+
+    corpus_dir = os.path.abspath(args.corpus)
+    baseline_path = os.path.abspath(args.baseline)
+    # Recognizers load templates relative to the project root
+    os.chdir(PROJECT_ROOT)
+
+    only = set(args.only.split(",")) if args.only else None
+    results = run_benchmark(corpus_dir, repeat=max(args.repeat, 1), only=only, verbose=args.verbose)
+    if not results:
+        print("No labelled cases found in the corpus")
+        return 1
+
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"corpus": corpus_dir, "recognizers": results}, f, indent=2, default=str)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        stored = {name: {k: v for k, v in r.items() if k != "failures"} for name, r in results.items()}
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump({"corpus": os.path.basename(corpus_dir), "recognizers": stored}, f, indent=2)
+        print(f"\nBaseline written to {baseline_path}")
+        return 0
+
+    if baseline is None:
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+
+    if only:
+        baseline = dict(baseline, recognizers={k: v for k, v in baseline.get("recognizers", {}).items() if k in only})
+    violations = compare(
+        results, baseline,
+        accuracy_tolerance=args.accuracy_tolerance,
+        latency_tolerance=None if args.no_latency_gate else args.latency_tolerance,
+        alloc_tolerance=None if args.no_latency_gate else args.alloc_tolerance,
+    )
+    if violations:
+        print("\nRegressions against baseline:")
+        for violation in violations:
+            print(f"  {violation}")
+        return 1
+    print("\nAll recognizers within baseline tolerances")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
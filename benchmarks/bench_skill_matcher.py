@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import random
+import argparse
+from difflib import SequenceMatcher
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.skill_matcher import SkillMatcher, find_duplicate_candidates, normalize_skill_name
+
+WORDS = [
+    "Corner", "Straightaway", "Acceleration", "Recovery", "Adept", "Savvy", "Pace",
+    "Chaser", "Late", "Surger", "End", "Closer", "Front", "Runner", "Swinging",
+    "Maestro", "Professor", "Curves", "Focus", "Concentration", "Right", "Handed",
+    "Left", "Tokyo", "Racecourse", "Nakayama", "Firm", "Conditions", "Rainy", "Days",
+]
+
+
+def make_names(rng, count):
+    names = []
+    for _ in range(count):
+        words = rng.sample(WORDS, rng.randint(2, 4))
+        suffix = rng.choice(["", " ○", " ◎", " ×"])
+        names.append(" ".join(words) + suffix)
+    return names
+
+
+def ocr_noise(rng, name):
+    """Simulate typical OCR errors: dropped/substituted characters and stray punctuation"""
+    chars = list(name)
+    for _ in range(rng.randint(0, 2)):
+        if not chars:
+            break
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.4:
+            chars.pop(i)
+        elif op < 0.8:
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        else:
+            chars.insert(i, rng.choice(".,'-"))
+    return "".join(chars)
+
+
+def reference_find(skill_name, available_skills, excluded_skills, threshold):
+    """Original find_matching_skill semantics (pairwise SequenceMatcher)"""
+    for skill in available_skills:
+        if skill['name'].lower().strip() == skill_name.lower().strip() and skill['name'] not in excluded_skills:
+            return skill, 1.0
+    best_match = None
+    best_similarity = 0.0
+    target = normalize_skill_name(skill_name)
+    for skill in available_skills:
+        if skill['name'] in excluded_skills:
+            continue
+        similarity = SequenceMatcher(None, normalize_skill_name(skill['name']), target).ratio()
+        if similarity > best_similarity and similarity >= threshold:
+            best_similarity = similarity
+            best_match = skill
+    return best_match, best_similarity
+
+
+def levenshtein_similarity(s1, s2):
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return 0.0 if s1 else 1.0
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current = [i + 1]
+        for j, c2 in enumerate(s2):
+            current.append(min(previous[j + 1] + 1, current[j] + 1, previous[j] + (c1 != c2)))
+        previous = current
+    return 1.0 - previous[-1] / max(len(s1), len(s2))
+
+
+def bench_matching(rng, targets_count, skills_count, threshold):
+    targets = make_names(rng, targets_count)
+    pool = targets + make_names(rng, skills_count)
+    available = [{'name': ocr_noise(rng, name), 'price': rng.randint(50, 300)}
+                 for name in rng.sample(pool, skills_count)]
+    excluded = {available[i]['name'] for i in range(0, skills_count, 7)}
+
+    start = time.perf_counter()
+    expected = [reference_find(t, available, excluded, threshold) for t in targets]
+    reference_time = time.perf_counter() - start
+
+    matcher = SkillMatcher(targets, threshold=threshold)
+    start = time.perf_counter()
+    table = matcher.build_table(available)
+    actual = [table.find(t, excluded) for t in targets]
+    matcher_time = time.perf_counter() - start
+
+    mismatches = 0
+    for (exp_skill, exp_score), (act_skill, act_score) in zip(expected, actual):
+        if exp_skill is not act_skill or abs(exp_score - act_score) > 1e-9:
+            mismatches += 1
+
+    found = sum(1 for skill, _ in actual if skill is not None)
+    print(f"match  {targets_count:4d} targets x {skills_count:4d} skills: "
+          f"reference {reference_time * 1000:8.1f} ms, matcher {matcher_time * 1000:7.1f} ms "
+          f"({reference_time / max(matcher_time, 1e-9):5.1f}x), "
+          f"{table.comparisons} exact checks, {found} matched, {mismatches} mismatches")
+    return mismatches
+
+
+def bench_dedup(rng, skills_count, threshold):
+    names = [ocr_noise(rng, name).lower().strip() for name in make_names(rng, skills_count // 2)]
+    names = names + [ocr_noise(rng, name) for name in names]
+
+    start = time.perf_counter()
+    expected = {(i, j) for i in range(len(names)) for j in range(i)
+                if levenshtein_similarity(names[i], names[j]) >= threshold}
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mask = find_duplicate_candidates(names, threshold)
+    actual = {(i, j) for i in range(len(names)) for j in range(i)
+              if mask[i, j] and levenshtein_similarity(names[i], names[j]) >= threshold}
+    checks = int(mask.sum() - len(names)) // 2
+    prefilter_time = time.perf_counter() - start
+
+    missing = len(expected - actual)
+    print(f"dedup  {len(names):4d} names: reference {reference_time * 1000:8.1f} ms, "
+          f"prefiltered {prefilter_time * 1000:7.1f} ms "
+          f"({reference_time / max(prefilter_time, 1e-9):5.1f}x), "
+          f"{checks} Levenshtein checks, {len(expected)} duplicates, {missing} missed")
+    return missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the batched skill matcher against pairwise matching")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    for targets_count, skills_count in [(20, 50), (50, 200), (100, 500), (200, 1000)]:
+        failures += bench_matching(rng, targets_count, skills_count, args.threshold)
+    for skills_count in [50, 200, 400]:
+        failures += bench_dedup(rng, skills_count, 0.8)
+
+    if failures:
+        print(f"FAILED: {failures} results differ from the reference implementation")
+        sys.exit(1)
+    print("OK: all results identical to the reference implementation")
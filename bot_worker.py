@@ -0,0 +1,168 @@
+"""
+Long-lived bot process driven by the GUI.
+
+Started once by gui/bot_controller.py instead of spawning main.py on every
+START: the mode modules, templates, Tesseract setup and the adb connection
+stay warm between runs. Commands arrive as JSON messages on the channel from
+utils.bot_channel:
+
+    {"cmd": "start"}                      run career_lobby (cancels a pending stop)
+    {"cmd": "stop", "immediate": false}   leave the lobby loop at the next turn boundary
+    {"cmd": "pause"} / {"cmd": "resume"}  hold / continue at the next loop iteration
+    {"cmd": "shutdown"}                   stop and exit
+
+and the worker answers with {"event": "state", "state": ...} messages
+(ready, starting, running, paused, stopping, idle), next to the log and
+status events of utils.bot_events. When config.json changed since the worker loaded it, "start" is answered with
+{"event": "restart_required"} and the worker exits so the GUI can start a
+fresh one with the new settings.
+"""
+import os
+import sys
+import threading
+
+if '__file__' in globals():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+import main as bot_main
+from utils import bot_control, bot_events, profiler
+from utils.bot_channel import connect_from_env
+from utils.config_loader import config_signature
+from utils.resolution import profile_needs_device
+from utils.log import log_info, log_warning, log_error
+
+
+class BotWorker:
+    def __init__(self, channel):
+        self.channel = channel
+        self.career_lobby = None
+        self.config_signature = config_signature()
+        self.device_checked = False
+        self.run_thread = None
+        bot_control.add_state_listener(self.send_state)
+
+    def send_state(self, state, **fields):
+        self.channel.send(dict({"event": "state", "state": state}, **fields))
+
+    def warm_up(self):
+        """Import the mode modules and report Tesseract once, before the first START"""
+        if profile_needs_device():
+            # Their regions are scaled to the device's screen size: load them
+            # once the first run has checked the device
+            log_info(f"The {bot_main.mode_name} modules load after the device check (resolution profile)")
+        else:
+            self.load_modules()
+        self.send_state("ready", mode=bot_main.mode)
+
+    def load_modules(self):
+        thread, result = bot_main.start_mode_import()
+        self.career_lobby = bot_main.finish_mode_import(thread, result)
+
+    def running(self):
+        return self.run_thread is not None and self.run_thread.is_alive()
+
+    def start(self):
+        if self.running():
+            if bot_control.stop_requested():
+                bot_control.cancel_stop()
+                log_info("Pending stop cancelled")
+            self.send_state("paused" if bot_control.is_paused() else "running")
+            return True
+        if config_signature() != self.config_signature:
+            log_info("Configuration changed since the bot worker started - restarting it")
+            self.channel.send({"event": "restart_required"})
+            return False
+        bot_control.reset()
+        profiler.reset()
+        self.run_thread = threading.Thread(target=self.run, name="career-lobby", daemon=True)
+        self.run_thread.start()
+        return True
+
+    def run(self):
+        reason = "finished"
+        try:
+            self.send_state("starting")
+            # adb devices is cheap; the device details only need logging once
+            if not bot_main.check_adb_connection():
+                reason = "no device"
+                return
+            if not self.device_checked:
+                if not bot_main.get_device_info():
+                    reason = "device info failed"
+                    return
+                self.device_checked = True
+            if self.career_lobby is None:
+                if not bot_main.resolve_resolution_profile():
+                    reason = "screen size unknown"
+                    return
+                self.load_modules()
+            log_info("")
+            log_info("Starting automation...")
+            self.send_state("running")
+            bot_main.run_automation(self.career_lobby)
+            if bot_control.stop_requested():
+                reason = "stopped"
+        except Exception as e:
+            reason = f"error: {e}"
+            log_error(f"Bot worker run failed: {e}")
+        finally:
+            self.send_state("idle", reason=reason)
+
+    def serve(self):
+        """Handle commands until shutdown or until the GUI goes away"""
+        while True:
+            try:
+                message = self.channel.recv()
+            except EOFError:
+                log_warning("Controller disconnected - shutting down the bot worker")
+                break
+            command = message.get("cmd")
+            if command == "start":
+                if not self.start():
+                    break
+            elif command == "stop":
+                if self.running():
+                    bot_control.request_stop(immediate=bool(message.get("immediate")))
+                    self.send_state("stopping")
+                else:
+                    self.send_state("idle", reason="not running")
+            elif command == "pause":
+                bot_control.pause()
+            elif command == "resume":
+                bot_control.resume()
+            elif command == "shutdown":
+                break
+            else:
+                log_warning(f"Bot worker: unknown command {command!r}")
+        self.shutdown()
+
+    def shutdown(self, timeout=10.0):
+        if self.running():
+            bot_control.request_stop(immediate=True)
+            self.run_thread.join(timeout)
+        self.channel.close()
+
+
+def main():
+    channel = connect_from_env()
+    if channel is None:
+        log_error("bot_worker.py is started by the GUI; run main.py to use the bot from a terminal")
+        return 1
+    # Logs and status go to the GUI as structured events from here on
+    bot_events.attach(channel)
+    worker = BotWorker(channel)
+    try:
+        worker.warm_up()
+    except Exception as e:
+        log_error(f"Bot worker failed to load the {bot_main.mode_name} modules: {e}")
+        channel.send({"event": "state", "state": "failed", "reason": str(e)})
+        channel.close()
+        return 1
+    worker.serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,6 +31,10 @@ def do_dating():
     Returns:
         bool: True if dating was successfully initiated, False otherwise
     """
+    if load_main_config().get("async_flows", {}).get("enabled", False):
+        from utils import async_core
+        return async_core.run(do_dating_async())
+
     log_debug(f"Starting dating workflow...")
     log_info(f"Starting dating workflow...")
     
@@ -116,6 +120,72 @@ def do_dating():
         return False
 
 
+def _save_debug_and_stop(debug_filename, message):
+    """Save the current screen and raise RuntimeError to stop the bot (as do_dating does)"""
+    screenshot = take_screenshot()
+    screenshot.save(debug_filename)
+    log_error(f"Saved debug screenshot to: {debug_filename}")
+    log_error(f"Stopping bot execution - {message}")
+    raise RuntimeError(f"{message}. Debug image saved to {debug_filename}")
+
+
+async def do_dating_async():
+    """
+    do_dating on the asyncio core (config "async_flows.enabled").
+
+    Same flow, but the fixed 200ms/500ms sleeps after tapping recreation are
+    replaced by one wait for whichever screen shows first: the normal
+    recreation menu (cancel button -> trainee date) or the pal dating screen.
+
+    Returns:
+        bool: True if dating was successfully initiated, False otherwise
+    """
+    from utils import async_core
+
+    log_info(f"Starting dating workflow...")
+
+    def trainee_date_check(screenshot):
+        # Normal recreation screen: the cancel button is showing
+        if not match_template(screenshot, "assets/buttons/cancel_btn.png", confidence=0.8):
+            return None
+        return async_core.image_check("assets/ui/trainee_date.png", confidence=0.8)(screenshot)
+
+    try:
+        tazuna_hint = await async_core.wait_for_image("assets/ui/tazuna_hint.png", timeout=10, confidence=0.8,
+                                                      interval=0.5)
+        if not tazuna_hint:
+            log_warning(f"tazuna_hint not found after waiting - may not be in lobby")
+            await async_core.step(_save_debug_and_stop, "debug_no_tazuna_hint_found.png", "tazuna_hint not found")
+
+        recreation_btn = await async_core.locate("assets/buttons/recreation_btn.png", confidence=0.8)
+        if not recreation_btn:
+            log_warning(f"No recreation button found - cannot access dating")
+            await async_core.step(_save_debug_and_stop, "debug_no_recreation_button_found.png",
+                                  "Recreation button not found")
+        log_info(f"Clicking recreation button to access dating...")
+        await async_core.tap(recreation_btn[0], recreation_btn[1])
+
+        screen, button = await async_core.wait_first({
+            "trainee_date": trainee_date_check,
+            "pal_date": async_core.image_check("assets/ui/pal_date.png", confidence=0.8),
+        }, timeout=3.0, interval=0.1)
+        if screen is None:
+            log_warning(f"Neither the recreation menu nor the pal dating screen showed up")
+            return False
+
+        log_info(f"Selecting {'trainee' if screen == 'trainee_date' else 'pal'} date...")
+        await async_core.tap(button[0], button[1])
+        log_info(f"Selected {'trainee' if screen == 'trainee_date' else 'pal'} date")
+        return True
+
+    except RuntimeError:
+        # Re-raise RuntimeError to stop the bot (e.g., when recreation button not found)
+        raise
+    except Exception as e:
+        log_error(f"Dating workflow failed: {e}")
+        return False
+
+
 def should_use_dating_for_mood(screenshot=None):
     """
     Check if dating should be used instead of recreation for mood improvement.
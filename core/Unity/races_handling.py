@@ -7,10 +7,12 @@ from PIL import ImageStat
 
 from utils.recognizer import locate_on_screen, match_template, locate_all_on_screen, max_match_confidence
 from utils.input import tap, triple_click, long_press, tap_on_image, swipe
-from utils.screenshot import take_screenshot
+from utils.screenshot import take_screenshot, crop_for_ocr
 from utils.template_matching import wait_for_image, deduplicated_matches
 from utils.log import log_debug, log_info, log_warning, log_error, log_success
 from utils.config_loader import load_main_config
+from utils.race_index import get_race_index, get_racing_filters, GRADE_PRIORITY
+from utils.resolution import scaled_point, scaled_region
 from core.Unity.state import check_skill_points_cap, check_current_year
 from core.Unity.ocr import extract_text
 import os
@@ -38,7 +40,7 @@ except Exception:
 
 # Region offsets from fan center (same as test code)
 GRADE_OFFSET = (-118, -115, 93, 69)  # x, y, width, height
-OCR_OFFSET = (-37, -120, 580, 69)  # x, y, width, height
+OCR_OFFSET = scaled_region((-37, -120, 580, 69))  # x, y, width, height
 
 def is_racing_available(year):
     """Check if racing is available based on the current year/month"""
@@ -60,18 +62,11 @@ def is_pre_debut_year(year):
 
 def get_grade_priority(grade):
     """Get priority score for a grade (lower number = higher priority)"""
-    grade_priority = {
-        "G1": 1,
-        "G2": 2,
-        "G3": 3,
-        "OP": 4,
-        "PRE-OP": 5
-    }
-    return grade_priority.get(grade.upper(), 999)  # Unknown grades get lowest priority
+    return GRADE_PRIORITY.get(grade.upper(), 999)  # Unknown grades get lowest priority
 
 def find_target_race_in_screenshot(screenshot, race_description):
     """Find target race in a given screenshot and return fan center coordinates"""
-    matches = locate_all_on_screen("assets/races/fan.png", confidence=0.8, region=(390, 1138, 513, 1495))
+    matches = locate_all_on_screen("assets/races/fan.png", confidence=0.8, region=scaled_region((390, 1138, 513, 1495)))
     
     log_debug(f"Found {len(matches) if matches else 0} fan matches")
     
@@ -86,7 +81,7 @@ def find_target_race_in_screenshot(screenshot, race_description):
         
         # OCR region
         ox, oy, ow, oh = center_x + OCR_OFFSET[0], center_y + OCR_OFFSET[1], OCR_OFFSET[2], OCR_OFFSET[3]
-        text = extract_text(screenshot.crop((ox, oy, ox + ow, oy + oh)))
+        text = extract_text(crop_for_ocr(screenshot, (ox, oy, ox + ow, oy + oh)))
         
         log_debug(f"Fan {i+1} at ({center_x}, {center_y}) - OCR text: '{text}'")
         
@@ -144,7 +139,7 @@ def search_race_with_swiping(race_description, year, max_swipes=3):
     
     for swipe_num in range(1, max_swipes + 1):
         log_debug(f"Swipe {swipe_num}:")
-        swipe(381, 1415, 381, 1223, duration_ms=240)
+        swipe(*scaled_point(381, 1415), *scaled_point(381, 1223), duration_ms=240)
         time.sleep(1)  # Wait for swipe animation
         
         # Take new screenshot after swipe
@@ -246,7 +241,7 @@ def race_day():
                 return True
             
             # Tap middle of screen between checks to advance UI
-            tap(540, 960)  # Click middle of screen (1080x1920 resolution)
+            tap(*scaled_point(540, 960))  # Click middle of screen (1080x1920 resolution)
             time.sleep(0.2)  # 200ms interval
         
         # Safety check to prevent infinite loops
@@ -255,7 +250,7 @@ def race_day():
         return True
     return False
 
-def check_strategy_before_race(region=(660, 974, 378, 120)) -> bool:
+def check_strategy_before_race(region=scaled_region((660, 974, 378, 120))) -> bool:
     """Check and ensure strategy matches config before race."""
     log_debug(f"Checking strategy before race...")
     
@@ -341,10 +336,10 @@ def change_strategy_before_race(expected_strategy: str) -> bool:
     
     # Strategy coordinates mapping
     strategy_coords = {
-        "FRONT": (882, 1159),
-        "PACE": (645, 1159),
-        "LATE": (414, 1159),
-        "END": (186, 1162),
+        "FRONT": scaled_point(882, 1159),
+        "PACE": scaled_point(645, 1159),
+        "LATE": scaled_point(414, 1159),
+        "END": scaled_point(186, 1162),
     }
     
     if expected_strategy not in strategy_coords:
@@ -413,7 +408,7 @@ def race_prep():
             break
         
         # Tap middle of screen between checks to advance UI
-        tap(540, 960)
+        tap(*scaled_point(540, 960))
         time.sleep(0.2)  # 200ms interval
     
     if not view_result_btn:
@@ -454,7 +449,7 @@ def race_prep():
             break
         
         # Tap middle of screen between checks to advance UI
-        tap(540, 960)
+        tap(*scaled_point(540, 960))
         time.sleep(0.2)  # 200ms interval
     
     if not race_started:
@@ -534,7 +529,7 @@ def after_race():
             continue
         
         # Tap middle of screen between checks to advance UI
-        tap(540, 960)
+        tap(*scaled_point(540, 960))
         time.sleep(0.2)  # 200ms interval
     
     if not next_btn:
@@ -572,7 +567,7 @@ def after_race():
             continue
         
         # Spam tap middle of screen between checks to advance UI
-        tap(540, 960)
+        tap(*scaled_point(540, 960))
         time.sleep(0.2)  # 200ms interval
     
     if not next2_btn:
@@ -648,22 +643,15 @@ def find_and_do_race():
             log_debug(f"Could not detect current year")
             return False
         
-        # 2. Load configuration and race data
+        # 2. Load configuration and race index (parsed once per process)
         try:
             config = _load_config()
         except Exception as e:
             log_debug(f"Error loading config: {e}")
             return False
         
-        try:
-            project_root = _get_project_root()
-            with open(os.path.join(project_root, "assets/races/clean_race_data.json"), "r", encoding="utf-8") as f:
-                race_data = json.load(f)
-        except Exception as e:
-            log_debug(f"Error loading race data: {e}")
-            return False
-        
-        if not race_data:
+        race_index = get_race_index()
+        if not race_index:
             log_debug(f"Failed to load race data")
             return False
         
@@ -672,56 +660,20 @@ def find_and_do_race():
         from core.Unity.state import check_goal_name
         goal_name = check_goal_name()
         
-        # Override allowed grades if goal contains G1
         racing_config_section = config.get("racing", {})
         if goal_name and "G1" in goal_name:
             log_debug(f"Goal contains G1: '{goal_name}' - Overriding to only allow G1 races")
-            allowed_grades = ["G1"]
-        else:
-            allowed_grades = racing_config_section.get("allowed_grades", ["G1", "G2", "G3", "OP", "PRE-OP"])
-        
-        allowed_tracks = racing_config_section.get("allowed_tracks", ["Turf", "Dirt"])
-        allowed_distances = racing_config_section.get("allowed_distances", ["Sprint", "Mile", "Medium", "Long"])
-        
-        # Find best race using the existing logic
-        best_race = None
-        best_grade = None
-        best_priority = 999
-        best_fans = 0
-        
-        if year in race_data:
-            for race_name, race_info in race_data[year].items():
-                race_grade = race_info.get("grade", "UNKNOWN")
-                race_surface = race_info.get("surface", "UNKNOWN")
-                race_category = race_info.get("distance_type", "UNKNOWN")
-                
-                # Check if this grade is allowed
-                if race_grade not in allowed_grades:
-                    continue
-                
-                # Check if this track/surface is allowed
-                if allowed_tracks and race_surface not in allowed_tracks:
-                    continue
-                
-                # Check if this distance/category is allowed
-                if allowed_distances and race_category not in allowed_distances:
-                    continue
-                
-                # Get priority score for this grade
-                priority = get_grade_priority(race_grade)
-                fans = race_info.get("fans", 0)
-                
-                # Update best race if this one is better
-                if priority < best_priority or (priority == best_priority and fans > best_fans):
-                    best_race = race_name
-                    best_grade = race_grade
-                    best_priority = priority
-                    best_fans = fans
-        
-        if not best_race:
+        allowed_grades, allowed_tracks, allowed_distances = get_racing_filters(racing_config_section, goal_name)
+        
+        # Fast check before navigating into the race screen
+        best = race_index.best_race(year, allowed_grades, allowed_tracks, allowed_distances)
+        if not best:
             log_debug(f"No suitable race found")
             return False
         
+        best_race, race_info = best
+        best_grade = race_info.get("grade", "UNKNOWN")
+        
         log_debug(f"Best race selected: {best_race} ({best_grade})")
         
         # 4. Enter race selection screen
@@ -742,7 +694,6 @@ def find_and_do_race():
         log_debug(f"Looking for: {best_race}")
         
         # Get race description for OCR matching
-        race_info = race_data[year][best_race]
         race_description = race_info.get("description", "")
         log_debug(f"Race description: {race_description}")
         
@@ -813,17 +764,10 @@ def do_custom_race():
         # 6. Search for the custom race using OCR
         log_debug(f"Searching for custom race in Race Select Screen...")
         
-        # Load race data to get the description for OCR matching
-        try:
-            project_root = _get_project_root()
-            with open(os.path.join(project_root, "assets/races/clean_race_data.json"), "r", encoding="utf-8") as f:
-                race_data = json.load(f)
-        except Exception as e:
-            log_debug(f"Error loading race data: {e}")
-            race_data = {}
+        # Look up the description for OCR matching
+        race_info = get_race_index().get_race(year, custom_race)
         
-        if year in race_data and custom_race in race_data[year]:
-            race_info = race_data[year][custom_race]
+        if race_info:
             race_description = race_info.get("description", "")
             log_debug(f"Race description: {race_description}")
         else:
@@ -842,7 +786,7 @@ def do_custom_race():
         # Try tapping the back button image first; if not found, tap a likely back position
         if not tap_on_image("assets/buttons/back_btn.png", confidence=0.6, min_search=3):
             # Fallback: common back coordinate in race selection
-            tap(78, 138)
+            tap(*scaled_point(78, 138))
             time.sleep(0.5)
         return False
         
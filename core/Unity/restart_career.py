@@ -18,11 +18,13 @@ SUPPORTS_DIR = os.path.join(PROJECT_ROOT, "template", "supports")
 os.makedirs(SUPPORTS_DIR, exist_ok=True)
 
 from utils.recognizer import match_template
-from utils.screenshot import take_screenshot
+from utils.pixel_probe import load_probe
+from utils.screenshot import take_screenshot, crop_for_ocr
 from utils.input import tap
 from core.Unity.skill_auto_purchase import click_image_button
 from core.Unity.ocr import extract_text, extract_number
 from utils.config_loader import load_main_config
+from utils.resolution import scaled, scaled_point, scaled_region
 
 
 def load_restart_config() -> Dict[str, Any]:
@@ -50,8 +52,8 @@ def check_complete_career_screen(screenshot=None) -> bool:
 
 def extract_total_fans(screenshot) -> int:
     """Extract total fans from the Complete Career screen"""
-    region = (735, 335, 939, 401)
-    cropped = screenshot.crop(region)
+    region = scaled_region((735, 335, 939, 401))
+    cropped = crop_for_ocr(screenshot, region)
     text = extract_text(cropped)
     cleaned_text = ''.join(char for char in text if char.isdigit())
     
@@ -66,8 +68,8 @@ def extract_total_fans(screenshot) -> int:
 
 def extract_skill_points(screenshot) -> int:
     """Extract skill points from the Complete Career screen"""
-    region = (327, 1609, 441, 1651)
-    cropped = screenshot.crop(region)
+    region = scaled_region((327, 1609, 441, 1651))
+    cropped = crop_for_ocr(screenshot, region)
     number = extract_number(cropped)
     
     try:
@@ -125,7 +127,8 @@ def execute_skill_purchase_workflow(available_points: int):
         if purchase_plan:
             affordable_skills, total_cost, remaining_points = filter_affordable_skills(purchase_plan, available_points)
             if affordable_skills:
-                execute_skill_purchases(affordable_skills, end_career=True)
+                execute_skill_purchases(affordable_skills, end_career=True, available_points=available_points,
+                                        positions_reliable=scan_result.get('positions_reliable', False))
     
     # Return to complete career screen
     return_to_complete_career_screen()
@@ -278,44 +281,73 @@ def filter_support():
         time.sleep(0.5)
 
 
+# Centre of the skip button from the last template match; later checks probe
+# the variant there with assets/probes/skip_variant.json
+_skip_button_center = None
+
+def _probe_skip_variant(screenshot):
+    """Skip variant at the last seen position: (template_path, center) or None when unsure"""
+    probe = load_probe("skip_variant")
+    if probe is None or _skip_button_center is None:
+        return None
+    variant = probe.check(screenshot, _skip_button_center)
+    if variant is None:
+        return None
+    # The probe only samples a few pixels: confirm the button is really there
+    # with one match of that variant around the cached position before tapping
+    template_path = f"assets/buttons/skip_{variant}.png"
+    x, y = _skip_button_center
+    half_width, half_height = scaled(130), scaled(50)
+    region = (max(x - half_width, 0), max(y - half_height, 0), 2 * half_width, 2 * half_height)
+    if not match_template(screenshot, template_path, confidence=0.7, region=region):
+        log_debug(f"Skip probe said {variant} but the template does not match there")
+        return None
+    return template_path, _skip_button_center
+
 def skip_check():
     """Check which skip button is on screen and adjust accordingly."""
+    global _skip_button_center
     log_info(f"Checking skip button...")
     
     screenshot = take_screenshot()
     
-    skip_variants = [
-        ("assets/buttons/skip_off.png", "Skip Off"),
-        ("assets/buttons/skip_x1.png", "Skip x1"),
-        ("assets/buttons/skip_x2.png", "Skip x2")
-    ]
-    
-    best_match = None
-    best_confidence = 0
-    
-    for template_path, variant_name in skip_variants:
-        if os.path.exists(template_path):
-            from utils.recognizer import max_match_confidence
-            confidence = max_match_confidence(screenshot, template_path)
-            if confidence and confidence > best_confidence:
-                best_confidence = confidence
-                best_match = template_path
-    
-    if best_match and best_confidence > 0.7:
-        if "skip_off" in best_match:
-            matches = match_template(screenshot, best_match, confidence=0.7)
-            if matches:
-                x, y, w, h = matches[0]
-                center = (x + w//2, y + h//2)
-                tap(center[0], center[1])
-                time.sleep(0.1)
-                tap(center[0], center[1])
-        elif "skip_x1" in best_match:
-            matches = match_template(screenshot, best_match, confidence=0.7)
-            if matches:
-                x, y, w, h = matches[0]
-                center = (x + w//2, y + h//2)
-                tap(center[0], center[1])
+    probed = _probe_skip_variant(screenshot)
+    if probed:
+        best_match, center = probed
+        log_debug(f"Skip button probed: {best_match}")
+    else:
+        skip_variants = [
+            ("assets/buttons/skip_off.png", "Skip Off"),
+            ("assets/buttons/skip_x1.png", "Skip x1"),
+            ("assets/buttons/skip_x2.png", "Skip x2")
+        ]
+        
+        best_match = None
+        best_confidence = 0
+        
+        for template_path, variant_name in skip_variants:
+            if os.path.exists(template_path):
+                from utils.recognizer import max_match_confidence
+                confidence = max_match_confidence(screenshot, template_path)
+                if confidence and confidence > best_confidence:
+                    best_confidence = confidence
+                    best_match = template_path
+        
+        if not best_match or best_confidence <= 0.7:
+            return
+        matches = match_template(screenshot, best_match, confidence=0.7)
+        if not matches:
+            return
+        x, y, w, h = matches[0]
+        center = (int(x + w//2), int(y + h//2))
+        _skip_button_center = center
+    
+    if "skip_off" in best_match:
+        tap(center[0], center[1])
+        time.sleep(0.1)
+        tap(center[0], center[1])
+    elif "skip_x1" in best_match:
+        tap(center[0], center[1])
 
 
 def start_career() -> bool:
@@ -412,7 +444,7 @@ def start_career() -> bool:
             return False
         
         # Step 10: Tap coordinates
-        tap(213, 939)
+        tap(*scaled_point(213, 939))
         time.sleep(0.5)
         
         # Step 11: Skip check
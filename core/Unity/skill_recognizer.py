@@ -5,8 +5,12 @@ import os
 import time
 import re
 import json
-from utils.screenshot import take_screenshot
+from utils.screenshot import take_screenshot, crop_for_ocr
 from utils.input import perform_swipe
+from utils.resolution import scaled, scaled_region, scaled_template_path
+from utils.skill_matcher import find_duplicate_candidates
+from utils.scroll_registration import estimate_vertical_offset, wait_for_stable_frame
+from utils.pixel_probe import load_probe
 
 from utils.log import log_debug, log_info, log_warning, log_error
 
@@ -17,6 +21,15 @@ except ImportError:
     OCR_AVAILABLE = False
     log_debug(f"Warning: pytesseract not available. OCR features will be disabled.")
 
+# Scrolling skill list on screen: below the skill points header, above the confirm button
+SKILL_LIST_REGION = scaled_region((0, 680, 1080, 1580))
+# Bottom of the price region relative to the skill_up button top
+SKILL_ROW_BOTTOM_OFFSET = scaled(45)
+# Buttons within this many pixels of a known list position are the same row
+SKILL_ROW_TOLERANCE = scaled(20)
+# A swipe that moves the list less than this has hit the end of the list
+SKILL_LIST_END_TOLERANCE = scaled(5)
+
 
 
 def remove_overlapping_rectangles(rectangles, overlap_threshold=0.5):
@@ -75,7 +88,29 @@ def remove_overlapping_rectangles(rectangles, overlap_threshold=0.5):
     
     return result
 
-def extract_skill_info(screenshot, button_x, button_y, anchor_x=946, anchor_y=809):
+def _skill_name_region(button_x, button_y, anchor_x=scaled(946), anchor_y=scaled(809)):
+    """Skill name region for a button (204, 719, 732, 788 at the anchor; width: 528, height: 69)"""
+    offset_x = button_x - anchor_x
+    offset_y = button_y - anchor_y
+    return (scaled(204) + offset_x, scaled(719) + offset_y, scaled(732) + offset_x, scaled(788) + offset_y)
+
+def read_skill_name(screenshot, button_x, button_y):
+    """
+    OCR only the name of the row a skill_up button belongs to (no price read).
+    
+    Returns:
+        str: cleaned skill name, or "" if OCR is unavailable or fails
+    """
+    if not OCR_AVAILABLE:
+        return ""
+    try:
+        name_crop = crop_for_ocr(screenshot, _skill_name_region(button_x, button_y))
+        return clean_skill_name(pytesseract.image_to_string(name_crop, lang='eng').strip())
+    except Exception as e:
+        log_debug(f"Name OCR error: {e}")
+        return ""
+
+def extract_skill_info(screenshot, button_x, button_y, anchor_x=scaled(946), anchor_y=scaled(809)):
     """
     Extract skill name and price from screenshot using button position as anchor.
     
@@ -101,24 +136,19 @@ def extract_skill_info(screenshot, button_x, button_y, anchor_x=946, anchor_y=80
         offset_y = button_y - anchor_y
         
         # Define regions relative to anchor
-        # Skill name region: 204, 719, 732, 788 (width: 528, height: 69)
-        name_x1 = 204 + offset_x
-        name_y1 = 719 + offset_y
-        name_x2 = 732 + offset_x
-        name_y2 = 788 + offset_y
-        name_region = (name_x1, name_y1, name_x2, name_y2)
+        name_region = _skill_name_region(button_x, button_y, anchor_x, anchor_y)
         
         # Skill price region: 834, 803, 927, 854 (width: 93, height: 51)
-        price_x1 = 834 + offset_x
-        price_y1 = 803 + offset_y
-        price_x2 = 927 + offset_x
-        price_y2 = 854 + offset_y
+        price_x1 = scaled(834) + offset_x
+        price_y1 = scaled(803) + offset_y
+        price_x2 = scaled(927) + offset_x
+        price_y2 = scaled(854) + offset_y
         price_region = (price_x1, price_y1, price_x2, price_y2)
         
         # Extract skill name with simple OCR
         skill_name = "Name Error"
         try:
-            name_crop = screenshot.crop(name_region)
+            name_crop = crop_for_ocr(screenshot, name_region)
             skill_name_raw = pytesseract.image_to_string(name_crop, lang='eng').strip()
             skill_name = clean_skill_name(skill_name_raw)
         except Exception as e:
@@ -127,7 +157,7 @@ def extract_skill_info(screenshot, button_x, button_y, anchor_x=946, anchor_y=80
         # Extract skill price with simple OCR
         skill_price = "Price Error"
         try:
-            price_crop = screenshot.crop(price_region)
+            price_crop = crop_for_ocr(screenshot, price_region)
             
             # Try multiple OCR approaches
             skill_price_raw = ""
@@ -255,16 +285,15 @@ def is_button_available(screenshot, x, y, width, height, brightness_threshold=15
         tuple: (is_available: bool, avg_brightness: float)
     """
     try:
-        # Extract the button region
-        button_region = screenshot.crop((x, y, x + width, y + height))
-        
-        # Convert to grayscale for brightness analysis
-        gray_button = button_region.convert('L')
-        
-        # Calculate average brightness
-        import numpy as np
-        brightness_array = np.array(gray_button)
-        avg_brightness = np.mean(brightness_array)
+        # Pixel probe over the button (assets/probes/skill_button_available.json)
+        probe = load_probe("skill_button_available")
+        if probe is not None:
+            avg_brightness = probe.evaluate(screenshot, origin=(x, y)).mean_gray
+        else:
+            # Average brightness of the whole button region
+            import numpy as np
+            gray_button = screenshot.crop((x, y, x + width, y + height)).convert('L')
+            avg_brightness = np.mean(np.array(gray_button))
         
         # Check if button is bright enough (available)
         is_available = avg_brightness >= brightness_threshold
@@ -285,7 +314,7 @@ def _load_skill_template():
             'error': f"Template not found: {template_path}"
         }
     
-    template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+    template = cv2.imread(scaled_template_path(template_path), cv2.IMREAD_COLOR)
     if template is None:
         return None, {
             'count': 0, 'locations': [], 'debug_image_path': None,
@@ -371,6 +400,40 @@ def _extract_skills_info(screenshot, available_matches, extract_skills):
     
     return skills_info
 
+def find_skill_button_near(screenshot, x, y, margin=SKILL_ROW_TOLERANCE, confidence=0.9, brightness_threshold=150):
+    """
+    Confirm an available skill_up button near an expected screen position.
+    
+    Args:
+        screenshot: PIL Image of the screen
+        x, y: Expected top-left of the button
+        margin: Search margin around the expected position in pixels
+        confidence: Template matching confidence
+        brightness_threshold: Minimum average brightness for an available button
+    
+    Returns:
+        tuple: (x, y, w, h) of the button on screen, or None if not found/unavailable
+    """
+    template, _ = _load_skill_template()
+    if template is None:
+        return None
+    template_height, template_width = template.shape[:2]
+    left = max(int(x) - margin, 0)
+    top = max(int(y) - margin, 0)
+    right = min(int(x) + template_width + margin, screenshot.width)
+    bottom = min(int(y) + template_height + margin, screenshot.height)
+    if right - left < template_width or bottom - top < template_height:
+        return None
+    
+    matches = _perform_template_matching(screenshot.crop((left, top, right, bottom)).convert("RGB"), template, confidence)
+    if not matches:
+        return None
+    # Closest match to the expected position
+    mx, my, w, h = min(matches, key=lambda m: abs(left + m[0] - x) + abs(top + m[1] - y))
+    location = (left + int(mx), top + int(my), w, h)
+    is_available, _ = is_button_available(screenshot, *location, brightness_threshold)
+    return location if is_available else None
+
 def recognize_skill_up_locations(confidence=0.9, debug_output=True, overlap_threshold=0.5, 
                                filter_dark_buttons=True, brightness_threshold=150,
                                extract_skills=True):
@@ -565,11 +628,25 @@ def generate_debug_image(screenshot, locations, confidence, brightness_info=None
         log_debug(f"Error generating debug image: {e}")
         return None
 
-def scan_all_skills_with_scroll(swipe_start_x=504, swipe_start_y=1490, swipe_end_x=504, swipe_end_y=926,
-                               confidence=0.9, brightness_threshold=150, max_scrolls=20):
+def _is_row_fully_visible(location, list_region=SKILL_LIST_REGION):
+    """A row is fully visible when its price region (below the button) is inside the list area."""
+    x, y, w, h = location
+    return y + SKILL_ROW_BOTTOM_OFFSET <= list_region[3]
+
+def _is_row_known(known_rows, list_y, tolerance=SKILL_ROW_TOLERANCE):
+    """Check whether a button at this list position was already seen on an earlier frame."""
+    return any(abs(list_y - known_y) <= tolerance for known_y in known_rows)
+
+def scan_all_skills_with_scroll(swipe_start_x=scaled(504), swipe_start_y=scaled(1490), swipe_end_x=scaled(504), swipe_end_y=scaled(926),
+                               confidence=0.9, brightness_threshold=150, max_scrolls=20,
+                               settle_timeout=2.0):
     """
-    Scan all available skills by scrolling through the list until duplicates are found.
-    Uses optimized slow swipe for smooth scrolling without acceleration.
+    Scan all available skills by scrolling through the list.
+    
+    Each swipe is registered against the previous frame to measure how far the
+    list moved, so only rows that were newly revealed are OCR'd, and the end of
+    the list is detected when a swipe no longer moves it. If registration fails
+    the scan falls back to OCR'ing every visible row and stopping on a duplicate name.
     
     Args:
         swipe_start_x, swipe_start_y: Starting coordinates for swipe
@@ -577,103 +654,151 @@ def scan_all_skills_with_scroll(swipe_start_x=504, swipe_start_y=1490, swipe_end
         confidence: Template matching confidence (default: 0.9)
         brightness_threshold: Brightness threshold for available buttons (default: 150)
         max_scrolls: Maximum number of scrolls to prevent infinite loops (default: 20)
+        settle_timeout: Maximum seconds to wait for the scroll animation to settle
     
     Returns:
         dict: {
             'all_skills': [list of all unique skills found],
             'total_unique_skills': int,
             'scrolls_performed': int,
-            'duplicate_found': str or None
+            'duplicate_found': str or None,
+            'end_reached': bool,
+            'scroll_offsets': [measured list offset after each scroll, None if unknown],
+            'positions_reliable': bool,
+            'rows_ocr': int
         }
+        Each skill additionally carries 'scroll_index' (scrolls performed when it
+        was read) and 'screen_position' (button center on screen at that point).
+        Rows read while registration still held also carry 'list_y' (button top
+        in list coordinates, 0 = top of the list); after a failed registration
+        the scroll position is unknown, so later rows are left without it.
     """
     log_debug(f"Scanning all available skills with scrolling")
     log_debug(f"=" * 60)
     
     all_skills = []
     seen_skill_names = set()
+    known_rows = []
+    scroll_offsets = []
+    scroll_position = 0
+    positions_reliable = True
     scrolls_performed = 0
+    rows_ocr = 0
     duplicate_found = None
+    end_reached = False
+    
+    def scan_frame(screenshot, final):
+        """Detect buttons on one frame and OCR the rows not seen before. Returns duplicate name or None."""
+        nonlocal rows_ocr
+        matches = _perform_template_matching(screenshot, template, confidence)
+        unique_matches = remove_overlapping_rectangles(matches, 0.5)
+        available_matches, _ = _filter_available_buttons(
+            screenshot, unique_matches, True, brightness_threshold
+        )
+        
+        new_rows = []
+        for location in available_matches:
+            list_y = int(location[1]) + scroll_position
+            if positions_reliable and _is_row_known(known_rows, list_y):
+                continue
+            # Rows cut off at the bottom edge are read once they scroll fully into view
+            if not final and not _is_row_fully_visible(location):
+                continue
+            new_rows.append(location)
+        
+        rows_ocr += len(new_rows)
+        for skill in _extract_skills_info(screenshot, new_rows, True):
+            x, y, w, h = (int(v) for v in skill['location'])
+            skill_name = skill['name']
+            if skill_name in seen_skill_names:
+                if not positions_reliable:
+                    log_debug(f"Duplicate found: '{skill_name}' - end of list reached")
+                    return skill_name
+                log_debug(f"Skill name '{skill_name}' repeated at a new list position, skipping")
+                continue
+            seen_skill_names.add(skill_name)
+            if positions_reliable:
+                known_rows.append(y + scroll_position)
+                skill['list_y'] = y + scroll_position
+            skill['scroll_index'] = scrolls_performed
+            skill['screen_position'] = (x + w // 2, y + h // 2)
+            all_skills.append(skill)
+            log_debug(f"{len(all_skills)}. {skill_name} - {skill['price']}")
+        log_debug(f"Read {len(new_rows)} new rows (Total: {len(all_skills)})")
+        return None
     
     try:
-        while scrolls_performed < max_scrolls:
+        template, error_result = _load_skill_template()
+        if template is None:
+            log_debug(f"Error during skill detection: {error_result['error']}")
+            raise RuntimeError(error_result['error'])
+        
+        screenshot = take_screenshot()
+        while True:
             log_debug(f"Scroll {scrolls_performed + 1}/{max_scrolls}")
+            duplicate_found = scan_frame(screenshot, final=scrolls_performed >= max_scrolls)
+            if duplicate_found:
+                log_debug(f"Stopping scan - we've looped back to already seen skills")
+                break
             
-            # Take screenshot and detect skills
-            result = recognize_skill_up_locations(
-                confidence=confidence,
-                debug_output=False,
-                filter_dark_buttons=True,
-                brightness_threshold=brightness_threshold,
-                extract_skills=True
-            )
+            if not all_skills and scrolls_performed >= 3:
+                log_debug(f"No skills found after 3 scrolls - may not be on skill screen")
+                break
             
-            if 'error' in result:
-                log_debug(f"Error during skill detection: {result['error']}")
+            if scrolls_performed >= max_scrolls:
                 break
             
-            current_skills = result.get('skills', [])
-            new_skills_found = 0
+            # Perform swipe to scroll down, then wait for the list to stop moving
+            log_debug(f"Scrolling")
+            success = perform_swipe(swipe_start_x, swipe_start_y, swipe_end_x, swipe_end_y)
+            if not success:
+                log_debug(f"Failed to perform swipe, stopping scan")
+                break
+            scrolls_performed += 1
             
-            if not current_skills:
-                log_debug(f"No skills found on this screen")
-                # Don't break here - continue scrolling to find skills
-                # Only break if we've tried several empty screens in a row
-                if scrolls_performed >= 3 and len(all_skills) == 0:
-                    log_debug(f"No skills found after 3 scrolls - may not be on skill screen")
-                    break
-            else:
-                # Check for duplicates and add new skills
-                for skill in current_skills:
-                    skill_name = skill['name']
-                    
-                    if skill_name in seen_skill_names:
-                        log_debug(f"Duplicate found: '{skill_name}' - end of list reached")
-                        duplicate_found = skill_name
-                        log_debug(f"Stopping scan - we've looped back to already seen skills")
-                        break
-                    else:
-                        seen_skill_names.add(skill_name)
-                        all_skills.append(skill)
-                        new_skills_found += 1
-                        log_debug(f"{len(all_skills)}. {skill_name} - {skill['price']}")
-                
-                # Stop if duplicate found
-                if duplicate_found:
-                    break
+            next_screenshot = wait_for_stable_frame(take_screenshot, SKILL_LIST_REGION, timeout=settle_timeout)
+            offset, match_confidence = estimate_vertical_offset(screenshot, next_screenshot, SKILL_LIST_REGION)
+            scroll_offsets.append(offset)
+            screenshot = next_screenshot
             
-            log_debug(f"Found {new_skills_found} new skills (Total: {len(all_skills)}")
+            if offset is None:
+                if positions_reliable:
+                    log_debug(f"Scroll registration failed (confidence {match_confidence:.3f}) - "
+                              f"falling back to full-screen OCR with duplicate detection")
+                positions_reliable = False
+                continue
             
-            # Perform swipe to scroll down
-            scrolls_performed += 1
-            if scrolls_performed < max_scrolls:
-                log_debug(f"Scrolling")
-                time.sleep(0.5)  # Wait before swipe to ensure UI is ready
-                success = perform_swipe(swipe_start_x, swipe_start_y, swipe_end_x, swipe_end_y)
-                
-                if not success:
-                    log_debug(f"Failed to perform swipe, stopping scan")
-                    break
-                
-                # Wait for scroll animation to complete
-                time.sleep(1.5)
+            if positions_reliable and offset <= SKILL_LIST_END_TOLERANCE:
+                log_debug(f"List did not move ({offset}px) - end of list reached")
+                end_reached = True
+                # Read any rows that were held back because they were cut off
+                scan_frame(screenshot, final=True)
+                break
+            
+            scroll_position += offset
         
         # Summary
         log_debug(f"=" * 60)
         log_debug(f"Skill Scan Complete")
         log_debug(f"Total unique skills found: {len(all_skills)}")
         log_debug(f"Scrolls performed: {scrolls_performed}")
+        log_debug(f"Rows OCR'd: {rows_ocr}")
         if duplicate_found:
             log_debug(f"Stopped due to duplicate: {duplicate_found}")
+        elif end_reached:
+            log_debug(f"Scan completed - reached end of list")
         elif scrolls_performed >= max_scrolls:
             log_debug(f"Stopped due to max scroll limit reached")
-        else:
-            log_debug(f"Scan completed - reached end of list")
         
         return {
             'all_skills': all_skills,
             'total_unique_skills': len(all_skills),
             'scrolls_performed': scrolls_performed,
-            'duplicate_found': duplicate_found
+            'duplicate_found': duplicate_found,
+            'end_reached': end_reached,
+            'scroll_offsets': scroll_offsets,
+            'positions_reliable': positions_reliable,
+            'rows_ocr': rows_ocr
         }
         
     except Exception as e:
@@ -683,10 +808,13 @@ def scan_all_skills_with_scroll(swipe_start_x=504, swipe_start_y=1490, swipe_end
             'total_unique_skills': len(all_skills),
             'scrolls_performed': scrolls_performed,
             'duplicate_found': None,
+            'end_reached': False,
+            'scroll_offsets': scroll_offsets,
+            'positions_reliable': False,
+            'rows_ocr': rows_ocr,
             'error': str(e)
         }
 
-
 def deduplicate_skills(skills_list, similarity_threshold=0.8):
     """
     Deduplicate skills based on name similarity to avoid purchasing duplicate skills.
@@ -710,8 +838,13 @@ def deduplicate_skills(skills_list, similarity_threshold=0.8):
     deduplicated = []
     seen_names = set()
     
-    for skill in sorted_skills:
-        skill_name = skill.get('name', '').lower().strip()
+    # Character-count bounds rule out most pairs before the exact Levenshtein check
+    names = [skill.get('name', '').lower().strip() for skill in sorted_skills]
+    candidates = find_duplicate_candidates(names, similarity_threshold)
+    first_index = {}
+    
+    for i, skill in enumerate(sorted_skills):
+        skill_name = names[i]
         
         if not skill_name:
             continue
@@ -719,6 +852,8 @@ def deduplicate_skills(skills_list, similarity_threshold=0.8):
         # Check if this skill name is similar to any already seen
         is_duplicate = False
         for seen_name in seen_names:
+            if not candidates[i, first_index[seen_name]]:
+                continue
             similarity = calculate_string_similarity(skill_name, seen_name)
             if similarity >= similarity_threshold:
                 is_duplicate = True
@@ -728,6 +863,7 @@ def deduplicate_skills(skills_list, similarity_threshold=0.8):
         if not is_duplicate:
             deduplicated.append(skill)
             seen_names.add(skill_name)
+            first_index.setdefault(skill_name, i)
             log_debug(f"Added unique skill: '{skill['name']}'")
         else:
             log_debug(f"Skipped duplicate skill: '{skill['name']}'")
@@ -8,11 +8,12 @@ import os
 
 from utils.recognizer import locate_on_screen, locate_all_on_screen, is_image_on_screen, match_template, max_match_confidence
 from utils.input import tap, triple_click, swipe, tap_on_image
-from utils.screenshot import take_screenshot, enhanced_screenshot
+from utils.screenshot import take_screenshot, enhanced_screenshot, crop_for_ocr
 from utils.constants_unity import *
 from utils.log import log_debug, log_info, log_warning, log_error
 from utils.template_matching import wait_for_image, deduplicated_matches
 from utils.config_loader import load_main_config
+from utils.resolution import scaled, scaled_point
 
 # Load config for DEBUG_MODE
 config = load_main_config()
@@ -64,6 +65,44 @@ def _filtered_template_matches(screenshot, template_path, region_cv, confidence=
 
 
 
+def check_support_bonds(screenshot):
+    """
+    Find support card icons by type and classify each card's bond level from the bar color.
+
+    Returns:
+        dict: {type: [{'bbox', 'center', 'bond_sample_point', 'bond_color', 'bond_level'}, ...]}
+              for each type with at least one card
+    """
+    left, top, right, bottom = SUPPORT_CARD_ICON_REGION
+    region_cv = (left, top, right - left, bottom - top)
+    detailed_support = {}
+    rgb_img = screenshot.convert("RGB")
+    width, height = rgb_img.size
+    dx, dy = BOND_SAMPLE_OFFSET
+    for t_key, tpl in SUPPORT_ICON_PATHS.items():
+        matches = _filtered_template_matches(screenshot, tpl, region_cv, confidence=0.8)
+        if not matches:
+            continue
+        entries = []
+        for (x, y, w, h) in matches:
+            cx, cy = int(x + w // 2), int(y + h // 2)
+            sx, sy = cx + dx, cy + dy
+            sx = max(0, min(width - 1, sx))
+            sy = max(0, min(height - 1, sy))
+            r, g, b = rgb_img.getpixel((sx, sy))
+            level = _classify_bond_level((r, g, b))
+            entries.append({
+                "bbox": [int(x), int(y), int(w), int(h)],
+                "center": [cx, cy],
+                "bond_sample_point": [int(sx), int(sy)],
+                "bond_color": [int(r), int(g), int(b)],
+                "bond_level": int(level),
+            })
+        if entries:
+            detailed_support[t_key] = entries
+    return detailed_support
+
+
 def go_to_training():
     """Go to training screen"""
     log_debug(f"Going to training screen...")
@@ -85,11 +124,11 @@ def check_training(go_back=True, year=None):
     
     # Fixed coordinates for each training type
     training_coords = {
-        "spd": (165, 1557),
-        "sta": (357, 1563),
-        "pwr": (546, 1557),
-        "guts": (735, 1566),
-        "wit": (936, 1572)
+        "spd": scaled_point(165, 1557),
+        "sta": scaled_point(357, 1563),
+        "pwr": scaled_point(546, 1557),
+        "guts": scaled_point(735, 1566),
+        "wit": scaled_point(936, 1572)
     }
     results = {}
 
@@ -110,39 +149,13 @@ def check_training(go_back=True, year=None):
         
         # Step 2: One pass: capture screenshot, evaluate support counts, bond levels, hint, and spirit training
         screenshot = take_screenshot()
-        left, top, right, bottom = SUPPORT_CARD_ICON_REGION
-        region_cv = (left, top, right - left, bottom - top)
 
         # Support counts - pass screenshot to avoid taking new one
         support_counts = check_support_card(screenshot)  # ✅ Pass screenshot
         total_support = sum(support_counts.values())
 
         # Bond levels per type
-        detailed_support = {}
-        rgb_img = screenshot.convert("RGB")
-        width, height = rgb_img.size
-        dx, dy = BOND_SAMPLE_OFFSET
-        for t_key, tpl in SUPPORT_ICON_PATHS.items():
-            matches = _filtered_template_matches(screenshot, tpl, region_cv, confidence=0.8)
-            if not matches:
-                continue
-            entries = []
-            for (x, y, w, h) in matches:
-                cx, cy = int(x + w // 2), int(y + h // 2)
-                sx, sy = cx + dx, cy + dy
-                sx = max(0, min(width - 1, sx))
-                sy = max(0, min(height - 1, sy))
-                r, g, b = rgb_img.getpixel((sx, sy))
-                level = _classify_bond_level((r, g, b))
-                entries.append({
-                    "bbox": [int(x), int(y), int(w), int(h)],
-                    "center": [cx, cy],
-                    "bond_sample_point": [int(sx), int(sy)],
-                    "bond_color": [int(r), int(g), int(b)],
-                    "bond_level": int(level),
-                })
-            if entries:
-                detailed_support[t_key] = entries
+        detailed_support = check_support_bonds(screenshot)
 
         # Hint - pass screenshot to avoid taking new one
         hint_found = check_hint(screenshot)  # ✅ Pass screenshot
@@ -259,11 +272,11 @@ def do_train(train, already_on_training_screen=False):
     
     # Fixed coordinates for each training type
     training_coords = {
-        "spd": (165, 1557),
-        "sta": (357, 1563),
-        "pwr": (546, 1557),
-        "guts": (735, 1566),
-        "wit": (936, 1572)
+        "spd": scaled_point(165, 1557),
+        "sta": scaled_point(357, 1563),
+        "pwr": scaled_point(546, 1557),
+        "guts": scaled_point(735, 1566),
+        "wit": scaled_point(936, 1572)
     }
     
     # Check if the requested training type exists
@@ -516,10 +529,10 @@ def check_spirit_training_extra(
     # Region format: (x1, y1, x2, y2) = (left, top, right, bottom)
     # Region size: width=66, height=117
     # Offset: left_offset = -28, top_offset = 24 (positive = below center)
-    REGION_WIDTH = 66
-    REGION_HEIGHT = 117
-    LEFT_OFFSET = -28  # 28 pixels to the left of spirit training center
-    TOP_OFFSET = 24    # 24 pixels below spirit training center (positive = below)
+    REGION_WIDTH = scaled(66)
+    REGION_HEIGHT = scaled(117)
+    LEFT_OFFSET = scaled(-28)  # 28 pixels to the left of spirit training center
+    TOP_OFFSET = scaled(24)    # 24 pixels below spirit training center (positive = below)
     
     count = 0
     
@@ -705,7 +718,7 @@ def check_failure(screenshot, train_type):
             current_screenshot = screenshot
         
         # Crop from current screenshot
-        img = current_screenshot.crop(region)
+        img = crop_for_ocr(current_screenshot, region)
         
         # White text specialization: create white mask and enhance contrast
         raw_img = img.convert("RGB")
@@ -757,7 +770,7 @@ def check_failure(screenshot, train_type):
             current_screenshot = screenshot
         
         # Crop from current screenshot
-        raw_img = current_screenshot.crop(region)
+        raw_img = crop_for_ocr(current_screenshot, region)
         raw_img = raw_img.resize((raw_img.width * 2, raw_img.height * 2), Image.BICUBIC)
         raw_img = raw_img.convert("RGB")
         raw_np = np.array(raw_img)
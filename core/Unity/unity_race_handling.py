@@ -6,10 +6,11 @@ from utils.template_matching import deduplicated_matches
 from utils.screenshot import take_screenshot
 from utils.input import tap, wait_and_tap
 from utils.log import log_info, log_debug, log_warning
+from utils.resolution import scaled_region
 
 # Regions (x1, y1, x2, y2)
-TEAM_RANK_REGION = (0, 48, 270, 201)
-OPPONENT_RANK_REGION = (3, 217, 387, 1465)
+TEAM_RANK_REGION = scaled_region((0, 48, 270, 201))
+OPPONENT_RANK_REGION = scaled_region((3, 217, 387, 1465))
 
 # Rank order (higher first)
 RANK_ORDER = ["S", "A", "B", "C", "D", "E", "G"]
@@ -2,27 +2,17 @@ import os
 import json
 import re
 import time
-import sys
 import cv2
 import numpy as np
 from PIL import ImageStat
 
-# Fix Windows console encoding for Unicode support
-if os.name == 'nt':  # Windows
-    try:
-        # Set console to UTF-8 mode
-        os.system('chcp 65001 > nul')
-        # Also try to set stdout encoding
-        if hasattr(sys.stdout, 'reconfigure'):
-            sys.stdout.reconfigure(encoding='utf-8')
-    except:
-        pass
-
 from utils.recognizer import locate_all_on_screen
 from utils.screenshot import take_screenshot, capture_region
 from core.Ura.ocr import extract_event_name_text
 from utils.log import log_debug, log_info, log_warning, log_error
 from utils.template_matching import deduplicated_matches
+from utils.template_cache import get_template
+from utils.resolution import scaled_region, scaled_template_path
 from utils.config_loader import load_main_config
 
 # Helper function to get project root directory
@@ -77,11 +67,13 @@ def _load_event_databases():
 
  
 
-def count_event_choices():
+def count_event_choices(screenshot=None):
     """
     Count how many event choice icons are found on screen.
     Uses event_choice_1.png as template to find all U-shaped icons.
     Filters matches by brightness to avoid dim/false positives.
+    Args:
+        screenshot: PIL Image to analyze (a fresh one is taken if None)
     Returns:
         tuple: (count, locations) - number of unique bright choices found and their locations
     """
@@ -95,17 +87,18 @@ def count_event_choices():
         log_debug(f" Searching for event choices using: {template_path}")
         
         # Take screenshot and convert to OpenCV format
-        screenshot = take_screenshot()
+        if screenshot is None:
+            screenshot = take_screenshot()
         img_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
         
         # Load template
-        template = cv2.imread(template_path)
+        template = get_template(scaled_template_path(template_path))
         if template is None:
             log_debug(f" Could not load template: {template_path}")
             return 0, []
         
         # Search in the event choice region (x, y, width, height)
-        x, y, w, h = 6, 450, 126, 1776
+        x, y, w, h = scaled_region((6, 450, 126, 1776))
         roi = img_cv[y:y+h, x:x+w]
         
         # Template matching with same confidence as before
@@ -604,7 +597,7 @@ def click_event_choice(choice_number, choice_locations=None):
         # Use pre-found locations if provided, otherwise search again
         if choice_locations is None:
             log_debug(f" No pre-found locations, searching for event choices...")
-            event_choice_region = (6, 450, 126, 1776)
+            event_choice_region = scaled_region((6, 450, 126, 1776))
             choice_locations = locate_all_on_screen("assets/icons/event_choice_1.png", confidence=0.45, region=event_choice_region)
             
             if not choice_locations:
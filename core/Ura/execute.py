@@ -1,29 +1,18 @@
 import time
 import os
 import random
-import sys
 from PIL import ImageStat
 
-# Fix Windows console encoding for Unicode support
-if os.name == 'nt':  # Windows
-    try:
-        # Set console to UTF-8 mode
-        os.system('chcp 65001 > nul')
-        # Also try to set stdout encoding
-        if hasattr(sys.stdout, 'reconfigure'):
-            sys.stdout.reconfigure(encoding='utf-8')
-    except:
-        pass
-
 from utils.recognizer import locate_on_screen, locate_all_on_screen, is_image_on_screen, match_template, max_match_confidence
 from utils.input import tap, triple_click, long_press, tap_on_image
 from utils.screenshot import take_screenshot, enhanced_screenshot, capture_region
+from utils.resolution import scaled_region
 from utils.constants_ura import (
     MOOD_LIST, EVENT_REGION, RACE_CARD_REGION, SUPPORT_CARD_ICON_REGION
 )
 
 # Import ADB state and logic modules
-from core.Ura.state import check_turn, check_mood, check_current_year, check_criteria, check_skill_points_cap, check_goal_name, check_current_stats, check_energy_bar
+from core.Ura.state import check_turn, check_mood, check_current_year, check_criteria, check_skill_points_cap, check_goal_name, check_current_stats, check_energy_reading
 
 # Import event handling functions
 from core.Ura.event_handling import count_event_choices, load_event_priorities, analyze_event_options, handle_event_choice, click_event_choice
@@ -47,7 +36,14 @@ DEBUG_MODE = config.get("debug_mode", False)
 RETRY_RACE = racing_config_section.get("retry_race", config.get("retry_race", True))
 
 from utils.log import log_debug, log_info, log_warning, log_error, log_success
+from utils.profiler import begin_turn, begin_career
+from utils.trace import begin_iteration, annotate, mark
+from utils.bot_control import checkpoint
+from utils.bot_events import emit_status
 from utils.template_matching import deduplicated_matches, wait_for_image
+from utils.race_index import get_race_index, get_racing_filters
+from utils.screen_model import get_matcher
+from utils.pixel_probe import load_probe
 
 def is_infirmary_active_adb(button_location, screenshot=None):
     """
@@ -66,13 +62,14 @@ def is_infirmary_active_adb(button_location, screenshot=None):
             from utils.screenshot import take_screenshot
             screenshot = take_screenshot()
         
-        # Crop the button region from the screenshot
-        button_region = screenshot.crop((x, y, x + w, y + h))
-        
-        # Convert to grayscale and calculate average brightness
-        grayscale = button_region.convert("L")
-        stat = ImageStat.Stat(grayscale)
-        avg_brightness = stat.mean[0]
+        # Pixel probe over the button (assets/probes/infirmary_active.json), else the whole crop
+        probe = load_probe("infirmary_active")
+        if probe is not None:
+            avg_brightness = probe.evaluate(screenshot, origin=(x, y)).mean_gray
+        else:
+            button_region = screenshot.crop((x, y, x + w, y + h))
+            stat = ImageStat.Stat(button_region.convert("L"))
+            avg_brightness = stat.mean[0]
         
         # Threshold for active button (same as PC version)
         is_active = avg_brightness > 170
@@ -177,64 +174,82 @@ def do_recreation():
     else:
         log_debug(f"No recreation button found")
 
+def lobby_screen_probes(screenshot):
+    """
+    The lobby loop's screen checks on screenshot, as (screen, check) pairs in
+    priority order: when several screens show at once (a popup over the
+    lobby) the first one listed is handled.
+    """
+    event_choice_region = scaled_region((6, 450, 126, 1776))
+    return [
+        ("complete_career", lambda: match_template(screenshot, "assets/buttons/complete_career.png", confidence=0.8)),
+        ("claw", lambda: match_template(screenshot, "assets/buttons/claw.png", confidence=0.8)),
+        ("ok", lambda: match_template(screenshot, "assets/buttons/ok_btn.png", confidence=0.8)),
+        ("event", lambda: match_template(screenshot, "assets/icons/event_choice_1.png", confidence=0.7, region=event_choice_region)),
+        ("inspiration", lambda: match_template(screenshot, "assets/buttons/inspiration_btn.png", confidence=0.5)),
+        ("cancel", lambda: match_template(screenshot, "assets/buttons/cancel_lobby.png", confidence=0.8)),
+        ("next", lambda: match_template(screenshot, "assets/buttons/next_btn.png", confidence=0.8)),
+        ("lobby", lambda: match_template(screenshot, "assets/ui/tazuna_hint.png", confidence=0.8)),
+    ]
+
 def career_lobby():
     """Main career lobby loop"""
     # Use existing config loaded at module level
     MINIMUM_MOOD = training_config_section.get("minimum_mood", config.get("minimum_mood", "GREAT"))
+    screen_matcher = get_matcher()
     # Track last day we attempted a custom race but failed, to avoid re-checking within same day
     last_failed_custom_race_day = None
 
     # Program start
     while True:
         log_debug(f"\n===== Starting new loop iteration =====")
+        begin_iteration()
+        # Stop/pause requests from the GUI worker take effect here, between actions
+        if checkpoint():
+            return False
         
         # Take screenshot first for all checks
         log_debug(f"Taking screenshot for UI element checks...")
         screenshot = take_screenshot()
         
-        # Check for career restart first (highest priority) - quick check only
-        log_debug(f"Quick check for Complete Career screen...")
-        try:
-            # Quick check for Complete Career button without importing full module
-            complete_career_matches = match_template(screenshot, "assets/buttons/complete_career.png", confidence=0.8)
-            if complete_career_matches:
-                log_info(f"Complete Career screen detected - starting restart workflow")
+        # Screen checks on this screenshot; the screen model probes the likely
+        # screens first, the priority order still decides between overlapping ones
+        log_debug(f"Identifying current screen...")
+        screen, screen_matches = screen_matcher.identify(lobby_screen_probes(screenshot))
+        annotate(screen=screen)
+
+        # Career restart (highest priority)
+        if screen == "complete_career":
+            log_info(f"Complete Career screen detected - starting restart workflow")
+            try:
+                begin_career()
                 from core.Ura.restart_career import career_lobby_check
                 should_continue = career_lobby_check(screenshot)
                 if not should_continue:
                     log_info(f"Career restart workflow completed - stopping bot")
                     return False
-        except Exception as e:
-            log_error(f"Career restart check failed: {e}")
-        
-        # Batch UI check - use existing screenshot for multiple elements
-        log_debug(f"Performing batch UI element check...")
-        
-        # Check claw machine first (highest priority)
-        log_debug(f"Checking for claw machine...")
-        claw_matches = match_template(screenshot, "assets/buttons/claw.png", confidence=0.8)
-        if claw_matches:
+            except Exception as e:
+                log_error(f"Career restart check failed: {e}")
+            continue
+
+        if screen == "claw":
             claw_machine()
+            mark("decision", action="claw_machine")
             continue
-        
-        # Check OK button
-        log_debug(f"Checking for OK button...")
-        ok_matches = match_template(screenshot, "assets/buttons/ok_btn.png", confidence=0.8)
-        if ok_matches:
-            x, y, w, h = ok_matches[0]
+
+        if screen == "ok":
+            x, y, w, h = screen_matches[0]
             center = (x + w//2, y + h//2)
             log_info(f"OK button found, clicking it.")
+            mark("decision", action="ok_button")
             tap(center[0], center[1])
             continue
-        
-        # Check for events
-        log_debug(f"Checking for events...")
-        try:
-            event_choice_region = (6, 450, 126, 1776)
-            event_matches = match_template(screenshot, "assets/icons/event_choice_1.png", confidence=0.7, region=event_choice_region)
-            
-            if event_matches:
+
+        if screen == "event":
+            try:
+                event_matches = screen_matches
                 log_info(f"Event detected, analyzing choices...")
+                mark("decision", action="event")
                 choice_number, success, choice_locations = handle_event_choice()
                 if success:
                     click_success = click_event_choice(choice_number, choice_locations)
@@ -260,52 +275,42 @@ def career_lobby():
                     center = (x + w//2, y + h//2)
                     tap(center[0], center[1])
                     continue
-            else:
-                log_debug(f"No events found")
-        except RuntimeError as e:
-            # Re-raise RuntimeError (critical failures that should stop the bot)
-            if "Event detection failed" in str(e):
-                raise
-            log_error(f"Event handling error: {e}")
-        except Exception as e:
-            log_error(f"Event handling error: {e}")
-
-        # Check inspiration button
-        log_debug(f"Checking for inspiration...")
-        inspiration_matches = match_template(screenshot, "assets/buttons/inspiration_btn.png", confidence=0.5)
-        if inspiration_matches:
-            x, y, w, h = inspiration_matches[0]
+            except RuntimeError as e:
+                # Re-raise RuntimeError (critical failures that should stop the bot)
+                if "Event detection failed" in str(e):
+                    raise
+                log_error(f"Event handling error: {e}")
+            except Exception as e:
+                log_error(f"Event handling error: {e}")
+
+        if screen == "inspiration":
+            x, y, w, h = screen_matches[0]
             center = (x + w//2, y + h//2)
             log_info(f"Inspiration found.")
+            mark("decision", action="inspiration")
             tap(center[0], center[1])
             continue
 
-        # Check cancel button
-        log_debug(f"Checking for cancel button...")
-        cancel_matches = match_template(screenshot, "assets/buttons/cancel_lobby.png", confidence=0.8)
-        if cancel_matches:
-            x, y, w, h = cancel_matches[0]
+        if screen == "cancel":
+            x, y, w, h = screen_matches[0]
             center = (x + w//2, y + h//2)
             log_debug(f"Clicking cancel_btn.png at position {center}")
+            mark("decision", action="cancel_button")
             tap(center[0], center[1])
             continue
 
-        # Check next button
-        log_debug(f"Checking for next button...")
-        next_matches = match_template(screenshot, "assets/buttons/next_btn.png", confidence=0.8)
-        if next_matches:
-            x, y, w, h = next_matches[0]
+        if screen == "next":
+            x, y, w, h = screen_matches[0]
             center = (x + w//2, y + h//2)
             log_debug(f"Clicking next_btn.png at position {center}")
+            mark("decision", action="next_button")
             tap(center[0], center[1])
             continue
 
-        # Check if current menu is in career lobby
-        log_debug(f"Checking if in career lobby...")
-        tazuna_hint = locate_on_screen("assets/ui/tazuna_hint.png", confidence=0.8)
-
-        if tazuna_hint is None:
+        # Anything else than the career lobby (tazuna hint) is not handled here
+        if screen != "lobby":
             log_info(f"Should be in career lobby.")
+            mark("decision", action="not_in_lobby")
             continue
 
         log_debug(f"Confirmed in career lobby")
@@ -328,6 +333,7 @@ def career_lobby():
             if is_infirmary_active_adb(debuffed_box, screenshot):
                 tap(center_x, center_y)
                 log_info(f"Character has debuff, go to infirmary instead.")
+                mark("decision", action="infirmary")
                 continue
             else:
                 log_debug(f"Infirmary button found but is disabled (dark)")
@@ -341,6 +347,8 @@ def career_lobby():
         minimum_mood = MOOD_LIST.index(MINIMUM_MOOD)
         turn = check_turn(screenshot)
         year = check_current_year(screenshot)
+        begin_turn(year)
+        annotate(year=year, mood=mood)
         goal_data = check_goal_name(screenshot)
         criteria_text = check_criteria(screenshot)
         
@@ -356,10 +364,20 @@ def career_lobby():
         
         # Check energy bar before proceeding with training decisions
         log_debug(f"Checking energy bar...")
-        energy_percentage = check_energy_bar(screenshot)
+        energy = check_energy_reading(screenshot)
+        # Below this confidence the energy is unknown: read once more, then skip the energy checks
+        min_energy_confidence = float(config.get("energy_min_confidence", 0.75))
+        if energy.confidence < min_energy_confidence:
+            log_debug(f"Energy reading unsure ({energy.percentage:.1f}%, confidence {energy.confidence:.2f}); reading again")
+            energy = check_energy_reading(take_screenshot())
+        energy_known = energy.confidence >= min_energy_confidence
+        energy_percentage = energy.percentage
         min_energy = training_config_section.get("min_energy", config.get("min_energy", 30))
         
-        log_info(f"Energy: {energy_percentage:.1f}% (Minimum: {min_energy}%)")
+        if energy_known:
+            log_info(f"Energy: {energy_percentage:.1f}% (Minimum: {min_energy}%)")
+        else:
+            log_warning(f"Energy unknown (confidence {energy.confidence:.2f}); skipping the energy checks this turn")
         
         # Get and display current stats
         current_stats = {}
@@ -378,18 +396,27 @@ def career_lobby():
         # Prioritize racing when criteria are not met to help achieve goals
         log_debug(f"Checking goal criteria...")
         goal_analysis = check_goal_criteria({"text": criteria_text}, year, turn)
+        # Exact values for the GUI status panel (no-op without the GUI event channel)
+        emit_status(year=year, mood=mood, turn=turn, goal=goal_data, criteria=criteria_text,
+                    goal_met=goal_analysis["criteria_met"], energy=energy_percentage, stats=current_stats)
         
         if goal_analysis["should_prioritize_racing"]:
             log_info(f"Decision: Criteria not met - Prioritizing races to meet goals")
-            race_found = find_and_do_race()
-            if race_found:
-                log_info(f"Race Result: Found Race")
-                continue
+            mark("decision", action="race_for_criteria")
+            # Skip the race screen entirely when the database has nothing acceptable this period
+            racing_filters = get_racing_filters(config.get("racing", {}), goal_data)
+            if not get_race_index().has_acceptable_race(year, *racing_filters):
+                log_info(f"Race Result: No acceptable race this period")
             else:
-                log_info(f"Race Result: No Race Found")
-                # If there is no race found, go back and do training instead
-                tap_on_image("assets/buttons/back_btn.png", text="[INFO] Race not found. Proceeding to training.")
-                time.sleep(0.5)
+                race_found = find_and_do_race()
+                if race_found:
+                    log_info(f"Race Result: Found Race")
+                    continue
+                else:
+                    log_info(f"Race Result: No Race Found")
+                    # If there is no race found, go back and do training instead
+                    tap_on_image("assets/buttons/back_btn.png", text="[INFO] Race not found. Proceeding to training.")
+                    time.sleep(0.5)
         else:
             log_info(f"Decision: Criteria met or conditions not suitable for racing")
             log_debug(f"Racing not prioritized - Criteria met: {goal_analysis['criteria_met']}, Pre-debut: {goal_analysis['is_pre_debut']}, Turn < 10: {goal_analysis['turn_less_than_10']}")
@@ -400,6 +427,7 @@ def career_lobby():
         log_debug(f"Checking for URA scenario...")
         if year == "Finale Underway" and turn == "Race Day":
             log_info(f"URA Finale")
+            mark("decision", action="ura_finale")
             
             # Check skill points cap before URA race day (if enabled)
             enable_skill_check = skills_config_section.get("enable_skill_point_check", config.get("enable_skill_point_check", True))
@@ -433,6 +461,7 @@ def career_lobby():
         log_debug(f"Checking for race day...")
         if turn == "Race Day" and year != "Finale Underway":
             log_info(f"Race Day.")
+            mark("decision", action="race_day")
             race_day()
             continue
         else:
@@ -454,6 +483,7 @@ def career_lobby():
                     # Reset failure cache on success
                     last_failed_custom_race_day = None
                     log_info(f"Custom race executed successfully")
+                    mark("decision", action="custom_race")
                     continue
                 else:
                     log_debug(f"No custom race found or executed")
@@ -466,12 +496,13 @@ def career_lobby():
         log_debug(f"Checking mood...")
         if mood_index < minimum_mood:
             # Check if energy is too high (>90%) before doing recreation
-            if energy_percentage > 90:
+            if energy_known and energy_percentage > 90:
                 log_debug(f"Mood too low ({mood_index} < {minimum_mood}) but energy too high ({energy_percentage:.1f}% > 90%), skipping recreation")
                 log_info(f"Mood is low but energy is too high ({energy_percentage:.1f}% > 90%), skipping recreation")
             else:
                 log_debug(f"Mood too low ({mood_index} < {minimum_mood}), doing recreation")
                 log_info(f"Mood is low, trying recreation to increase mood")
+                mark("decision", action="recreation")
                 do_recreation()
                 continue
         else:
@@ -481,8 +512,9 @@ def career_lobby():
         log_debug(f"Going to training...")
         
         # Check energy before proceeding with training
-        if energy_percentage < min_energy:
+        if energy_known and energy_percentage < min_energy:
             log_warning(f"Energy too low ({energy_percentage:.1f}% < {min_energy}%), skipping training and going to rest")
+            mark("decision", action="rest")
             do_rest()
             continue
             
@@ -540,10 +572,12 @@ def career_lobby():
         if best_training:
             log_debug(f"Scoring algorithm selected: {best_training.upper()} training")
             log_info(f"Selected {best_training.upper()} training based on scoring algorithm")
+            mark("decision", action="train", stat=best_training)
             do_train(best_training, already_on_training_screen=True)
         else:
             log_debug(f"No suitable training found based on scoring criteria")
             log_info(f"No suitable training found based on scoring criteria.")
+            mark("decision", action="no_suitable_training")
             
             # Check if we should prioritize racing when no good training is available
             do_race_when_bad_training = do_race_when_bad_training_flag
@@ -2,22 +2,10 @@ import cv2
 import numpy as np
 import pytesseract
 import os
-import sys
 from PIL import Image, ImageOps, ImageEnhance
 import time
 import json
 
-# Fix Windows console encoding for Unicode support
-if os.name == 'nt':  # Windows
-    try:
-        # Set console to UTF-8 mode
-        os.system('chcp 65001 > nul')
-        # Also try to set stdout encoding
-        if hasattr(sys.stdout, 'reconfigure'):
-            sys.stdout.reconfigure(encoding='utf-8')
-    except:
-        pass
-
 # Configure Tesseract to use the custom trained data
 # Go up 3 levels: core/Ura/ocr.py -> core/Ura -> core -> root
 tessdata_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'tessdata')
@@ -29,6 +17,7 @@ config = load_main_config()
 DEBUG_MODE = config.get("debug_mode", False)
 
 from utils.log import log_debug, log_info, log_warning, log_error
+from utils.profiler import timed
 
 # Try to find tesseract executable automatically
 try:
@@ -76,21 +65,32 @@ def verify_tesseract_config():
     except Exception as e:
         log_info(f"🔍 Error verifying Tesseract config: {e}")
 
-# Verify configuration on import
-if DEBUG_MODE:
-    verify_tesseract_config()
+_tesseract_reported = False
+
+
+def report_tesseract_setup():
+    """
+    Log which Tesseract models will be used (once per process).
+
+    Called by the entry point at startup rather than on import, so importing
+    this module does not touch the tessdata directory.
+    """
+    global _tesseract_reported
+    if _tesseract_reported:
+        return
+    _tesseract_reported = True
+
+    if DEBUG_MODE:
+        verify_tesseract_config()
+
+    # Verify tessdata directory exists and contains models
+    if not os.path.exists(tessdata_dir):
+        log_info(f"⚠️  Warning: tessdata directory not found: {tessdata_dir}")
+        log_info(f"   Falling back to system Tesseract models")
+        return
 
-# Verify tessdata directory exists and contains models
-if not os.path.exists(tessdata_dir):
-    log_info(f"⚠️  Warning: tessdata directory not found: {tessdata_dir}")
-    log_info(f"   Falling back to system Tesseract models")
-else:
     # Check what models are available in custom tessdata
-    available_models = []
-    for file in os.listdir(tessdata_dir):
-        if file.endswith('.traineddata'):
-            available_models.append(file)
-    
+    available_models = [file for file in os.listdir(tessdata_dir) if file.endswith('.traineddata')]
     if available_models:
         log_info(f"✅ Using custom Tesseract models from: {tessdata_dir}")
         log_info(f"   Available models: {', '.join(available_models)}")
@@ -98,6 +98,7 @@ else:
         log_info(f"⚠️  tessdata directory exists but contains no .traineddata files: {tessdata_dir}")
         log_info(f"   Falling back to system Tesseract models")
 
+@timed("ocr.extract_text")
 def extract_text(pil_img: Image.Image) -> str:
     """Extract text from image using Tesseract OCR"""
     try:
@@ -132,6 +133,7 @@ def extract_text(pil_img: Image.Image) -> str:
         log_warning(f"OCR extraction failed: {e}")
         return ""
 
+@timed("ocr.extract_number")
 def extract_number(pil_img: Image.Image) -> str:
     """Extract numbers from image using Tesseract OCR"""
     try:
@@ -162,6 +164,7 @@ def extract_number(pil_img: Image.Image) -> str:
         log_warning(f"Number extraction failed: {e}")
         return ""
 
+@timed("ocr.extract_turn_number")
 def extract_turn_number(pil_img: Image.Image) -> str:
     """Extract turn numbers with specialized configuration for better digit recognition"""
     try:
@@ -196,6 +199,7 @@ def extract_turn_number(pil_img: Image.Image) -> str:
         log_warning(f"Turn number extraction failed: {e}")
         return ""
 
+@timed("ocr.extract_failure_text")
 def extract_failure_text(pil_img: Image.Image) -> str:
     """Extract failure rate text with specialized configuration"""
     try:
@@ -224,6 +228,7 @@ def extract_failure_text(pil_img: Image.Image) -> str:
         log_warning(f"Failure text extraction failed: {e}")
         return ""
 
+@timed("ocr.extract_failure_text_with_confidence")
 def extract_failure_text_with_confidence(pil_img: Image.Image) -> tuple[str, float]:
     """Extract failure rate text with confidence score from Tesseract"""
     try:
@@ -257,6 +262,7 @@ def extract_failure_text_with_confidence(pil_img: Image.Image) -> tuple[str, flo
         log_warning(f"Failure text extraction with confidence failed: {e}")
         return "", 0.0
 
+@timed("ocr.extract_event_name_text")
 def extract_event_name_text(pil_img: Image.Image) -> str:
     """Extract event name text using improved white specialization and OCR with confidence filtering"""
     try:
@@ -1,17 +1,23 @@
 import time
 import os
 import json
-from core.Ura.skill_recognizer import take_screenshot, recognize_skill_up_locations
+from core.Ura.skill_recognizer import (
+    take_screenshot, recognize_skill_up_locations, find_skill_button_near, read_skill_name,
+    SKILL_LIST_REGION, SKILL_LIST_END_TOLERANCE
+)
 from utils.input import perform_swipe, tap, tap_on_image
+from utils.screenshot import crop_for_ocr
 from core.Ura.skill_purchase_optimizer import fuzzy_match_skill_name
+from utils.scroll_registration import estimate_vertical_offset, wait_for_stable_frame
 from utils.log import log_debug, log_info, log_warning, log_error
+from utils.resolution import scaled, scaled_region, scaled_template_path
 
 # Skill list swipe coordinates (optimized for skill screen)
-SKILL_LIST_CENTER_X = 504
-SKILL_LIST_TOP_Y = 800
-SKILL_LIST_BOTTOM_Y = 1492
-SKILL_LIST_SCROLL_TARGET_TOP = 1400
-SKILL_LIST_SCROLL_TARGET_BOTTOM = 926
+SKILL_LIST_CENTER_X = scaled(504)
+SKILL_LIST_TOP_Y = scaled(800)
+SKILL_LIST_BOTTOM_Y = scaled(1492)
+SKILL_LIST_SCROLL_TARGET_TOP = scaled(1400)
+SKILL_LIST_SCROLL_TARGET_BOTTOM = scaled(926)
 
 
 # Global cache for skill points to avoid re-detection
@@ -100,10 +106,10 @@ def extract_skill_points(screenshot=None):
             screenshot = take_screenshot()
         
         # Skill points region: 825, 605, 936, 656 (width: 111, height: 51)
-        skill_points_region = (825, 605, 936, 656)
+        skill_points_region = scaled_region((825, 605, 936, 656))
         
         # Crop the skill points region
-        points_crop = screenshot.crop(skill_points_region)
+        points_crop = crop_for_ocr(screenshot, skill_points_region)
         
         # Save original debug image
         points_crop.save("debug_skill_points.png")
@@ -231,7 +237,7 @@ def click_image_button(image_path, description="button", max_attempts=10, wait_b
             return False
         
         # Load template once
-        template = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        template = cv2.imread(scaled_template_path(image_path), cv2.IMREAD_COLOR)
         if template is None:
             log_error(f"Failed to load {description} template: {image_path}")
             return False
@@ -317,21 +323,212 @@ def fast_swipe_to_top(end_career=False):
     
     log_debug(f"Successfully navigated to top of skill list")
 
-def execute_skill_purchases(purchase_plan, max_scrolls=20, end_career=False):
+def _skill_cost(skill):
+    """Skill price as int (0 if unreadable), same rule as filter_affordable_skills."""
+    price = str(skill.get('price', ''))
+    return int(price) if price.isdigit() else 0
+
+def _has_list_positions(skills):
+    """True if every skill carries a list position from a registered scan."""
+    return bool(skills) and all(skill.get('list_y') is not None and skill.get('location') for skill in skills)
+
+def _is_affordable(skill, budget):
+    """Check a skill against the points left in the budget."""
+    return budget['available'] is None or budget['spent'] + _skill_cost(skill) <= budget['available']
+
+def _purchase_skill(target_skill, screen_name, x, y, w, h, budget, purchased_skills, remaining_skills, counters):
+    """Tap a skill's button if the budget allows it. Returns True if purchased."""
+    cost = _skill_cost(target_skill)
+    if not _is_affordable(target_skill, budget):
+        log_warning(f"Skipping {target_skill['name']}: cost {cost} exceeds remaining budget "
+                    f"{budget['available'] - budget['spent']}")
+        return False
+    
+    log_info(f"Purchasing: {screen_name}")
+    counters['taps'] += 1
+    if click_skill_up_button(x + w // 2, y + h // 2):
+        purchased_skills.append(target_skill)
+        remaining_skills.remove(target_skill)
+        budget['spent'] += cost
+        log_info(f"Successfully purchased: {screen_name}")
+        return True
+    log_error(f"Failed to purchase: {screen_name}")
+    return False
+
+def _purchase_in_single_pass(remaining_skills, purchased_skills, budget, counters, max_scrolls):
+    """
+    Purchase skills top-to-bottom using the list positions recorded by the scan.
+    
+    Each planned button is confirmed near its predicted position, and the name
+    on that row is read and matched against the plan, before tapping; if the
+    button has drifted or the row holds another skill, the current screen is
+    OCR'd once to find it. The list is
+    scrolled only while planned skills remain below the visible area, and each
+    swipe is registered to keep predicted positions in sync.
+    """
+    list_top, list_bottom = SKILL_LIST_REGION[1], SKILL_LIST_REGION[3]
+    scroll_position = 0
+    screenshot = take_screenshot()
+    
+    for skill in sorted(remaining_skills, key=lambda s: s['list_y']):
+        log_debug(f"Planned: {skill['name']} at list y={skill['list_y']}")
+    
+    while remaining_skills:
+        # Skills whose button is fully on screen at the current scroll position
+        on_screen = sorted(
+            (skill for skill in remaining_skills
+             if list_top <= skill['list_y'] - scroll_position
+             and skill['list_y'] - scroll_position + skill['location'][3] <= list_bottom),
+            key=lambda s: s['list_y']
+        )
+        drifted = []
+        for target_skill in on_screen:
+            expected_x = target_skill['location'][0]
+            expected_y = target_skill['list_y'] - scroll_position
+            location = find_skill_button_near(screenshot, expected_x, expected_y)
+            if location is None:
+                drifted.append(target_skill)
+                continue
+            row_name = read_skill_name(screenshot, location[0], location[1])
+            if not fuzzy_match_skill_name(row_name, target_skill['name']):
+                log_debug(f"Row at predicted position reads '{row_name}', not '{target_skill['name']}'")
+                drifted.append(target_skill)
+                continue
+            if _purchase_skill(target_skill, target_skill['name'], *location,
+                               budget, purchased_skills, remaining_skills, counters):
+                time.sleep(0.3)
+        
+        if drifted:
+            log_debug(f"{len(drifted)} planned skill(s) not at expected position, reading this screen")
+            result = recognize_skill_up_locations(
+                confidence=0.9,
+                debug_output=False,
+                filter_dark_buttons=True,
+                brightness_threshold=150,
+                extract_skills=True
+            )
+            for target_skill in drifted:
+                for screen_skill in result.get('skills', []):
+                    if fuzzy_match_skill_name(screen_skill['name'], target_skill['name']):
+                        _purchase_skill(target_skill, screen_skill['name'], *screen_skill['location'],
+                                        budget, purchased_skills, remaining_skills, counters)
+                        break
+        
+        # Anything left that was already scrolled past (or no longer fits the budget) is not reached
+        below = [skill for skill in remaining_skills
+                 if skill['list_y'] - scroll_position + skill['location'][3] > list_bottom
+                 and _is_affordable(skill, budget)]
+        if not below:
+            break
+        if counters['scrolls'] >= max_scrolls:
+            log_warning(f"Reached max scrolls ({max_scrolls}) with {len(below)} planned skills below")
+            break
+        
+        log_debug(f"Scrolling down ({len(below)} planned skills below)")
+        if not swipe_skill_list_down_slow(wait_before=0):
+            log_error(f"Failed to scroll, stopping search")
+            break
+        counters['scrolls'] += 1
+        
+        next_screenshot = wait_for_stable_frame(take_screenshot, SKILL_LIST_REGION)
+        offset, _ = estimate_vertical_offset(screenshot, next_screenshot, SKILL_LIST_REGION)
+        screenshot = next_screenshot
+        if offset is None:
+            log_warning(f"Lost track of the skill list position, falling back to OCR search")
+            return False
+        if offset <= SKILL_LIST_END_TOLERANCE:
+            log_warning(f"End of list reached with {len(below)} planned skills not found")
+            break
+        scroll_position += offset
+    
+    return True
+
+def _search_and_purchase(remaining_skills, purchased_skills, budget, counters, max_scrolls):
+    """Scroll down from the current position, OCR'ing each screen to find the planned skills."""
+    while remaining_skills and counters['scrolls'] < max_scrolls:
+        log_info(f"\n[INFO] Scroll {counters['scrolls'] + 1}/{max_scrolls}")
+        log_debug(f"Looking for: {[s['name'] for s in remaining_skills]}")
+        
+        # Scan current screen for available skills
+        result = recognize_skill_up_locations(
+            confidence=0.9,
+            debug_output=False,
+            filter_dark_buttons=True,
+            brightness_threshold=150,
+            extract_skills=True
+        )
+        
+        if 'error' in result:
+            log_error(f"Error during skill detection: {result['error']}")
+            break
+        
+        current_skills = result.get('skills', [])
+        if not current_skills:
+            log_debug(f"No skills found on this screen")
+        else:
+            log_debug(f"Found {len(current_skills)} available skills on screen")
+            
+            # Check if any of our target skills are on this screen
+            skills_found_on_screen = []
+            
+            for target_skill in remaining_skills:
+                for screen_skill in current_skills:
+                    # Use fuzzy matching to find target skills
+                    if fuzzy_match_skill_name(screen_skill['name'], target_skill['name']):
+                        skills_found_on_screen.append({
+                            'target': target_skill,
+                            'screen': screen_skill
+                        })
+                        log_info(f"Found target skill: {screen_skill['name']} (matches {target_skill['name']})")
+                        break
+            
+            # Purchase found skills
+            for match in skills_found_on_screen:
+                if _purchase_skill(match['target'], match['screen']['name'], *match['screen']['location'],
+                                   budget, purchased_skills, remaining_skills, counters):
+                    # Short wait after purchase
+                    time.sleep(1)
+            
+            # If we found and purchased skills, wait a bit longer
+            if skills_found_on_screen:
+                time.sleep(1.5)
+        
+        # Continue scrolling if we haven't found all skills
+        counters['scrolls'] += 1
+        if remaining_skills and counters['scrolls'] < max_scrolls:
+            log_debug(f"Scrolling down to find more skills")
+            success = swipe_skill_list_down_slow(wait_before=0.5)
+            if not success:
+                log_error(f"Failed to scroll, stopping search")
+                break
+            
+            time.sleep(1.5)  # Wait for scroll animation
+
+def execute_skill_purchases(purchase_plan, max_scrolls=20, end_career=False, available_points=None,
+                            positions_reliable=False):
     """
     Execute the automated skill purchase plan.
     
+    When the plan comes from a scan whose registration held throughout
+    (positions_reliable, skills carry 'list_y'), all purchases are made in one
+    top-to-bottom pass without re-reading the list; otherwise each screen is
+    OCR'd while scrolling down.
+    
     Args:
         purchase_plan: List of skills to purchase (from create_purchase_plan)
         max_scrolls: Maximum number of scrolls to prevent infinite loops
         end_career: If True, use end_skill.png button instead of skills_btn.png
+        available_points: Skill point budget enforced while tapping (None = no limit)
+        positions_reliable: The scan's 'positions_reliable' flag
     
     Returns:
         dict: {
             'success': bool,
             'purchased_skills': [list of successfully purchased skills],
             'failed_skills': [list of skills that couldn't be found/purchased],
-            'scrolls_performed': int
+            'scrolls_performed': int,
+            'taps_performed': int,
+            'points_spent': int
         }
     """
     log_info(f"EXECUTING AUTOMATED SKILL PURCHASES")
@@ -355,89 +552,23 @@ def execute_skill_purchases(purchase_plan, max_scrolls=20, end_career=False):
     purchased_skills = []
     failed_skills = []
     remaining_skills = purchase_plan.copy()
-    scrolls_performed = 0
+    budget = {'available': available_points, 'spent': 0}
+    counters = {'scrolls': 0, 'taps': 0}
     
     try:
         # Step 1: Fast swipe to top
         fast_swipe_to_top(end_career=end_career)
         
-        # Step 2: Scroll down slowly to find and purchase skills
-        log_info(f"Searching for skills to purchase")
-        
-        while remaining_skills and scrolls_performed < max_scrolls:
-            scrolls_performed += 1
-            log_info(f"\n[INFO] Scroll {scrolls_performed}/{max_scrolls}")
-            log_debug(f"Looking for: {[s['name'] for s in remaining_skills]}")
-            
-            # Scan current screen for available skills
-            result = recognize_skill_up_locations(
-                confidence=0.9,
-                debug_output=False,
-                filter_dark_buttons=True,
-                brightness_threshold=150,
-                extract_skills=True
-            )
-            
-            if 'error' in result:
-                log_error(f"Error during skill detection: {result['error']}")
-                break
-            
-            current_skills = result.get('skills', [])
-            if not current_skills:
-                log_debug(f"No skills found on this screen")
-            else:
-                log_debug(f"Found {len(current_skills)} available skills on screen")
-                
-                # Check if any of our target skills are on this screen
-                skills_found_on_screen = []
-                
-                for target_skill in remaining_skills:
-                    for screen_skill in current_skills:
-                        # Use fuzzy matching to find target skills
-                        if fuzzy_match_skill_name(screen_skill['name'], target_skill['name']):
-                            skills_found_on_screen.append({
-                                'target': target_skill,
-                                'screen': screen_skill
-                            })
-                            log_info(f"Found target skill: {screen_skill['name']} (matches {target_skill['name']})")
-                            break
-                
-                # Purchase found skills
-                for match in skills_found_on_screen:
-                    target_skill = match['target']
-                    screen_skill = match['screen']
-                    
-                    # Get button coordinates
-                    x, y, w, h = screen_skill['location']
-                    button_center_x = x + w // 2
-                    button_center_y = y + h // 2
-                    
-                    log_info(f"Purchasing: {screen_skill['name']}")
-                    
-                    # Click the skill_up button
-                    if click_skill_up_button(button_center_x, button_center_y):
-                        purchased_skills.append(target_skill)
-                        remaining_skills.remove(target_skill)
-                        log_info(f"Successfully purchased: {screen_skill['name']}")
-                        
-                        # Short wait after purchase
-                        time.sleep(1)
-                    else:
-                        log_error(f"Failed to purchase: {screen_skill['name']}")
-                
-                # If we found and purchased skills, wait a bit longer
-                if skills_found_on_screen:
-                    time.sleep(1.5)
-            
-            # Continue scrolling if we haven't found all skills
-            if remaining_skills and scrolls_performed < max_scrolls:
-                log_debug(f"Scrolling down to find more skills")
-                success = swipe_skill_list_down_slow(wait_before=0.5)
-                if not success:
-                    log_error(f"Failed to scroll, stopping search")
-                    break
-                
-                time.sleep(1.5)  # Wait for scroll animation
+        # Step 2: Purchase in one pass using scanned positions, or search screen by screen
+        if positions_reliable and _has_list_positions(remaining_skills):
+            log_info(f"Purchasing skills in a single pass using scanned list positions")
+            if not _purchase_in_single_pass(remaining_skills, purchased_skills, budget, counters, max_scrolls):
+                # Position tracking lost; keep searching downward from here
+                _search_and_purchase(remaining_skills, purchased_skills, budget, counters, max_scrolls)
+        else:
+            log_info(f"Searching for skills to purchase")
+            _search_and_purchase(remaining_skills, purchased_skills, budget, counters, max_scrolls)
+        scrolls_performed = counters['scrolls']
         
         # Step 3: Click confirm button
         if purchased_skills:
@@ -477,6 +608,8 @@ def execute_skill_purchases(purchase_plan, max_scrolls=20, end_career=False):
         log_info(f"   Successfully purchased: {len(purchased_skills)} skills")
         log_info(f"   Failed to find/purchase: {len(failed_skills)} skills")
         log_info(f"   Scrolls performed: {scrolls_performed}")
+        log_info(f"   Taps performed: {counters['taps']}")
+        log_info(f"   Points spent: {budget['spent']}")
         
         if purchased_skills:
             log_info(f"\n[INFO] Purchased skills:")
@@ -492,7 +625,9 @@ def execute_skill_purchases(purchase_plan, max_scrolls=20, end_career=False):
             'success': len(purchased_skills) > 0,
             'purchased_skills': purchased_skills,
             'failed_skills': failed_skills,
-            'scrolls_performed': scrolls_performed
+            'scrolls_performed': scrolls_performed,
+            'taps_performed': counters['taps'],
+            'points_spent': budget['spent']
         }
         
     except Exception as e:
@@ -504,7 +639,9 @@ def execute_skill_purchases(purchase_plan, max_scrolls=20, end_career=False):
             'success': False,
             'purchased_skills': purchased_skills,
             'failed_skills': failed_skills + remaining_skills,
-            'scrolls_performed': scrolls_performed,
+            'scrolls_performed': counters['scrolls'],
+            'taps_performed': counters['taps'],
+            'points_spent': budget['spent'],
             'error': str(e)
         }
 
@@ -1,22 +1,11 @@
 import json
 import os
-import sys
 from difflib import SequenceMatcher
+from utils.skill_matcher import SkillMatcher, get_skill_matcher, normalize_skill_name
 from core.Ura.skill_recognizer import scan_all_skills_with_scroll
 from utils.log import log_debug, log_info, log_warning, log_error
 from utils.config_loader import load_main_config
 
-# Fix Windows console encoding for Unicode support
-if os.name == 'nt':  # Windows
-    try:
-        # Set console to UTF-8 mode
-        os.system('chcp 65001 > nul')
-        # Also try to set stdout encoding
-        if hasattr(sys.stdout, 'reconfigure'):
-            sys.stdout.reconfigure(encoding='utf-8')
-    except:
-        pass
-
 # debug_print is imported from utils.log
 
 def load_skill_config(config_path=None):
@@ -97,11 +86,7 @@ def clean_ocr_text(text):
 
 def _normalize(text):
     """Lowercase and strip punctuation/extra spaces for comparison."""
-    if not text:
-        return ""
-    import re
-    normalized = re.sub(r"[^\w\s]", "", text.lower())
-    return " ".join(normalized.split())
+    return normalize_skill_name(text)
 
 
 def find_best_real_skill_match(ocr_skill_name, target_skill_name=None, threshold=0.85):
@@ -159,36 +144,16 @@ def find_matching_skill(skill_name, available_skills, excluded_skills=None):
     Returns:
         dict or None: Matching skill dict, or None if not found
     """
-    if excluded_skills is None:
-        excluded_skills = set()
-    
-    # Try exact match first
-    skill_name_clean = skill_name.lower().strip()
-    for skill in available_skills:
-        if skill['name'].lower().strip() == skill_name_clean:
-            # Check if this skill is already matched
-            if skill['name'] not in excluded_skills:
-                log_debug(f"Exact match found: '{skill['name']}' matches '{skill_name}'")
-                return skill
-    
-    # Use direct fuzzy matching against available skills (no DB)
-    best_skill = None
-    best_confidence = 0.0
-    
-    for skill in available_skills:
-        # Skip skills that have already been matched
-        if skill['name'] in excluded_skills:
-            continue
-            
-        similarity = SequenceMatcher(None, _normalize(skill.get('name', '')), _normalize(skill_name)).ratio()
-        if similarity >= 0.9 and similarity > best_confidence:
-            best_skill = skill
-            best_confidence = similarity
-            log_debug(f"Match: '{skill['name']}' matches target '{skill_name}' (confidence: {similarity:.3f})")
+    table = SkillMatcher([skill_name]).build_table(available_skills)
+    return _find_in_table(table, skill_name, excluded_skills)
+
+def _find_in_table(table, skill_name, excluded_skills=None):
+    """Look up skill_name in a prebuilt SkillMatchTable, logging like find_matching_skill."""
+    skill, score = table.find(skill_name, excluded_skills)
     
-    if best_skill:
-        log_debug(f"Best match found: '{best_skill['name']}' for target '{skill_name}' (confidence: {best_confidence:.3f})")
-        return best_skill
+    if skill:
+        log_debug(f"Best match found: '{skill['name']}' for target '{skill_name}' (confidence: {score:.3f})")
+        return skill
     
     log_debug(f"No match found for '{skill_name}' in available skills")
     return None
@@ -218,6 +183,9 @@ def create_purchase_plan(available_skills, config, end_career=False):
     # Create lookup for available skills (exact match)
     available_by_name = {skill['name']: skill for skill in available_skills}
     
+    # Match every configured name against every OCR'd skill in one batched pass
+    match_table = get_skill_matcher(config).build_table(available_skills)
+    
     purchase_plan = []
     matched_skills = set()  # Track skills that have already been matched to prevent duplicates
     
@@ -241,7 +209,7 @@ def create_purchase_plan(available_skills, config, end_career=False):
             if priority_skill in available_by_name and available_by_name[priority_skill]['name'] not in matched_skills:
                 skill = available_by_name[priority_skill]
             else:
-                skill = find_matching_skill(priority_skill, available_skills, excluded_skills=matched_skills)
+                skill = _find_in_table(match_table, priority_skill, excluded_skills=matched_skills)
             
             if skill:
                 purchase_plan.append(skill)
@@ -254,7 +222,7 @@ def create_purchase_plan(available_skills, config, end_career=False):
                 if base_skill_name in available_by_name and available_by_name[base_skill_name]['name'] not in matched_skills:
                     base_skill = available_by_name[base_skill_name]
                 else:
-                    base_skill = find_matching_skill(base_skill_name, available_skills, excluded_skills=matched_skills)
+                    base_skill = _find_in_table(match_table, base_skill_name, excluded_skills=matched_skills)
                 
                 if base_skill:
                     purchase_plan.append(base_skill)
@@ -267,7 +235,7 @@ def create_purchase_plan(available_skills, config, end_career=False):
             if priority_skill in available_by_name and available_by_name[priority_skill]['name'] not in matched_skills:
                 skill = available_by_name[priority_skill]
             else:
-                skill = find_matching_skill(priority_skill, available_skills, excluded_skills=matched_skills)
+                skill = _find_in_table(match_table, priority_skill, excluded_skills=matched_skills)
             
             if skill:
                 purchase_plan.append(skill)
@@ -1,16 +1,16 @@
 import re
 import time
-import json
 import os
 
 from PIL import Image, ImageEnhance
-from utils.screenshot import capture_region, enhanced_screenshot, enhanced_screenshot_for_failure, enhanced_screenshot_for_year, take_screenshot
+from utils.screenshot import capture_region, crop_for_ocr, enhanced_screenshot, enhanced_screenshot_for_failure, enhanced_screenshot_for_year, take_screenshot
 from core.Ura.ocr import extract_text, extract_number, extract_turn_number, extract_failure_text, extract_failure_text_with_confidence
 from utils.recognizer import match_template, max_match_confidence
 from core.Ura.skill_auto_purchase import execute_skill_purchases, click_image_button, extract_skill_points
 from core.Ura.skill_recognizer import scan_all_skills_with_scroll
 from core.Ura.skill_purchase_optimizer import load_skill_config, create_purchase_plan, filter_affordable_skills
 
+from utils.config_loader import load_main_config
 from utils.constants_ura import (
     SUPPORT_CARD_ICON_REGION, TURN_REGION, FAILURE_REGION, YEAR_REGION, 
     CRITERIA_REGION, SPD_REGION, STA_REGION, PWR_REGION, GUTS_REGION, WIT_REGION,
@@ -18,12 +18,33 @@ from utils.constants_ura import (
 )
 
 # Load config and check debug mode
-with open("config.json", "r", encoding="utf-8") as config_file:
-    config = json.load(config_file)
-    DEBUG_MODE = config.get("debug_mode", False)
+config = load_main_config()
+DEBUG_MODE = config.get("debug_mode", False)
 
 from utils.log import log_debug, log_info, log_warning, log_error
+from utils.profiler import timed
+from utils.turn_cache import TurnStateCache
+from utils.trace import add_mark_listener
+from utils.mood_classifier import classify_mood, MOOD_TEMPLATES
+from utils.energy_bar import EnergyBarReader, EnergyReading
+from utils.resolution import scaled_region
 from utils.template_matching import deduplicated_matches
+from utils.vocabulary import (
+    VocabularyRecognizer, load_year_vocabulary, year_turn_index,
+    CRITERIA_VOCABULARY, UNKNOWN_YEAR, UNKNOWN_CRITERIA
+)
+
+# Closed-vocabulary recognizers, built on first use
+_year_recognizer = None
+_criteria_recognizer = None
+
+# Turn counter, year, goal, criteria and skill points are read once per turn (see utils.turn_cache)
+_turn_state = TurnStateCache((TURN_REGION, YEAR_REGION))
+add_mark_listener(_turn_state.on_mark)
+
+# Energy pill region (x, y, width, height); the pill geometry inside it is located once
+ENERGY_REGION = scaled_region((330, 203, 602, 72))
+_energy_reader = EnergyBarReader(ENERGY_REGION)
 
 # Get Stat
 def stat_state(screenshot=None):
@@ -46,29 +67,48 @@ def stat_state(screenshot=None):
 
 # Old OCR fuzzy mood helper removed after switching to template-based detection
 
+# Mood region (left, top, right, bottom)
+MOOD_SEARCH_REGION = scaled_region((774, 203, 1080, 287))
+
 def check_mood(screenshot=None):
+    """Detect mood from the colour signature of the mood badge.
+
+    The template matches (check_mood_by_templates) only run when the colour
+    classifier is unsure. Returns one of MOOD_LIST values, or "UNKNOWN".
+    """
+    try:
+        # Use provided screenshot or take a fresh one
+        if screenshot is None:
+            screenshot = take_screenshot()
+
+        # Allow margin override via config; below it the templates decide
+        min_margin = float(config.get("mood_signature_min_margin", 0.3))
+        label, margin, _ = classify_mood(screenshot.crop(MOOD_SEARCH_REGION))
+        if label is not None and margin >= min_margin:
+            log_debug(f"Mood by colour signature: {label} (margin {margin:.2f})")
+            return label
+        log_debug(f"Mood colour signature unsure ({label}, margin {margin:.2f}); matching templates")
+        return check_mood_by_templates(screenshot)
+    except Exception as e:
+        log_debug(f"Mood detection failed: {e}")
+        return "UNKNOWN"
+
+def check_mood_by_templates(screenshot=None):
     """Detect mood using template matching in a fixed region.
 
-    Uses the new template-based method instead of OCR. Returns one of
-    MOOD_LIST values, or "UNKNOWN" if confidence is too low.
+    Returns one of MOOD_LIST values, or "UNKNOWN" if confidence is too low.
     """
     try:
         # Use provided screenshot or take a fresh one
         if screenshot is None:
             screenshot = take_screenshot()
 
-        # Region (left, top, right, bottom) and its (x, y, w, h) variant
-        region_pil = (774, 203, 1080, 287)
+        # Region (x, y, w, h) variant of MOOD_SEARCH_REGION
+        region_pil = MOOD_SEARCH_REGION
         x, y = region_pil[0], region_pil[1]
         region_cv = (x, y, region_pil[2] - region_pil[0], region_pil[3] - region_pil[1])
 
-        templates = {
-            "AWFUL": os.path.join("assets", "mood", "awful.png"),
-            "BAD": os.path.join("assets", "mood", "bad.png"),
-            "NORMAL": os.path.join("assets", "mood", "normal.png"),
-            "GOOD": os.path.join("assets", "mood", "good.png"),
-            "GREAT": os.path.join("assets", "mood", "great.png"),
-        }
+        templates = MOOD_TEMPLATES
 
         # Allow threshold override via config; default to 0.55
         threshold = float(config.get("mood_template_threshold", 0.55))
@@ -97,6 +137,10 @@ def check_mood(screenshot=None):
         return "UNKNOWN"
 
 def check_turn(screenshot=None):
+    """Turn counter (read once per turn, see _read_turn)"""
+    return _turn_state.get("turn", screenshot, _read_turn)
+
+def _read_turn(screenshot):
     """Fast turn detection with minimal OCR"""
     log_debug(f"Starting turn detection...")
     
@@ -167,51 +211,76 @@ def check_turn(screenshot=None):
         log_debug(f"Turn detection failed with error: {e}")
         return 1
 
-def check_current_year(screenshot=None):
-    """Fast year detection using regular screenshot"""
-    year_img = enhanced_screenshot(YEAR_REGION, screenshot)
-    
+def _get_year_recognizer():
+    """Lazily build the closed-vocabulary year recognizer"""
+    global _year_recognizer
+    if _year_recognizer is None:
+        _year_recognizer = VocabularyRecognizer(load_year_vocabulary())
+    return _year_recognizer
+
+def _get_criteria_recognizer():
+    """Lazily build the criteria status recognizer"""
+    global _criteria_recognizer
+    if _criteria_recognizer is None:
+        _criteria_recognizer = VocabularyRecognizer(CRITERIA_VOCABULARY, snap_threshold=0.8)
+    return _criteria_recognizer
+
+@timed("ocr.year_line")
+def _ocr_year_line(img, char_whitelist):
     import pytesseract
-    text = pytesseract.image_to_string(year_img).strip()
-    
-    if text:
-        # Clean OCR result - correct common OCR errors
-        if "Pre-Debu" in text:
-            text = text.replace("Pre-Debu", "Pre-Debut")
-        
-        log_debug(f"Year OCR result: '{text}'")
-        return text
-    
-    return "Unknown Year"
+    return pytesseract.image_to_string(img, config=f'--oem 3 --psm 7 -c tessedit_char_whitelist={char_whitelist}').strip()
 
-def check_criteria(screenshot=None):
-    """Enhanced criteria detection"""
-    criteria_img = enhanced_screenshot(CRITERIA_REGION, screenshot)
-    
-    # Use single, fast OCR configuration
+@timed("ocr.criteria_line")
+def _ocr_criteria_line(img, char_whitelist):
+    # Unmet criteria are free text (fan counts, race names), so no whitelist here
     import pytesseract
-    text = pytesseract.image_to_string(criteria_img, config='--oem 3 --psm 7').strip()
-    
-    if text:
-        # Apply common OCR corrections
-        text = text.replace("Entrycriteriamet", "Entry criteria met")
-        text = text.replace("Entrycriteria", "Entry criteria")  
-        text = text.replace("criteriamet", "criteria met")
-        text = text.replace("Goalachieved", "Goal achieved")
-        
-        log_debug(f"Criteria OCR result: '{text}'")
-    else:
-        # Single fallback attempt
-        fallback_text = extract_text(criteria_img)
-        if fallback_text.strip():
-            log_debug(f"Using fallback criteria OCR result: '{fallback_text}'")
-            text = fallback_text.strip()
-        else:
-            text = "Unknown Criteria"
-    
+    text = pytesseract.image_to_string(img, config='--oem 3 --psm 7').strip()
+    if not text:
+        text = extract_text(img).strip()
     return text
 
+def check_year_state(screenshot=None):
+    """
+    Detect the current year against the closed year vocabulary.
+
+    Returns:
+        dict: {'year': canonical label or "Unknown Year", 'turn_index': int (-1 if unknown), 'score': float}
+    """
+    year_img = enhanced_screenshot(YEAR_REGION, screenshot)
+    label, score, raw_text = _get_year_recognizer().recognize(year_img, _ocr_year_line)
+
+    if label is None:
+        log_debug(f"Year OCR '{raw_text}' did not match any known year (score {score:.2f})")
+        return {'year': UNKNOWN_YEAR, 'turn_index': -1, 'score': score}
+
+    log_debug(f"Year result: '{label}' (score {score:.2f}, raw '{raw_text}')")
+    return {'year': label, 'turn_index': year_turn_index(label), 'score': score}
+
+def check_current_year(screenshot=None):
+    """Fast year detection, returns a canonical year label (read once per turn)"""
+    return _turn_state.get("year", screenshot, lambda s: check_year_state(s)['year'])
+
+def check_criteria(screenshot=None):
+    """Criteria detection snapped to the known statuses; unmet criteria keep their OCR text"""
+    return _turn_state.get("criteria", screenshot, _read_criteria)
+
+def _read_criteria(screenshot):
+    criteria_img = enhanced_screenshot(CRITERIA_REGION, screenshot)
+    label, score, raw_text = _get_criteria_recognizer().recognize(criteria_img, _ocr_criteria_line)
+
+    if label is not None:
+        log_debug(f"Criteria result: '{label}' (score {score:.2f}, raw '{raw_text}')")
+        return label
+    if raw_text:
+        log_debug(f"Criteria OCR result: '{raw_text}'")
+        return raw_text
+    return UNKNOWN_CRITERIA
+
 def check_goal_name(screenshot=None):
+    """Current goal name (read once per turn, see _read_goal_name)"""
+    return _turn_state.get("goal_name", screenshot, _read_goal_name)
+
+def _read_goal_name(screenshot):
     """Detect the current goal name using simple Tesseract OCR.
 
     Captures the region (372, 113, 912, 152) and returns the recognized
@@ -219,7 +288,7 @@ def check_goal_name(screenshot=None):
     check_criteria (PSM 7, single line) with a single fallback to the
     shared extract_text helper.
     """
-    GOAL_REGION = (372, 113, 912, 152)
+    GOAL_REGION = scaled_region((372, 113, 912, 152))
 
     # Capture enhanced image of the goal name region for better OCR
     goal_img = enhanced_screenshot(GOAL_REGION, screenshot)
@@ -255,6 +324,10 @@ def check_goal_name(screenshot=None):
 
 
 def check_skill_points(screenshot=None):
+    """Skill points shown in the lobby (read once per turn, until skills are bought)"""
+    return _turn_state.get("skill_points", screenshot, _read_skill_points)
+
+def _read_skill_points(screenshot):
     skill_img = enhanced_screenshot(SKILL_PTS_REGION, screenshot)
     
     # Apply sharpening for better OCR accuracy
@@ -291,14 +364,12 @@ def check_skill_points(screenshot=None):
 
 def check_skill_points_cap(screenshot=None):
     """Check skill points and handle cap logic (same as PC version)"""
-    import json
     import tkinter as tk
     from tkinter import messagebox
     
     # Load config
     try:
-        with open("config.json", "r", encoding="utf-8") as file:
-            config = json.load(file)
+        config = load_main_config()
     except Exception as e:
         log_error(f"Error loading config: {e}")
         return True
@@ -309,6 +380,8 @@ def check_skill_points_cap(screenshot=None):
     log_info(f"Current skill points: {current_skill_points}, Cap: {skill_point_cap}")
     
     if current_skill_points > skill_point_cap:
+        # Points are spent below (automatically or by the player); read them again next time
+        _turn_state.forget("skill_points")
         log_warning(f"Skill points ({current_skill_points}) exceed cap ({skill_point_cap})")
         
         # Decide flow based on config
@@ -355,7 +428,9 @@ def check_skill_points_cap(screenshot=None):
 
                 # Filter by budget if we have points
                 final_plan = purchase_plan
+                budget_points = None
                 if isinstance(available_points, int) and available_points > 0:
+                    budget_points = available_points
                     affordable_skills, total_cost, remaining_points = filter_affordable_skills(purchase_plan, available_points)
                     final_plan = affordable_skills if affordable_skills else []
                     log_info(f"Affordable skills: {len(final_plan)}; Total cost: {total_cost}; Remaining: {remaining_points}")
@@ -367,7 +442,8 @@ def check_skill_points_cap(screenshot=None):
                     return True
 
                 # Execute automated purchases
-                exec_result = execute_skill_purchases(final_plan)
+                exec_result = execute_skill_purchases(final_plan, available_points=budget_points,
+                                                      positions_reliable=scan_result.get('positions_reliable', False))
                 if not exec_result.get('success'):
                     log_warning(f"Automated purchase completed with issues: {exec_result.get('error', 'unknown error')}")
 
@@ -437,7 +513,7 @@ def check_current_stats(screenshot=None):
     for stat_name, region in stat_regions.items():
         try:
             # Crop to stat region from provided screenshot
-            stat_img = screenshot.crop(region)
+            stat_img = crop_for_ocr(screenshot, region)
             
             # Enhance image for better OCR
             stat_img = stat_img.resize((stat_img.width * 2, stat_img.height * 2), Image.BICUBIC)
@@ -471,7 +547,43 @@ def check_current_stats(screenshot=None):
 
 
 
+def check_energy_reading(screenshot=None, debug_visualization=False):
+    """Energy percentage and confidence (EnergyReading) from the energy pill.
+
+    The midline colour profile of the pill (utils.energy_bar, geometry located
+    once and cached) decides when it is confident. Otherwise, or when debug
+    images are requested, the full scan (check_energy_bar_full_scan) measures
+    the level and its confidence is the share of midline columns agreeing
+    with it. A failed check has confidence 0.0: callers treat low confidence
+    as unknown energy, not as an empty bar.
+    """
+    try:
+        if screenshot is None:
+            screenshot = take_screenshot()
+
+        if not debug_visualization:
+            # Allow confidence override via config; below it the full scan decides
+            min_confidence = float(config.get("energy_profile_min_confidence", 0.9))
+            reading = _energy_reader.read(screenshot)
+            if reading.confidence >= min_confidence:
+                log_debug(f"Energy by profile: {reading.percentage:.1f}% (confidence {reading.confidence:.2f})")
+                return reading
+            log_debug(f"Energy profile unsure ({reading.percentage:.1f}%, confidence {reading.confidence:.2f}); running full scan")
+        percentage = check_energy_bar_full_scan(screenshot, debug_visualization)
+        reading = EnergyReading(percentage, _energy_reader.agreement(screenshot, percentage))
+        log_debug(f"Energy by full scan: {reading.percentage:.1f}% (confidence {reading.confidence:.2f})")
+        return reading
+    except Exception as e:
+        log_debug(f"Energy bar check failed: {e}")
+        return EnergyReading(0.0, 0.0)
+
+
 def check_energy_bar(screenshot=None, debug_visualization=False):
+    """Energy percentage only (see check_energy_reading for its confidence)"""
+    return check_energy_reading(screenshot, debug_visualization).percentage
+
+
+def check_energy_bar_full_scan(screenshot=None, debug_visualization=False):
     """Compute energy percentage using saturation-based detection.
 
     - Crop to the energy region
@@ -488,7 +600,7 @@ def check_energy_bar(screenshot=None, debug_visualization=False):
             screenshot = take_screenshot()
 
         # Crop region (x, y, w, h) - energy bar location
-        x, y, width, height = 330, 203, 602, 72
+        x, y, width, height = ENERGY_REGION
         cropped = screenshot.crop((x, y, x + width, y + height))
 
         img = np.array(cropped, dtype=np.uint8)
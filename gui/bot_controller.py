@@ -8,7 +8,14 @@ import queue
 import re
 from datetime import datetime
 
+# The worker talks to the GUI over utils.bot_channel; make the project root importable
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
 class BotController:
+    LOG_LEVELS = ("info", "warning", "error", "success", "debug")
+
     def __init__(self, main_window):
         self.main_window = main_window
         self.bot_running = False
@@ -16,6 +23,20 @@ class BotController:
         self.status_update_thread = None
         self.log_monitor_thread = None
         self.bot_process = None  # Store process reference for termination
+
+        # Warm worker mode: one long-lived bot_worker.py process reused across runs,
+        # controlled over a local channel (start/stop/pause). False spawns main.py per run.
+        self.use_worker = True
+        self.worker_process = None
+        self.worker_channel = None
+        self.worker_lock = threading.Lock()
+        # Orders the start/stop commands sent to the worker
+        self.run_lock = threading.Lock()
+        self.worker_state = None
+        self.worker_restart_pending = False
+        # A cooperative stop was sent and the run has not ended yet; the next STOP is immediate
+        self.stop_pending = False
+        self.bot_paused = False
         
         # Queues for communication between threads
         self.status_queue = queue.Queue()
@@ -28,6 +49,8 @@ class BotController:
             'turn': 'Unknown',
             'mood': 'Unknown',
             'goal_met': False,
+            'goal': '',
+            'criteria': '',
             'stats': {
                 'spd': 0,
                 'sta': 0,
@@ -38,7 +61,7 @@ class BotController:
         }
         
         # Status update interval
-        self.status_update_interval = 1.0  # seconds
+        self.status_update_interval = 0.25  # seconds
         
         # Start status update thread
         self.start_status_updates()
@@ -55,6 +78,11 @@ class BotController:
         
         self.bot_running = True
         self.main_window.add_log("Starting Uma Musume Auto-Train Bot...", "info")
+
+        if self.use_worker:
+            # Spawning/warming the worker can take a few seconds; keep the UI responsive
+            threading.Thread(target=self.start_worker_run, daemon=True).start()
+            return
         
         # Start bot in separate thread
         self.bot_thread = threading.Thread(target=self.run_bot, daemon=True)
@@ -65,11 +93,41 @@ class BotController:
         self.log_monitor_thread.start()
     
     def stop_bot(self):
-        """Stop the bot automation"""
+        """
+        Stop the bot automation.
+
+        Returns:
+            bool: True once the bot is stopped, False while a cooperative stop is pending
+            (the worker is finishing its turn; pressing STOP again stops it at once)
+        """
         if not self.bot_running:
-            return
-        
+            return True
+
+        if self.use_worker:
+            with self.run_lock:
+                channel = self.worker_channel
+                if channel is not None:
+                    if self.stop_pending:
+                        # Second STOP: the run may be stuck away from the lobby, where no turn ends
+                        self.main_window.add_log("Stopping bot now...", "warning")
+                        channel.send({"cmd": "stop", "immediate": True})
+                    else:
+                        # Cooperative: the worker leaves the lobby loop once the current turn is done
+                        self.main_window.add_log("Stopping bot after the current turn "
+                                                 "(press STOP again to stop now)...", "warning")
+                        channel.send({"cmd": "stop"})
+                        self.stop_pending = True
+                    # bot_running stays True until the worker reports the run ended
+                    return False
+                self.bot_running = False
+                self.bot_paused = False
+            # Still spawning: start_worker_run sees bot_running False and does not start
+            self.main_window.add_log("Bot stopped before the worker was ready", "warning")
+            return True
+
         self.bot_running = False
+        self.bot_paused = False
+
         self.main_window.add_log("Stopping bot...", "warning")
         
         # Terminate the bot process if it's running
@@ -102,6 +160,7 @@ class BotController:
             self.log_monitor_thread.join(timeout=1)
             
         self.main_window.add_log("Bot stopped successfully", "success")
+        return True
     
     def run_bot(self):
         """Run the bot automation"""
@@ -133,6 +192,10 @@ class BotController:
                     if "PYTHONPATH" in env:
                         pythonpath = pythonpath + os.pathsep + env["PYTHONPATH"]
                     env["PYTHONPATH"] = pythonpath
+                    # main.py sends logs and status as structured events over this channel
+                    from utils.bot_channel import ChannelListener
+                    listener = ChannelListener()
+                    env.update(listener.env())
                     
                     self.bot_process = subprocess.Popen(
                         [sys.executable, '-u', 'main.py'],  # -u for unbuffered output
@@ -148,6 +211,8 @@ class BotController:
                     )
                     
                     self.main_window.add_log("Bot process started successfully", "success")
+                    threading.Thread(target=self.accept_and_read_events,
+                                     args=(listener, self.bot_process), daemon=True).start()
                     
                     # Monitor the process output
                     while self.bot_running and self.bot_process and self.bot_process.poll() is None:
@@ -201,19 +266,196 @@ class BotController:
                     self.bot_process = None
                 except:
                     pass
-            self.bot_running = False
-            self.main_window.add_log("Bot stopped", "warning")
-            # Ensure main window state and button reflect auto-stop
+            self.notify_bot_stopped()
+
+    def notify_bot_stopped(self):
+        """Reset running state and the START/STOP button after the bot ended on its own"""
+        self.bot_running = False
+        self.bot_paused = False
+        self.stop_pending = False
+        self.main_window.add_log("Bot stopped", "warning")
+        # Ensure main window state and button reflect auto-stop
+        try:
+            self.main_window.bot_running = False
+            if hasattr(self.main_window, 'log_panel') and hasattr(self.main_window, 'root'):
+                # Update button on the main UI thread
+                self.main_window.root.after(0, self.main_window.log_panel.update_start_stop_button, False)
+                self.main_window.root.after(0, self.main_window.log_panel.update_pause_button, False)
+        except Exception:
+            pass
+
+    # --- warm worker --------------------------------------------------------
+
+    def start_worker_run(self):
+        """Make sure the worker is up, then ask it to start a run"""
+        try:
+            if not self.ensure_worker():
+                self.notify_bot_stopped()
+                return
+            with self.run_lock:
+                # STOP may have been pressed while the worker was spawning
+                if not self.bot_running:
+                    return
+                self.worker_channel.send({"cmd": "start"})
+        except Exception as e:
+            self.main_window.add_log(f"Error starting bot worker: {e}", "error")
+            self.notify_bot_stopped()
+
+    def ensure_worker(self):
+        """Spawn bot_worker.py unless a live worker is connected; returns False on failure"""
+        from utils.bot_channel import ChannelListener
+
+        with self.worker_lock:
+            if (self.worker_process and self.worker_process.poll() is None
+                    and self.worker_channel is not None and not self.worker_channel.closed):
+                return True
+
+            worker_script = os.path.join(_PROJECT_ROOT, 'bot_worker.py')
+            if not os.path.exists(worker_script):
+                self.main_window.add_log("bot_worker.py not found", "error")
+                return False
+
+            self.main_window.add_log("Starting bot worker (loading modules)...", "info")
+            listener = ChannelListener()
+            env = os.environ.copy()
+            pythonpath = _PROJECT_ROOT
+            if "PYTHONPATH" in env:
+                pythonpath = pythonpath + os.pathsep + env["PYTHONPATH"]
+            env["PYTHONPATH"] = pythonpath
+            env.update(listener.env())
+
+            process = subprocess.Popen(
+                [sys.executable, '-u', 'bot_worker.py'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                encoding='utf-8',
+                errors='replace',
+                cwd=_PROJECT_ROOT,
+                env=env
+            )
+            threading.Thread(target=self.read_worker_output, args=(process,), daemon=True).start()
+
+            channel = listener.accept(timeout=120, alive=lambda: process.poll() is None)
+            if channel is None:
+                self.main_window.add_log("Bot worker did not start", "error")
+                if process.poll() is None:
+                    process.kill()
+                return False
+
+            self.worker_process = process
+            self.worker_channel = channel
+            self.worker_restart_pending = False
+            threading.Thread(target=self.read_worker_events, args=(process, channel), daemon=True).start()
+            return True
+
+    def read_worker_output(self, process):
+        """Forward the worker's stdout to the log for as long as it lives"""
+        try:
+            for line in process.stdout:
+                self.process_bot_output(line.strip())
+        except Exception as e:
+            print(f"Error reading bot worker output: {e}")
+
+    def read_events(self, channel):
+        """Handle messages from the bot until its channel closes"""
+        while True:
             try:
-                self.main_window.bot_running = False
-                if hasattr(self.main_window, 'log_panel') and hasattr(self.main_window, 'root'):
-                    # Update button on the main UI thread
-                    self.main_window.root.after(0, self.main_window.log_panel.update_start_stop_button, False)
-            except Exception:
-                pass
+                message = channel.recv()
+            except EOFError:
+                break
+            except Exception as e:
+                print(f"Error reading bot event: {e}")
+                continue
+            self.handle_bot_event(message)
+
+    def accept_and_read_events(self, listener, process):
+        """Legacy main.py run: wait for the bot to connect, then read its events"""
+        channel = listener.accept(timeout=120, alive=lambda: process.poll() is None)
+        if channel is not None:
+            self.read_events(channel)
+
+    def read_worker_events(self, process, channel):
+        """Handle the worker's messages; restart or clean up once its channel closes"""
+        self.read_events(channel)
+
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if self.worker_process is process:
+            self.worker_process = None
+            self.worker_channel = None
+
+        if self.worker_restart_pending and self.bot_running:
+            # Settings changed since the worker loaded them: start a fresh one and resume the START
+            self.start_worker_run()
+        elif self.bot_running:
+            self.main_window.add_log(f"Bot worker exited (code {process.returncode})", "error")
+            self.notify_bot_stopped()
+
+    def handle_bot_event(self, message):
+        """Structured event from the bot (utils.bot_events / bot_worker.py)"""
+        event = message.get("event")
+        if event == "log":
+            level = message.get("level", "info")
+            self.log_queue.put((message.get("message", ""), level if level in self.LOG_LEVELS else "info"))
+            return
+        if event == "status":
+            self.apply_status_event(message)
+            return
+        if event == "restart_required":
+            self.worker_restart_pending = True
+            self.main_window.add_log("Settings changed - restarting the bot worker", "info")
+            return
+        if event != "state":
+            return
+
+        state = message.get("state")
+        self.worker_state = state
+        if state == "running":
+            self.main_window.add_log("Bot running", "success")
+        elif state == "paused":
+            self.main_window.add_log("Bot paused", "warning")
+        elif state == "idle":
+            reason = message.get("reason")
+            if reason and reason != "not running":
+                self.main_window.add_log(f"Bot run ended ({reason})", "info")
+            if self.bot_running or self.main_window.bot_running:
+                self.notify_bot_stopped()
+            else:
+                self.main_window.add_log("Bot stopped successfully", "success")
+        elif state == "failed":
+            self.main_window.add_log(f"Bot worker failed to start: {message.get('reason')}", "error")
+
+    def toggle_pause(self):
+        """Pause or resume the worker's lobby loop; returns the new paused state"""
+        if not self.bot_running or self.worker_channel is None:
+            return self.bot_paused
+        self.bot_paused = not self.bot_paused
+        self.worker_channel.send({"cmd": "pause" if self.bot_paused else "resume"})
+        self.main_window.add_log("Pausing after the current action..." if self.bot_paused else "Resuming bot...", "info")
+        return self.bot_paused
+
+    def shutdown(self):
+        """Stop the worker process when the GUI closes"""
+        process, channel = self.worker_process, self.worker_channel
+        if channel is not None:
+            channel.send({"cmd": "shutdown"})
+        if process is not None:
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
     
     def process_bot_output(self, output):
-        """Process bot output to extract status updates and logs"""
+        """
+        Queue a raw stdout line for the log.
+
+        Bot logs and status normally arrive as structured events (handle_bot_event);
+        stdout only carries what was printed outside utils.log (tracebacks, libraries).
+        """
         if not output or not output.strip():
             return
         
@@ -224,20 +466,9 @@ class BotController:
             
             # Filter out unwanted shell output - only show actual logging messages
             if self.should_display_output(output):
-                # Add to log queue for display
-                self.log_queue.put(output)
-            
-            # Try to extract status information from the output
-            self.extract_status_from_output(output)
+                self.log_queue.put((output, self.determine_log_level(output)))
         except Exception as e:
-            # Log error but continue processing
             print(f"Error processing bot output: {e}")
-            # Try to add the raw output to logs anyway
-            try:
-                if self.should_display_output(str(output)):
-                    self.log_queue.put(str(output))
-            except:
-                pass
     
     def should_display_output(self, output):
         """Determine if output should be displayed in GUI log"""
@@ -280,78 +511,15 @@ class BotController:
         
         return False
     
-    def extract_status_from_output(self, output):
-        """Extract status information from bot output"""
-        try:
-            # Ensure output is a string and handle any encoding issues
-            if not isinstance(output, str):
-                output = str(output)
-            
-            # Extract year information
-            year_match = re.search(r'Year:\s*(.+)', output)
-            if year_match:
-                year = year_match.group(1).strip()
-                self.update_status('year', year)
-            
-            # Extract energy information
-            energy_match = re.search(r'Energy:\s*([\d.]+)%', output)
-            if energy_match:
-                energy = float(energy_match.group(1))
-                self.update_status('energy', energy)
-            
-            # Extract turn information
-            turn_match = re.search(r'Turn:\s*(.+)', output)
-            if turn_match:
-                turn = turn_match.group(1).strip()
-                self.update_status('turn', turn)
-            
-            # Extract mood information
-            mood_match = re.search(r'Mood:\s*(.+)', output)
-            if mood_match:
-                mood = mood_match.group(1).strip()
-                self.update_status('mood', mood)
-            
-            # Extract goal status
-            goal_match = re.search(r'Status:\s*(.+)', output)
-            if goal_match:
-                goal_text = goal_match.group(1).strip()
-                # Check if goal is met (criteria met)
-                goal_met = "criteria met" in goal_text.lower() or "goal achieved" in goal_text.lower()
-                self.update_status('goal_met', goal_met)
-            
-            # Extract stats
-            stats_match = re.search(r'Current stats:\s*(.+)', output)
-            if stats_match:
-                stats_text = stats_match.group(1)
-                stats = self.parse_stats_from_text(stats_text)
-                if stats:
-                    self.update_status('stats', stats, partial=True)
-                    
-        except Exception as e:
-            # Don't log parsing errors to avoid spam, but print to console for debugging
-            print(f"Error extracting status from output: {e}")
-            pass
-    
-    def parse_stats_from_text(self, stats_text):
-        """Parse stats from text like 'SPD: 244, STA: 176, PWR: 166, GUTS: 99, WIT: 126'"""
-        try:
-            if not stats_text or not isinstance(stats_text, str):
-                return {}
-            
-            # Ensure the text is properly encoded
-            stats_text = str(stats_text)
-                
-            stats = {}
-            # Look for patterns like "spd: 123", "sta: 456", etc.
-            for stat in ['spd', 'sta', 'pwr', 'guts', 'wit']:
-                match = re.search(f'{stat}:\\s*(\\d+)', stats_text, re.IGNORECASE)
-                if match:
-                    stats[stat] = int(match.group(1))
-            return stats
-        except Exception as e:
-            print(f"Error parsing stats from text: {e}")
-            return {}
-    
+    def apply_status_event(self, message):
+        """Copy the typed fields of a status event into current_status (one GUI update)"""
+        for field in ('year', 'mood', 'turn', 'goal', 'criteria', 'goal_met', 'energy'):
+            if field in message:
+                self.current_status[field] = message[field]
+        if isinstance(message.get('stats'), dict):
+            self.current_status['stats'].update(message['stats'])
+        self.status_queue.put(self.current_status.copy())
+
     def update_status(self, field, value, partial=False):
         """Update status field and queue for GUI update"""
         if field == 'stats':
@@ -368,26 +536,31 @@ class BotController:
         self.status_queue.put(self.current_status.copy())
     
     def status_update_loop(self):
-        """Main status update loop that runs continuously"""
+        """
+        Forward queued status and log entries to the GUI once per interval.
+
+        Only the newest status is applied; log entries go to the log panel's
+        model in one batch (the panel inserts them on its own UI tick).
+        """
         while True:
             try:
-                # Check for status updates
-                try:
-                    while not self.status_queue.empty():
+                status = None
+                while True:
+                    try:
                         status = self.status_queue.get_nowait()
-                        # Update GUI status panel
-                        self.main_window.root.after(0, self.update_gui_status, status)
-                except queue.Empty:
-                    pass
+                    except queue.Empty:
+                        break
+                if status is not None:
+                    self.main_window.root.after(0, self.update_gui_status, status)
                 
-                # Check for log updates
-                try:
-                    while not self.log_queue.empty():
-                        log_entry = self.log_queue.get_nowait()
-                        # Add to GUI log panel
-                        self.main_window.root.after(0, self.add_log_to_gui, log_entry)
-                except queue.Empty:
-                    pass
+                batch = []
+                while True:
+                    try:
+                        batch.append(self.log_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch:
+                    self.add_logs_to_gui(batch)
                 
                 time.sleep(self.status_update_interval)
                 
@@ -404,15 +577,13 @@ class BotController:
         except Exception as e:
             print(f"Error updating GUI status: {e}")
     
-    def add_log_to_gui(self, log_entry):
-        """Add log entry to GUI (called from main thread)"""
+    def add_logs_to_gui(self, entries):
+        """Add (message, level) entries to the log panel's model (thread-safe)"""
         try:
             if hasattr(self.main_window, 'log_panel'):
-                # Determine log level based on content
-                log_level = self.determine_log_level(log_entry)
-                self.main_window.log_panel.add_log_entry(log_entry, log_level)
+                self.main_window.log_panel.add_log_entries(entries)
         except Exception as e:
-            print(f"Error adding log to GUI: {e}")
+            print(f"Error adding logs to GUI: {e}")
     
     def determine_log_level(self, log_entry):
         """Determine log level based on log entry content"""
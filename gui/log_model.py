@@ -0,0 +1,70 @@
+import threading
+from collections import deque
+from datetime import datetime
+
+LOG_LEVELS = ("debug", "info", "success", "warning", "error")
+
+
+class LogModel:
+    """
+    Bounded, thread-safe store behind the log panel.
+
+    Keeps the newest max_entries entries (older ones are dropped) and the
+    entries not shown yet, so the widget can insert them in one batch per UI
+    tick. Filtering and saving work on the model, never on the text widget.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max(int(max_entries), 100)
+        self._entries = deque(maxlen=self.max_entries)
+        self._pending = deque(maxlen=self.max_entries)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def append(self, message, level="info"):
+        """Add one entry (any thread); returns the (timestamp, level, message) tuple stored"""
+        entry = (datetime.now().strftime("%H:%M:%S"), level if level in LOG_LEVELS else "info", str(message))
+        with self._lock:
+            if len(self._entries) == self.max_entries:
+                self.dropped += 1
+            self._entries.append(entry)
+            self._pending.append(entry)
+        return entry
+
+    def take_pending(self):
+        """Entries added since the last call (oldest first)"""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        return pending
+
+    def entries(self, levels=None):
+        """Snapshot of the stored entries, optionally only the given levels"""
+        with self._lock:
+            snapshot = list(self._entries)
+        if levels is None:
+            return snapshot
+        return [entry for entry in snapshot if entry[1] in levels]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self.dropped = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def format_entry(entry):
+        timestamp, _, message = entry
+        return f"[{timestamp}] {message}"
+
+    def write_to(self, f, levels=None):
+        """Stream the (filtered) entries to an open text file; returns the number written"""
+        count = 0
+        for entry in self.entries(levels):
+            f.write(self.format_entry(entry))
+            f.write("\n")
+            count += 1
+        return count
@@ -6,8 +6,23 @@ from datetime import datetime
 # Import centralized font management
 try:
     from .font_manager import get_font_manager, get_font, get_font_tuple
+    from .log_model import LogModel
 except ImportError:
     from font_manager import get_font_manager, get_font, get_font_tuple
+    from log_model import LogModel
+
+# Newest entries kept in memory and in the widget (config "gui.log_max_entries")
+DEFAULT_LOG_MAX_ENTRIES = 5000
+# Pending entries are inserted into the widget in one batch per tick
+UI_TICK_MS = 100
+
+# Level filter choices -> levels shown
+LEVEL_FILTERS = {
+    "All": None,
+    "No debug": {"info", "success", "warning", "error"},
+    "Warnings": {"warning", "error"},
+    "Errors": {"error"},
+}
 
 class LogPanel(ctk.CTkFrame):
     def __init__(self, parent, main_window, colors):
@@ -15,6 +30,10 @@ class LogPanel(ctk.CTkFrame):
         self.main_window = main_window
         self.colors = colors
 
+        gui_config = getattr(main_window, 'config', {}).get('gui', {})
+        self.model = LogModel(gui_config.get('log_max_entries', DEFAULT_LOG_MAX_ENTRIES))
+        self.visible_levels = None
+
         # Title label
         title_label = ctk.CTkLabel(self, text="LOG", font=get_font('title_medium'), text_color=colors['text_light'])
         title_label.pack(pady=(15, 10))
@@ -27,6 +46,9 @@ class LogPanel(ctk.CTkFrame):
 
         # Initialize auto-scroll
         self.auto_scroll_var = tk.BooleanVar(value=True)
+
+        # Batched widget updates from the model
+        self.after(UI_TICK_MS, self.flush_pending)
     
     def create_log_controls(self):
         """Create the modern log control buttons above the log display"""
@@ -43,6 +65,17 @@ class LogPanel(ctk.CTkFrame):
                                           height=32,
                                           font=get_font('button'))
         self.start_stop_btn.pack(side=tk.LEFT, padx=(0, 10))
+
+        # PAUSE/RESUME Button (holds the bot between actions)
+        self.pause_btn = ctk.CTkButton(controls_frame, text="PAUSE",
+                                       command=self.toggle_pause,
+                                       fg_color=self.colors['accent_yellow'],
+                                       hover_color="#6b5214",
+                                       corner_radius=8,
+                                       width=80,
+                                       height=32,
+                                       font=get_font('button'))
+        self.pause_btn.pack(side=tk.LEFT, padx=(0, 10))
         
         # Auto-scroll Toggle (modern switch)
         auto_scroll_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
@@ -59,6 +92,18 @@ class LogPanel(ctk.CTkFrame):
                                            font=get_font('button'))
         self.auto_scroll_btn.pack(side=tk.LEFT, padx=(10, 0))
         
+        # Level filter (applied to the model, then the view is rebuilt)
+        filter_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
+        filter_frame.pack(side=tk.LEFT, padx=(10, 0))
+        ctk.CTkLabel(filter_frame, text="Show:", text_color=self.colors['text_light'], font=get_font('label')).pack(side=tk.LEFT)
+        self.level_filter_menu = ctk.CTkOptionMenu(filter_frame, values=list(LEVEL_FILTERS),
+                                                   command=self.set_level_filter,
+                                                   width=100,
+                                                   height=32,
+                                                   font=get_font('button'))
+        self.level_filter_menu.set("All")
+        self.level_filter_menu.pack(side=tk.LEFT, padx=(10, 0))
+        
         # Log management buttons (modern rounded buttons)
         log_management_frame = ctk.CTkFrame(controls_frame, fg_color="transparent")
         log_management_frame.pack(side=tk.RIGHT)
@@ -119,6 +164,10 @@ class LogPanel(ctk.CTkFrame):
         else:
             self.main_window.start_bot()
     
+    def toggle_pause(self):
+        """Toggle bot pause/resume"""
+        self.main_window.toggle_pause_bot()
+    
     def toggle_auto_scroll(self):
         """Toggle auto-scroll functionality"""
         self.auto_scroll_var.set(not self.auto_scroll_var.get())
@@ -127,65 +176,101 @@ class LogPanel(ctk.CTkFrame):
         else:
             self.auto_scroll_btn.configure(text="OFF", fg_color=self.colors['accent_red'])
     
-    def update_start_stop_button(self, bot_running):
-        """Update the START/STOP button appearance"""
+    def update_start_stop_button(self, bot_running, stopping=False):
+        """Update the START/STOP button appearance (STOP NOW while a stop waits for the turn to end)"""
         if bot_running:
-            self.start_stop_btn.configure(text="STOP", fg_color=self.colors['accent_red'], hover_color="#651f2a")
+            self.start_stop_btn.configure(text="STOP NOW" if stopping else "STOP",
+                                          fg_color=self.colors['accent_red'], hover_color="#651f2a")
         else:
             self.start_stop_btn.configure(text="START", fg_color=self.colors['accent_green'], hover_color="#2d5a27")
     
+    def update_pause_button(self, paused):
+        """Update the PAUSE/RESUME button appearance"""
+        if paused:
+            self.pause_btn.configure(text="RESUME", fg_color=self.colors['accent_blue'], hover_color="#1f4a7a")
+        else:
+            self.pause_btn.configure(text="PAUSE", fg_color=self.colors['accent_yellow'], hover_color="#6b5214")
+    
     def add_log_entry(self, log_entry, log_level="info"):
-        """Add a log entry to the display with specified log level"""
+        """Add a log entry with the given level (safe from any thread; shown on the next UI tick)"""
+        if not isinstance(log_entry, str):
+            log_entry = str(log_entry)
+        if log_level not in ["info", "warning", "error", "success", "debug"]:
+            log_level = self.guess_level(log_entry)
+        self.model.append(log_entry, log_level)
+    
+    def add_log_entries(self, entries):
+        """Add several (message, level) entries at once"""
+        for log_entry, log_level in entries:
+            self.add_log_entry(log_entry, log_level)
+    
+    @staticmethod
+    def guess_level(log_entry):
+        """Fallback: determine log level from content"""
+        upper = log_entry.upper()
+        if "ERROR" in upper or "FAILED" in upper:
+            return "error"
+        elif "WARNING" in upper:
+            return "warning"
+        elif "SUCCESS" in upper or "COMPLETED" in upper:
+            return "success"
+        elif "DEBUG" in upper:
+            return "debug"
+        return "info"
+    
+    def flush_pending(self):
+        """Insert the entries added since the last tick in one widget call, then trim the widget"""
         try:
-            # Ensure the log entry is properly encoded as a string
-            if not isinstance(log_entry, str):
-                log_entry = str(log_entry)
-            
-            # Use provided log level or determine from content
-            if log_level in ["info", "warning", "error", "success", "debug"]:
-                tag = log_level
-            else:
-                # Fallback: determine log level from content
-                tag = "info"
-                if "ERROR" in log_entry.upper() or "FAILED" in log_entry.upper():
-                    tag = "error"
-                elif "WARNING" in log_entry.upper():
-                    tag = "warning"
-                elif "SUCCESS" in log_entry.upper() or "COMPLETED" in log_entry.upper():
-                    tag = "success"
-                elif "DEBUG" in log_entry.upper():
-                    tag = "debug"
-            
-            # Add timestamp (GUI provides its own timestamp)
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            formatted_entry = f"[{timestamp}] {log_entry}"
-            
-            # Insert log entry with proper Unicode handling
-            self.log_text.insert(tk.END, formatted_entry + "\n", tag)
-            
-            # Auto-scroll if enabled
-            if self.auto_scroll_var.get():
-                self.log_text.see(tk.END)
-                
+            pending = self.model.take_pending()
+            if self.visible_levels is not None:
+                pending = [entry for entry in pending if entry[1] in self.visible_levels]
+            if pending:
+                self.insert_entries(pending)
         except Exception as e:
-            # Fallback: try to insert without formatting if there's an error
-            try:
-                fallback_entry = f"[{datetime.now().strftime('%H:%M:%S')}] {str(log_entry)}"
-                self.log_text.insert(tk.END, fallback_entry + "\n", "error")
-                if self.auto_scroll_var.get():
-                    self.log_text.see(tk.END)
-            except:
-                # Last resort: just print to console
-                print(f"Failed to add log entry: {log_entry}")
-                print(f"Error: {e}")
+            print(f"Error updating log view: {e}")
+        finally:
+            self.after(UI_TICK_MS, self.flush_pending)
+    
+    def insert_entries(self, entries):
+        """Append entries to the widget (tk insert takes text/tag pairs) and keep it bounded"""
+        # Only the newest max_entries can be visible anyway
+        entries = entries[-self.model.max_entries:]
+        args = []
+        for entry in entries:
+            args.extend((LogModel.format_entry(entry) + "\n", entry[1]))
+        self.log_text.insert(tk.END, *args)
+        
+        # Trim from the top; one line per entry except for multi-line messages
+        # (the text always ends with a newline, so the last index is an empty line)
+        line_count = int(self.log_text.index('end-1c').split('.')[0]) - 1
+        excess = line_count - self.model.max_entries
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+        
+        if self.auto_scroll_var.get():
+            self.log_text.see(tk.END)
+    
+    def set_level_filter(self, choice):
+        """Show only the chosen levels; the view is rebuilt from the model"""
+        self.visible_levels = LEVEL_FILTERS.get(choice)
+        self.render_from_model()
+    
+    def render_from_model(self):
+        # Drop pending entries: the snapshot below already contains them
+        self.model.take_pending()
+        self.log_text.delete(1.0, tk.END)
+        entries = self.model.entries(self.visible_levels)
+        if entries:
+            self.insert_entries(entries)
     
     def clear_logs(self):
-        """Clear all logs from the display"""
+        """Clear all logs from the model and the display"""
+        self.model.clear()
         self.log_text.delete(1.0, tk.END)
         self.add_log_entry("[INFO] Logs cleared")
     
     def save_logs(self):
-        """Save logs to a file"""
+        """Save the (filtered) logs to a file, streamed from the model"""
         filename = filedialog.asksaveasfilename(
             defaultextension=".txt",
             filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
@@ -194,16 +279,18 @@ class LogPanel(ctk.CTkFrame):
         if filename:
             try:
                 with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(self.log_text.get(1.0, tk.END))
-                self.add_log_entry(f"[INFO] Logs saved to {filename}")
+                    count = self.model.write_to(f, self.visible_levels)
+                self.add_log_entry(f"[INFO] Saved {count} log lines to {filename}")
             except Exception as e:
                 self.add_log_entry(f"[ERROR] Failed to save logs: {e}")
     
     def get_log_content(self):
         """Get the current log content as string"""
-        return self.log_text.get(1.0, tk.END)
+        return "".join(LogModel.format_entry(entry) + "\n" for entry in self.model.entries(self.visible_levels))
     
     def set_log_content(self, content):
         """Set the log content from a string"""
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.insert(1.0, content)
+        self.model.clear()
+        for line in content.splitlines():
+            self.model.append(line, self.guess_level(line))
+        self.render_from_model()
@@ -244,11 +244,23 @@ class MainWindow:
     def stop_bot(self):
         """Stop the bot automation"""
         if hasattr(self, 'bot_controller'):
-            self.bot_controller.stop_bot()
+            if not self.bot_controller.stop_bot():
+                # Finishing the turn; the button stays armed to stop immediately
+                if hasattr(self, 'log_panel'):
+                    self.log_panel.update_start_stop_button(True, stopping=True)
+                return
             self.bot_running = False
             # Update log panel button
             if hasattr(self, 'log_panel'):
                 self.log_panel.update_start_stop_button(False)
+                self.log_panel.update_pause_button(False)
+
+    def toggle_pause_bot(self):
+        """Pause or resume the running bot"""
+        if hasattr(self, 'bot_controller') and self.bot_running:
+            paused = self.bot_controller.toggle_pause()
+            if hasattr(self, 'log_panel'):
+                self.log_panel.update_pause_button(paused)
     
     def add_log(self, message, level="info"):
         """Add a log message to the queue"""
@@ -312,11 +324,11 @@ def main():
         if app.bot_running:
             if messagebox.askokcancel("Quit", "Bot is running. Do you want to stop it and quit?"):
                 app.stop_bot()
-                root.destroy()
             else:
                 return
-        else:
-            root.destroy()
+        # Stops the warm bot worker (if one was started)
+        app.bot_controller.shutdown()
+        root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
     
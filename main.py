@@ -2,6 +2,9 @@ import time
 import subprocess
 import sys
 import os
+import threading
+
+_IMPORT_START = time.perf_counter()
 
 # Add script's directory to Python path (for embeddable Python compatibility)
 # This ensures utils/ and other modules can be found regardless of how Python is invoked
@@ -13,20 +16,11 @@ else:
 if script_dir and script_dir not in sys.path:
     sys.path.insert(0, script_dir)
 
-from utils.log import log_info, log_warning, log_error, log_success
+from utils.log import log_info, log_warning, log_error, log_success, configure_console_utf8
 
 # Fix Windows console encoding for Unicode support
-if os.name == 'nt':  # Windows
-    try:
-        # Set console to UTF-8 mode
-        os.system('chcp 65001 > nul')
-        # Also try to set stdout encoding
-        if hasattr(sys.stdout, 'reconfigure'):
-            sys.stdout.reconfigure(encoding='utf-8')
-    except:
-        pass
-
-from utils.screenshot import get_screen_size, load_config
+configure_console_utf8()
+
 from utils.config_loader import load_main_config
 
 # Load full config to determine mode
@@ -40,21 +34,72 @@ def load_full_config():
 
 config = load_full_config()
 mode = config.get("mode", "ura").lower()
+mode_name = "Unity Cup" if mode == "unity" else "URA"
 
-# Import the appropriate execute module based on mode
-if mode == "unity":
-    from core.Unity.execute import career_lobby
-    mode_name = "Unity Cup"
-else:
-    from core.Ura.execute import career_lobby
-    mode_name = "URA"
+# Optional hot-path timing and turn traces (config "profiling" / "tracing" sections)
+from utils.profiler import enable_from_config, export_report, record
+from utils.trace import mark, flush as flush_trace
+enable_from_config(config)
 
 from utils.device import run_adb, _get_adb_path
 
+_BASE_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+
+# Third-party libraries behind the mode modules; none of them imports project code
+_HEAVY_LIBRARIES = ("numpy", "cv2", "PIL.Image", "pytesseract")
+
+
+def _import_libraries(result):
+    """
+    Import the heavy third-party libraries (cv2, numpy, PIL, Tesseract bindings).
+
+    Runs on a background thread while the adb checks wait on the device. Project
+    modules are left to the main thread, so neither thread can see one of them
+    half-initialized by the other.
+    """
+    import importlib
+    started = time.perf_counter()
+    for name in _HEAVY_LIBRARIES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # Reported by the mode import on the main thread
+            pass
+    result["seconds"] = time.perf_counter() - started
+
+
+def start_mode_import():
+    result = {}
+    thread = threading.Thread(target=_import_libraries, args=(result,), name="library-import", daemon=True)
+    thread.start()
+    return thread, result
+
+
+def finish_mode_import(thread, result):
+    """Wait for the library import, then import the mode's lobby loop; returns career_lobby"""
+    thread.join()
+    started = time.perf_counter()
+    if mode == "unity":
+        from core.Unity.execute import career_lobby
+        from core.Unity.ocr import report_tesseract_setup
+    else:
+        from core.Ura.execute import career_lobby
+        from core.Ura.ocr import report_tesseract_setup
+    mode_seconds = time.perf_counter() - started
+    log_info(f"Startup imports: base {_BASE_IMPORT_SECONDS * 1000:.0f}ms, "
+             f"libraries {result['seconds'] * 1000:.0f}ms, {mode_name} modules {mode_seconds * 1000:.0f}ms")
+    record("startup.imports.base", _BASE_IMPORT_SECONDS)
+    record("startup.imports.libraries", result["seconds"])
+    record("startup.imports.mode", mode_seconds)
+    report_tesseract_setup()
+    return career_lobby
+
 # Logging is now handled by utils.log module
 
 def check_adb_connection():
     """Check if ADB is connected to a device"""
+    from utils.screenshot import load_config
     adb_config = load_config()  # This returns adb_config section
     adb_path = _get_adb_path()  # Use the function that finds bundled ADB
     device_address = adb_config.get('device_address', '')
@@ -111,6 +156,7 @@ def check_adb_connection():
 def get_device_info():
     """Get device information"""
     try:
+        from utils.screenshot import get_screen_size
         # Get screen size
         width, height = get_screen_size()
         log_info("Device screen size: " + str(width) + "x" + str(height))
@@ -131,11 +177,30 @@ def get_device_info():
         log_error("Error getting device info: " + str(e))
         return False
 
+def resolve_resolution_profile():
+    """Query the device size for the resolution profile before the mode modules scale their regions to it"""
+    from utils.resolution import ResolutionError, get_profile
+    try:
+        get_profile()
+        return True
+    except ResolutionError as e:
+        log_error(str(e))
+        return False
+
 def main():
+    # Launched by the GUI: send logs and status as structured events instead of plain stdout
+    from utils.bot_events import attach_from_env
+    attach_from_env()
+
     log_info(f"Uma Auto - {mode_name} Version!")
     log_info("=" * 40)
     log_info(f"Mode: {mode.upper()}")
-    
+
+    # The heavy libraries load while adb talks to the device; the mode modules
+    # follow once their regions can be scaled (resolution profile without a size)
+    from utils.resolution import profile_needs_device
+    import_thread, import_result = start_mode_import()
+
     # Check ADB connection
     if not check_adb_connection():
         return
@@ -143,6 +208,11 @@ def main():
     # Get device information
     if not get_device_info():
         return
+
+    if profile_needs_device() and not resolve_resolution_profile():
+        return
+
+    career_lobby = finish_mode_import(import_thread, import_result)
     
     log_info("")
     log_success("Starting automation...")
@@ -153,6 +223,16 @@ def main():
     log_info("Press Ctrl+C to stop the automation.")
     log_info("=" * 40)
     
+    run_automation(career_lobby)
+
+
+def run_automation(career_lobby):
+    """Run one lobby session with recording/profiling around it (shared with bot_worker.py)"""
+    # Optional session corpus for replay (config "recording" section)
+    from utils.session_recorder import start_recording_from_config, stop_recording
+    from utils.screen_model import get_matcher
+    start_recording_from_config(config)
+    get_matcher().reset_stats()
     try:
         career_lobby()
     except KeyboardInterrupt:
@@ -161,6 +241,14 @@ def main():
     except Exception as e:
         log_info("")
         log_error("Automation error: " + str(e))
+        # Keep the last few lobby iterations for diagnosis (no-op unless tracing is enabled)
+        mark("error", message=str(e))
+        flush_trace(f"error {type(e).__name__}")
+    finally:
+        # No-op unless profiling is enabled
+        export_report()
+        get_matcher().log_stats()
+        stop_recording()
 
 if __name__ == "__main__":
     main()
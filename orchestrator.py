@@ -0,0 +1,359 @@
+"""
+Run several emulator instances from one command.
+
+Each instance gets its own worker process running the normal lobby loop with
+config.json plus the instance's overrides (utils.config_loader overrides).
+Template images (each instance's resolution profile set) are decoded once
+here and shared with the workers through shared memory (utils.template_cache),
+and a combined status table with
+per-instance throughput is printed while they run.
+
+Instances come from the "instances" list in config.json (or --instances FILE):
+
+    "instances": [
+        {"name": "mumu-0", "device_address": "127.0.0.1:16384", "instance_id": 0},
+        {"name": "mumu-1", "device_address": "127.0.0.1:16416", "instance_id": 1,
+         "training": {"min_energy": 40}}
+    ]
+
+device_address / instance_id are shorthands for adb_config.device_address and
+nemu_ipc_config.instance_id; any other key overrides that config section.
+
+Ctrl+C stops every instance at its next turn boundary, a second Ctrl+C stops
+at the next loop iteration, a third terminates the workers.
+
+Usage:
+    python orchestrator.py [--instances FILE] [--only mumu-0,mumu-1] [--status-file status.json]
+"""
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import argparse
+import threading
+import multiprocessing
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.config_loader import load_main_config, OVERRIDES_ENV
+
+# Output folders that would collide between instances; each gets <dir>/<name>
+PER_INSTANCE_DIRS = ("profiling", "tracing", "recording")
+
+LOG_LEVELS = ("debug", "info", "success", "warning", "error")
+
+
+def instance_overrides(instance, config):
+    """Config overrides for one instance entry (shorthands expanded, output folders separated)"""
+    overrides = {key: value for key, value in instance.items()
+                 if key not in ("name", "device_address", "instance_id")}
+    if "device_address" in instance:
+        overrides.setdefault("adb_config", {})["device_address"] = instance["device_address"]
+    if "instance_id" in instance:
+        overrides.setdefault("nemu_ipc_config", {})["instance_id"] = instance["instance_id"]
+    for section in PER_INSTANCE_DIRS:
+        base = config.get(section, {}).get("output_dir")
+        if base and "output_dir" not in overrides.get(section, {}):
+            overrides.setdefault(section, {})["output_dir"] = os.path.join(base, instance["name"])
+    return overrides
+
+
+class QueueChannel:
+    """bot_events channel that tags events with the instance name and puts them on a queue"""
+
+    def __init__(self, events, name):
+        self.events = events
+        self.name = name
+        self.closed = False
+
+    def send(self, message):
+        try:
+            self.events.put((self.name, message))
+            return True
+        except Exception:
+            self.closed = True
+            return False
+
+
+def run_instance(name, manifest, events, stop, stop_now):
+    """Worker process: one lobby session on the instance's device (config overrides come from the environment)"""
+    # Ctrl+C reaches the whole process group; the parent turns it into cooperative stops
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    channel = QueueChannel(events, name)
+    from utils import bot_events, bot_control, template_cache
+    from utils.trace import add_mark_listener
+
+    bot_events.attach(channel)
+    template_cache.attach_shared(manifest)
+
+    def on_mark(mark_name, args):
+        if mark_name == "decision" and args.get("action") in bot_control.TURN_ACTIONS:
+            channel.send({"event": "turn", "action": args.get("action")})
+
+    def watch_stop():
+        stop.wait()
+        bot_control.request_stop()
+        stop_now.wait()
+        bot_control.request_stop(immediate=True)
+
+    import main as bot_main
+
+    bot_control.reset()
+    add_mark_listener(on_mark)
+    threading.Thread(target=watch_stop, name="stop-watch", daemon=True).start()
+
+    channel.send({"event": "state", "state": "starting"})
+    from utils.resolution import profile_needs_device
+    import_thread, import_result = bot_main.start_mode_import()
+    if not bot_main.check_adb_connection():
+        channel.send({"event": "state", "state": "exited", "reason": "no device"})
+        return
+    if not bot_main.get_device_info():
+        channel.send({"event": "state", "state": "exited", "reason": "device info failed"})
+        return
+    # The resolution profile needs this instance's screen size before the mode modules load
+    if profile_needs_device() and not bot_main.resolve_resolution_profile():
+        channel.send({"event": "state", "state": "exited", "reason": "screen size unknown"})
+        return
+    career_lobby = bot_main.finish_mode_import(import_thread, import_result)
+    channel.send({"event": "state", "state": "running"})
+    bot_main.run_automation(career_lobby)
+    channel.send({"event": "state", "state": "exited",
+                  "reason": "stopped" if bot_control.stop_requested() else "finished"})
+
+
+class InstanceStatus:
+    """What the parent knows about one instance"""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = "spawned"
+        self.reason = ""
+        self.status = {}
+        self.turns = 0
+        self.actions = {}
+        self.last_log = ""
+        self.started = time.time()
+        self.running_since = None
+        self.exitcode = None
+
+    def turns_per_hour(self):
+        if not self.running_since or not self.turns:
+            return 0.0
+        return self.turns / max(time.time() - self.running_since, 1e-6) * 3600
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "state": self.state,
+            "reason": self.reason,
+            "exitcode": self.exitcode,
+            "status": self.status,
+            "turns": self.turns,
+            "turns_per_hour": round(self.turns_per_hour(), 2),
+            "seconds_per_turn": round((time.time() - self.running_since) / self.turns, 1)
+            if self.running_since and self.turns else None,
+            "actions": self.actions,
+            "last_log": self.last_log,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+
+class Orchestrator:
+    def __init__(self, instances, config, status_interval=30.0, status_file=None, log_level="info",
+                 share_templates=True):
+        self.instances = instances
+        self.config = config
+        self.status_interval = status_interval
+        self.status_file = status_file
+        self.min_level = LOG_LEVELS.index(log_level)
+        self.share_templates = share_templates
+        self.context = multiprocessing.get_context("spawn")
+        self.events = self.context.Queue()
+        self.stop = self.context.Event()
+        self.stop_now = self.context.Event()
+        self.processes = {}
+        self.status = {}
+
+    def template_directories(self):
+        """
+        Asset folders the instances match against: each instance's profile set
+        (utils.resolution), so the shared block holds the templates their
+        scaled_template_path lookups resolve to.
+        """
+        from utils.config_loader import apply_overrides
+        from utils.resolution import profile_from_config, template_set_directory
+
+        directories = []
+        for instance in self.instances:
+            config = apply_overrides(self.config, instance_overrides(instance, self.config))
+            profile = profile_from_config(config)
+            if profile is None:
+                print(f"[orchestrator] {instance['name']}: resolution profile waits for the device size; "
+                      f"its scaled templates are loaded by the instance", flush=True)
+                continue
+            directory = template_set_directory(profile, config)
+            if directory not in directories:
+                directories.append(directory)
+        return directories
+
+    def start(self):
+        manifest = None
+        if self.share_templates:
+            from utils import template_cache
+            manifest = template_cache.export_shared(self.template_directories())
+
+        saved_env = os.environ.get(OVERRIDES_ENV)
+        try:
+            for instance in self.instances:
+                name = instance["name"]
+                # Spawned children inherit the environment at start(); config_loader applies it on import
+                os.environ[OVERRIDES_ENV] = json.dumps(instance_overrides(instance, self.config))
+                process = self.context.Process(target=run_instance, name=f"bot-{name}",
+                                               args=(name, manifest, self.events, self.stop, self.stop_now))
+                process.start()
+                self.processes[name] = process
+                self.status[name] = InstanceStatus(name)
+                print(f"[orchestrator] started {name} (pid {process.pid})", flush=True)
+        finally:
+            if saved_env is None:
+                os.environ.pop(OVERRIDES_ENV, None)
+            else:
+                os.environ[OVERRIDES_ENV] = saved_env
+
+    def handle_event(self, name, message):
+        status = self.status[name]
+        event = message.get("event")
+        if event == "log":
+            level = message.get("level", "info")
+            status.last_log = message.get("message", "")
+            if level in LOG_LEVELS and LOG_LEVELS.index(level) >= self.min_level:
+                print(f"[{name}] {level.upper()} - {status.last_log}", flush=True)
+        elif event == "status":
+            status.status.update({k: v for k, v in message.items() if k not in ("event", "time")})
+        elif event == "turn":
+            status.turns += 1
+            action = message.get("action")
+            status.actions[action] = status.actions.get(action, 0) + 1
+        elif event == "state":
+            status.state = message.get("state", status.state)
+            status.reason = message.get("reason", "")
+            if status.state == "running" and status.running_since is None:
+                status.running_since = time.time()
+
+    def print_status(self):
+        print(f"\n{'instance':<14}{'state':<10}{'year':<28}{'energy':>7} {'mood':<8}{'turns':>6}{'turns/h':>9}  last log")
+        for status in self.status.values():
+            info = status.status
+            energy = info.get("energy")
+            print(f"{status.name:<14}{status.state:<10}{str(info.get('year', '-'))[:27]:<28}"
+                  f"{(f'{energy:.0f}%' if energy is not None else '-'):>7} {str(info.get('mood', '-'))[:7]:<8}"
+                  f"{status.turns:>6}{status.turns_per_hour():>9.1f}  {status.last_log[:60]}")
+        print(flush=True)
+
+    def write_status_file(self):
+        if not self.status_file:
+            return
+        data = {"time": time.time(), "instances": [s.as_dict() for s in self.status.values()]}
+        tmp_path = self.status_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.status_file)
+
+    def alive(self):
+        return any(process.is_alive() for process in self.processes.values())
+
+    def request_stop(self):
+        """Escalates on every call: turn boundary, next iteration, terminate"""
+        if not self.stop.is_set():
+            print("[orchestrator] stopping all instances at the next turn boundary (Ctrl+C again to hurry)", flush=True)
+            self.stop.set()
+        elif not self.stop_now.is_set():
+            print("[orchestrator] stopping all instances at the next loop iteration", flush=True)
+            self.stop_now.set()
+        else:
+            print("[orchestrator] terminating workers", flush=True)
+            for process in self.processes.values():
+                if process.is_alive():
+                    process.terminate()
+
+    def poll(self, until):
+        """Handle worker events for up to 0.5 s and note exited workers"""
+        try:
+            name, message = self.events.get(timeout=max(min(until - time.time(), 0.5), 0.01))
+            self.handle_event(name, message)
+        except queue.Empty:
+            pass
+        for name, process in self.processes.items():
+            if process.exitcode is not None and self.status[name].exitcode is None:
+                self.status[name].exitcode = process.exitcode
+                if self.status[name].state != "exited":
+                    self.status[name].state = "exited"
+                    self.status[name].reason = f"exit code {process.exitcode}"
+
+    def run(self):
+        self.start()
+        next_report = time.time() + self.status_interval
+        try:
+            while self.alive() or not self.events.empty():
+                try:
+                    self.poll(next_report)
+                    if time.time() >= next_report:
+                        self.print_status()
+                        self.write_status_file()
+                        next_report = time.time() + self.status_interval
+                except KeyboardInterrupt:
+                    self.request_stop()
+        finally:
+            for process in self.processes.values():
+                process.join(timeout=5)
+            if self.share_templates:
+                from utils import template_cache
+                template_cache.release_shared(unlink=True)
+        self.print_status()
+        self.write_status_file()
+
+
+def load_instances(path, config):
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("instances", []) if isinstance(data, dict) else data
+    return config.get("instances", [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one bot session per emulator instance")
+    parser.add_argument("--instances", help="JSON file with the instance list (default: config.json \"instances\")")
+    parser.add_argument("--only", help="comma-separated instance names to run")
+    parser.add_argument("--status-interval", type=float, default=30.0, help="seconds between status tables")
+    parser.add_argument("--status-file", help="keep the combined status as JSON in this file")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="info", help="lowest worker log level printed")
+    parser.add_argument("--no-shared-templates", action="store_true", help="let every worker load its own templates")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    config = load_main_config()
+    instances = load_instances(args.instances, config)
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(",")}
+        instances = [instance for instance in instances if instance.get("name") in wanted]
+    names = [instance.get("name") for instance in instances]
+    if not instances:
+        print("No instances configured (config.json \"instances\" or --instances FILE)")
+        return 1
+    if None in names or len(set(names)) != len(names):
+        print("Every instance needs a unique \"name\"")
+        return 1
+
+    Orchestrator(instances, config, status_interval=args.status_interval, status_file=args.status_file,
+                 log_level=args.log_level, share_templates=not args.no_shared_templates).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
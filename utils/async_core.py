@@ -0,0 +1,211 @@
+"""
+asyncio execution core for bot flows.
+
+Flows written as coroutines overlap what the blocking lobby loop serializes:
+the next capture is already running while the current frame is analysed,
+several screens can be waited for on the same frame, and input commands queue
+without blocking analysis. Three executors back it:
+
+    capture  1 thread    device screenshots (one at a time, like the device)
+    input    1 thread    adb input commands (kept in order)
+    cpu      N threads   template matching / OCR (cv2 and numpy release the GIL)
+
+Waits are awaitable conditions (wait_for / wait_for_image / wait_first)
+instead of fixed sleeps. Blocking functions that are not ported yet can be
+awaited with step(), so a flow can move over one step at a time.
+
+The coroutines run on one background event loop; blocking code enters it
+with run(coro), e.g. run(do_dating_async()).
+"""
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.log import log_debug
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_capture_executor: Optional[ThreadPoolExecutor] = None
+_input_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+# Blocking steps of flows that are not ported yet
+_step_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _ensure_started() -> asyncio.AbstractEventLoop:
+    global _loop, _capture_executor, _input_executor, _cpu_executor, _step_executor
+    with _lock:
+        if _loop is None:
+            _capture_executor = ThreadPoolExecutor(1, thread_name_prefix="async-capture")
+            _input_executor = ThreadPoolExecutor(1, thread_name_prefix="async-input")
+            _cpu_executor = ThreadPoolExecutor(min(4, os.cpu_count() or 1), thread_name_prefix="async-cpu")
+            _step_executor = ThreadPoolExecutor(2, thread_name_prefix="async-step")
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="async-core", daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def run(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the core's loop from blocking code and return its result"""
+    loop = _ensure_started()
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def _in(executor, fn: Callable, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(executor, lambda: fn(*args, **kwargs))
+
+
+async def step(fn: Callable, *args, **kwargs):
+    """Await a blocking (not yet ported) function without stalling the loop"""
+    _ensure_started()
+    return await _in(_step_executor, fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    """Run a CPU-bound recognizer (matching, OCR, pixel checks) on the cpu executor"""
+    _ensure_started()
+    return await _in(_cpu_executor, fn, *args, **kwargs)
+
+
+# --- capture and input backends --------------------------------------------------
+
+async def capture():
+    """Screenshot through the configured capture backend"""
+    from utils.screenshot import take_screenshot
+    _ensure_started()
+    return await _in(_capture_executor, take_screenshot)
+
+
+async def tap(x: int, y: int):
+    from utils.input import tap as tap_blocking
+    _ensure_started()
+    return await _in(_input_executor, tap_blocking, x, y)
+
+
+async def swipe(start_x: int, start_y: int, end_x: int, end_y: int, duration_ms: int = 20):
+    from utils.input import swipe as swipe_blocking
+    _ensure_started()
+    return await _in(_input_executor, swipe_blocking, start_x, start_y, end_x, end_y, duration_ms)
+
+
+async def sleep(seconds: float):
+    await asyncio.sleep(seconds)
+
+
+# --- recognizers -------------------------------------------------------------------
+
+def _center_of_first(screenshot, template_path: str, confidence: float, region) -> Optional[Tuple[int, int]]:
+    from utils.recognizer import match_template
+    matches = match_template(screenshot, template_path, confidence, region)
+    if not matches:
+        return None
+    x, y, w, h = matches[0]
+    return (x + w // 2, y + h // 2)
+
+
+async def match(screenshot, template_path: str, confidence: float = 0.8, region=None):
+    """match_template on the cpu executor"""
+    from utils.recognizer import match_template
+    return await run_cpu(match_template, screenshot, template_path, confidence, region)
+
+
+async def locate(template_path: str, confidence: float = 0.8, region=None, screenshot=None):
+    """Center of the first match ((x, y) or None); captures a frame unless one is given"""
+    if screenshot is None:
+        screenshot = await capture()
+    return await run_cpu(_center_of_first, screenshot, template_path, confidence, region)
+
+
+def image_check(template_path: str, confidence: float = 0.8, region=None) -> Callable:
+    """Condition for wait_for / wait_first: center of the template on a frame, or None"""
+    return lambda screenshot: _center_of_first(screenshot, template_path, confidence, region)
+
+
+# --- awaitable conditions ----------------------------------------------------------
+
+async def _evaluate(check: Callable, screenshot):
+    result = check(screenshot)
+    if asyncio.iscoroutine(result):
+        return await result
+    return result
+
+
+async def wait_first(checks: Dict[str, Callable], timeout: float = 10.0,
+                     interval: float = 0.2) -> Tuple[Optional[str], Any]:
+    """
+    Wait until one of several conditions holds on a captured frame.
+
+    Every frame is evaluated against all conditions at once (on the cpu
+    executor), and the next frame is already being captured meanwhile.
+
+    Args:
+        checks: name -> check(screenshot); a truthy result ends the wait. Plain
+            functions run on the cpu executor, coroutine functions are awaited.
+        timeout: seconds before giving up
+        interval: minimum seconds between frames
+
+    Returns:
+        (name, result) of the first condition that held (in checks order when
+        several hold on the same frame), or (None, None) on timeout
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    prefetch = {"done": False, "capture": None}
+    frame = asyncio.ensure_future(capture())
+    try:
+        while True:
+            screenshot = await frame
+            frame_time = loop.time()
+            if frame_time < deadline:
+                # Pipeline: the next capture overlaps this frame's analysis
+                frame = asyncio.ensure_future(_capture_after(frame_time + interval, prefetch))
+            else:
+                frame = None
+
+            results = await asyncio.gather(*(
+                run_cpu(check, screenshot) if not asyncio.iscoroutinefunction(check)
+                else _evaluate(check, screenshot)
+                for check in checks.values()
+            ))
+            for name, result in zip(checks, results):
+                if result:
+                    return name, result
+            if frame is None:
+                log_debug(f"wait_first timed out after {timeout}s waiting for {', '.join(checks)}")
+                return None, None
+    finally:
+        # No prefetch starts from here on; one still waiting for its slot is cancelled
+        prefetch["done"] = True
+        if frame is not None and not frame.done():
+            frame.cancel()
+        # One already running on the capture executor cannot be: let it finish and drop
+        # the frame, so the caller's next capture never runs alongside it
+        in_flight = prefetch["capture"]
+        if in_flight is not None and not in_flight.done():
+            await asyncio.gather(in_flight, return_exceptions=True)
+
+
+async def _capture_after(when: float, prefetch: dict):
+    delay = when - asyncio.get_running_loop().time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    if prefetch["done"]:
+        return None
+    prefetch["capture"] = asyncio.ensure_future(capture())
+    # Shielded: cancelling the prefetch must not orphan a capture that has started
+    return await asyncio.shield(prefetch["capture"])
+
+
+async def wait_for(check: Callable, timeout: float = 10.0, interval: float = 0.2):
+    """Wait for one condition; returns its truthy result or None on timeout"""
+    _, result = await wait_first({"condition": check}, timeout, interval)
+    return result
+
+
+async def wait_for_image(template_path: str, timeout: float = 10.0, confidence: float = 0.8,
+                         region=None, interval: float = 0.2) -> Optional[Tuple[int, int]]:
+    """Async wait_for_image: center of the template once it shows, None on timeout"""
+    return await wait_for(image_check(template_path, confidence, region), timeout, interval)
@@ -0,0 +1,124 @@
+"""
+Local message channel between the GUI and a bot worker process.
+
+JSON messages over multiprocessing.connection on 127.0.0.1. The controller
+listens; the child finds the address and a per-session auth key in its
+environment (see ChannelListener.env) and connects back.
+"""
+import os
+import json
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client
+from typing import Callable, Optional
+
+ENV_ADDRESS = "UMA_BOT_CHANNEL"
+ENV_AUTHKEY = "UMA_BOT_CHANNEL_KEY"
+
+
+class Channel:
+    """One end of the connection; send() is safe from several threads"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    def send(self, message: dict) -> bool:
+        """Send one message; False once the other side is gone"""
+        if self.closed:
+            return False
+        data = json.dumps(message, ensure_ascii=False, default=str).encode("utf-8")
+        with self._send_lock:
+            try:
+                self._connection.send_bytes(data)
+                return True
+            except (OSError, EOFError, ValueError):
+                self.closed = True
+                return False
+
+    def recv(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Next message, or None when timeout passes without one.
+
+        Raises:
+            EOFError: the other side closed the channel
+        """
+        try:
+            if timeout is not None and not self._connection.poll(timeout):
+                return None
+            data = self._connection.recv_bytes()
+        except (OSError, ValueError):
+            self.closed = True
+            raise EOFError("channel closed")
+        except EOFError:
+            self.closed = True
+            raise
+        return json.loads(data.decode("utf-8"))
+
+    def close(self):
+        self.closed = True
+        try:
+            self._connection.close()
+        except OSError:
+            pass
+
+
+class ChannelListener:
+    """Controller side: listens on a free local port for one child"""
+
+    def __init__(self):
+        self._authkey = secrets.token_bytes(16)
+        self._listener = Listener(("127.0.0.1", 0), authkey=self._authkey)
+
+    def env(self) -> dict:
+        """Environment variables that let a child process connect"""
+        host, port = self._listener.address
+        return {ENV_ADDRESS: f"{host}:{port}", ENV_AUTHKEY: self._authkey.hex()}
+
+    def accept(self, timeout: float = 60.0, alive: Optional[Callable[[], bool]] = None) -> Optional[Channel]:
+        """
+        Wait for the child to connect.
+
+        Args:
+            timeout: seconds to wait
+            alive: returns False once the child has died (stops waiting early)
+
+        Returns:
+            Channel or None when the child never connected
+        """
+        result = {}
+
+        def accept():
+            try:
+                result["connection"] = self._listener.accept()
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=accept, name="bot-channel-accept", daemon=True)
+        thread.start()
+        waited = 0.0
+        while thread.is_alive() and waited < timeout and (alive is None or alive()):
+            thread.join(0.2)
+            waited += 0.2
+        # Closing the listener unblocks a pending accept()
+        self.close()
+        thread.join(1.0)
+        connection = result.get("connection")
+        return Channel(connection) if connection is not None else None
+
+    def close(self):
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+
+
+def connect_from_env() -> Optional[Channel]:
+    """Child side: connect to the controller named in the environment, if any"""
+    address = os.environ.get(ENV_ADDRESS)
+    authkey = os.environ.get(ENV_AUTHKEY)
+    if not address or not authkey:
+        return None
+    host, _, port = address.rpartition(":")
+    return Channel(Client((host, int(port)), authkey=bytes.fromhex(authkey)))
@@ -0,0 +1,119 @@
+import threading
+from typing import Callable, List
+
+from utils.log import log_info
+from utils.trace import add_mark_listener
+
+# Cooperative stop/pause for the lobby loop, driven by a controller (the GUI worker).
+# career_lobby calls checkpoint() at the top of every iteration, where no action is
+# half-done: a stop is honored at the next turn boundary, a pause at the next iteration.
+
+# Lobby decisions that consume an in-game turn
+TURN_ACTIONS = {
+    "train", "rest", "recreation", "dating_for_mood", "infirmary",
+    "race_for_criteria", "race_day", "custom_race", "ura_finale", "no_suitable_training",
+}
+
+_stop = threading.Event()
+_resume = threading.Event()
+_resume.set()
+_stop_immediate = False
+# True until the run makes a decision that does not end a turn (event, OK button, ...)
+_at_turn_boundary = True
+_listening = False
+# Callbacks receiving the loop state: "running", "paused" or "stopping"
+_state_listeners: List[Callable[[str], None]] = []
+
+
+def _on_mark(name, args):
+    global _at_turn_boundary
+    if name == "decision":
+        _at_turn_boundary = args.get("action") in TURN_ACTIONS
+
+
+def _notify(state: str):
+    for callback in list(_state_listeners):
+        try:
+            callback(state)
+        except Exception:
+            pass
+
+
+def add_state_listener(callback: Callable[[str], None]):
+    """Register callback(state) for loop state changes seen at checkpoints"""
+    _state_listeners.append(callback)
+
+
+def reset():
+    """Clear stop and pause requests before a new run"""
+    global _stop_immediate, _at_turn_boundary, _listening
+    if not _listening:
+        add_mark_listener(_on_mark)
+        _listening = True
+    _stop.clear()
+    _resume.set()
+    _stop_immediate = False
+    _at_turn_boundary = True
+
+
+def request_stop(immediate: bool = False):
+    """
+    Ask the lobby loop to return.
+
+    Args:
+        immediate: stop at the next iteration instead of waiting for the turn to end
+    """
+    global _stop_immediate
+    _stop_immediate = _stop_immediate or immediate
+    _stop.set()
+    # A paused loop wakes up to stop
+    _resume.set()
+
+
+def cancel_stop():
+    """Withdraw a stop that has not taken effect yet"""
+    global _stop_immediate
+    _stop.clear()
+    _stop_immediate = False
+
+
+def stop_requested() -> bool:
+    return _stop.is_set()
+
+
+def pause():
+    _resume.clear()
+
+
+def resume():
+    _resume.set()
+
+
+def is_paused() -> bool:
+    return not _resume.is_set()
+
+
+def checkpoint() -> bool:
+    """
+    Called by the lobby loop before each iteration.
+
+    Blocks while paused.
+
+    Returns:
+        bool: True when the loop should return now
+    """
+    if not _resume.is_set() and not _stop.is_set():
+        log_info("Paused - waiting for resume")
+        _notify("paused")
+        _resume.wait()
+        if not _stop.is_set():
+            log_info("Resumed")
+            _notify("running")
+        else:
+            # Stopping a paused run should not wait for the turn to end
+            return True
+    if _stop.is_set() and (_stop_immediate or _at_turn_boundary):
+        log_info("Stop requested - leaving the lobby loop at the turn boundary")
+        _notify("stopping")
+        return True
+    return False
@@ -0,0 +1,85 @@
+import sys
+import time
+import logging
+from typing import Optional
+
+from utils.log import logger
+from utils.bot_channel import Channel, connect_from_env
+
+# Structured events from the bot to the GUI over utils.bot_channel:
+#   {"event": "log", "level": "info|warning|error|debug|success", "message": str, "time": float}
+#   {"event": "status", "year": str, "mood": str, "turn": str|None, "goal": str, "criteria": str,
+#    "goal_met": bool, "energy": float, "stats": {"spd": int, ...}}
+# Without a channel (plain main.py in a terminal) every call here is a no-op.
+
+_channel: Optional[Channel] = None
+_handler: Optional[logging.Handler] = None
+_console_handlers = []
+
+
+class _ChannelLogHandler(logging.Handler):
+    """Sends log records as events; falls back to the console handlers if the channel is gone"""
+
+    def emit(self, record):
+        message = record.getMessage()
+        level = getattr(record, "event_level", None) or record.levelname.lower()
+        if level == "success" and message.startswith("SUCCESS: "):
+            message = message[len("SUCCESS: "):]
+        if _channel is not None and _channel.send({"event": "log", "level": level, "message": message,
+                                                   "time": record.created}):
+            return
+        for handler in _console_handlers:
+            handler.handle(record)
+
+
+def attach(channel: Channel):
+    """
+    Route bot logs and status to channel instead of stdout.
+
+    stdout keeps anything printed outside utils.log (tracebacks, library output).
+    """
+    global _channel, _handler
+    _channel = channel
+    if _handler is None:
+        _handler = _ChannelLogHandler()
+        _console_handlers[:] = [h for h in logger.handlers if isinstance(h, logging.StreamHandler)]
+        for handler in _console_handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(_handler)
+
+
+def attach_from_env() -> bool:
+    """Attach to the controller named in the environment (GUI-launched main.py); False when there is none"""
+    try:
+        channel = connect_from_env()
+    except Exception as e:
+        print(f"Could not connect to the GUI event channel: {e}", file=sys.stderr)
+        return False
+    if channel is None:
+        return False
+    attach(channel)
+    return True
+
+
+def is_attached() -> bool:
+    return _channel is not None and not _channel.closed
+
+
+def emit(event: str, **fields):
+    if _channel is not None:
+        _channel.send(dict(fields, event=event, time=time.time()))
+
+
+def emit_status(year=None, mood=None, turn=None, goal=None, criteria=None, goal_met=None,
+                energy=None, stats=None):
+    """Publish the lobby's game state for the status panel (fields left as None are omitted)"""
+    if _channel is None:
+        return
+    fields = {
+        "year": year, "mood": mood, "turn": None if turn is None else str(turn),
+        "goal": None if goal is None else str(goal), "criteria": criteria,
+        "goal_met": None if goal_met is None else bool(goal_met),
+        "energy": None if energy is None else round(float(energy), 1),
+        "stats": {k: int(v) for k, v in stats.items() if isinstance(v, (int, float))} if stats else None,
+    }
+    emit("status", **{k: v for k, v in fields.items() if v is not None})
@@ -1,7 +1,20 @@
+import copy
 import json
 import os
 from typing import Any, Dict, Optional
 
+# Parsed config per absolute path, reused while the file's mtime and size are unchanged
+_cache: Dict[str, tuple] = {}
+
+# Per-process overrides deep-merged over config.json, e.g. the device sections of one
+# instance under the multi-instance runner (set by the parent through the environment)
+OVERRIDES_ENV = "UMA_BOT_CONFIG_OVERRIDES"
+_overrides: Dict[str, Any] = {}
+try:
+    _overrides = json.loads(os.environ.get(OVERRIDES_ENV) or "{}")
+except ValueError:
+    _overrides = {}
+
 
 def _read_raw_config(path: str = "config.json") -> Dict[str, Any]:
     """Load raw JSON data from config file."""
@@ -12,6 +25,59 @@ def _read_raw_config(path: str = "config.json") -> Dict[str, Any]:
         return {}
 
 
+def _merge(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """base with overrides applied; nested dicts are merged, other values replaced"""
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def apply_overrides(config: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """config as a process started with these overrides would load it"""
+    return _merge(config, overrides)
+
+
+def set_overrides(overrides: Optional[Dict[str, Any]]):
+    """Apply overrides to every config loaded by this process from now on"""
+    global _overrides
+    _overrides = copy.deepcopy(overrides or {})
+    _cache.clear()
+
+
+def get_overrides() -> Dict[str, Any]:
+    return copy.deepcopy(_overrides)
+
+
+def _cached_config(path: str) -> Dict[str, Any]:
+    """Shared parsed config (callers must not modify it); re-read when the file changes"""
+    full_path = os.path.abspath(path)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        _cache.pop(full_path, None)
+        return {}
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(full_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    data = _read_raw_config(full_path)
+    if isinstance(data, dict):
+        nested = data.get("config")
+        if isinstance(nested, dict):
+            data = nested
+    else:
+        data = {}
+    if _overrides:
+        data = _merge(data, _overrides)
+    _cache[full_path] = (key, data)
+    return data
+
+
 def load_main_config(path: str = "config.json") -> Dict[str, Any]:
     """
     Load configuration while supporting a nested parent container.
@@ -19,13 +85,11 @@ def load_main_config(path: str = "config.json") -> Dict[str, Any]:
     Some tools write the config inside a parent key (e.g. {"config": {...}}).
     This helper always returns the inner config dict if present, otherwise the
     raw dictionary. Returns empty dict on failure.
+
+    The file is parsed once and re-read only when it changes; every caller
+    gets its own copy.
     """
-    data = _read_raw_config(path)
-    if isinstance(data, dict):
-        nested = data.get("config")
-        if isinstance(nested, dict):
-            return nested
-    return data if isinstance(data, dict) else {}
+    return copy.deepcopy(_cached_config(path))
 
 
 def load_config_section(section: str, default: Optional[Any] = None, path: str = "config.json") -> Any:
@@ -37,6 +101,15 @@ def load_config_section(section: str, default: Optional[Any] = None, path: str =
         default: value to return when section is missing.
         path: optional path override.
     """
-    cfg = load_main_config(path)
-    return cfg.get(section, default)
+    value = _cached_config(path).get(section, default)
+    return copy.deepcopy(value)
 
+
+
+def config_signature(path: str = "config.json") -> Optional[tuple]:
+    """(mtime_ns, size) of the config file, or None when it is missing; changes whenever the file is rewritten"""
+    try:
+        stat = os.stat(os.path.abspath(path))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
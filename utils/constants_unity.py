@@ -53,3 +53,6 @@ FAILURE_REGION_PWR = (495, 1386, 588, 1425)
 FAILURE_REGION_GUTS = (687, 1386, 777, 1425)
 FAILURE_REGION_WIT = (879, 1386, 966, 1425)
 
+# Regions above are for 1080x1920; rescale them for the device's resolution profile
+from utils.resolution import scale_regions
+scale_regions(globals())
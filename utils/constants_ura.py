@@ -53,3 +53,6 @@ FAILURE_REGION_PWR = (501, 1404, 579, 1442)
 FAILURE_REGION_GUTS = (691, 1404, 769, 1442)
 FAILURE_REGION_WIT = (881, 1404, 962, 1442)
 
+# Regions above are for 1080x1920; rescale them for the device's resolution profile
+from utils.resolution import scale_regions
+scale_regions(globals())
@@ -5,6 +5,7 @@ import sys
 from pathlib import Path
 from utils.log import log_debug, log_info, log_warning, log_error
 from utils.config_loader import load_config_section
+from utils.profiler import timed
 
 def _find_bundled_adb():
     """
@@ -87,6 +88,38 @@ def _get_adb_path():
     log_info("Bundled ADB not found, using system ADB (must be in PATH)")
     return 'adb'
 
+# Optional stand-in for the device (e.g. replay input sink): callable(command, binary) -> output
+_adb_interceptor = None
+
+
+def set_adb_interceptor(handler):
+    """Route every run_adb command to handler(command, binary) instead of adb (None restores adb)"""
+    global _adb_interceptor
+    _adb_interceptor = handler
+
+
+def _active_recorder():
+    """
+    The running session recorder, if any.
+
+    Looked up through sys.modules so importing utils.device does not pull in
+    the recorder (and numpy/PIL); a recorder can only be running once its
+    module has been imported.
+    """
+    module = sys.modules.get('utils.session_recorder')
+    return module.get_recorder() if module is not None else None
+
+
+def _input_arg(arg):
+    """Numeric input arguments as numbers for the session recorder"""
+    try:
+        value = float(arg)
+        return int(value) if value.is_integer() else value
+    except (TypeError, ValueError):
+        return str(arg)
+
+
+@timed("run_adb", trace_args=("command",))
 def run_adb(command, binary=False, add_input_delay=False):
     """
     Execute an ADB command using settings from config.json (adb_config).
@@ -109,6 +142,13 @@ def run_adb(command, binary=False, add_input_delay=False):
         - Use add_input_delay=False for specific calls that need speed
         - Reduce input_delay to 0.05-0.1s for a balance between speed and reliability
     """
+    recorder = _active_recorder()
+    if recorder is not None and list(command[:2]) == ['shell', 'input'] and len(command) >= 3:
+        recorder.add_input(str(command[2]), [_input_arg(arg) for arg in command[3:]])
+
+    if _adb_interceptor is not None:
+        return _adb_interceptor(command, binary)
+
     try:
         adb_cfg = _load_adb_config()
         adb_path = _get_adb_path()
@@ -0,0 +1,209 @@
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.log import log_debug
+
+# The energy bar is a pill: a dark stroke around an interior that is colourful
+# (blue -> green -> yellow gradient) up to the energy level and flat gray
+# (~117,117,117) after it. Finding the pill needs a contour pass over the whole
+# crop, but the pill only moves when the resolution changes (or an event
+# resizes the bar), so its geometry is located once and cached. Each read then
+# only looks at a few rows around the midline: every column is classified
+# filled (saturated) or empty (unsaturated mid gray) and the fill level is the
+# split that agrees with the most columns. The agreement doubles as the
+# confidence: anything drawn over the bar, or a pill that moved, leaves
+# columns that are neither and pulls it down, which triggers a re-locate.
+
+# Stroke colour (~80,80,80) range used to find the pill outline
+STROKE_LOWER = (60, 60, 60)
+STROKE_UPPER = (110, 110, 110)
+# Columns this far inside the stroke are measured
+EDGE_INSET = 5
+# Midline rows sampled above and below the centre row
+PROFILE_ROWS = (-4, 0, 4)
+# Column classification: chroma is max(R,G,B) - min(R,G,B)
+FILLED_MIN_CHROMA = 40
+EMPTY_MAX_CHROMA = 12
+EMPTY_VALUE_RANGE = (95, 145)
+# Below this agreement the cached geometry is suspect and the pill is located again
+RELOCATE_BELOW = 0.9
+
+
+class PillGeometry(NamedTuple):
+    """Measured span of the pill in crop coordinates"""
+    mid_y: int
+    left: int
+    right: int
+
+
+class EnergyReading(NamedTuple):
+    percentage: float
+    confidence: float
+
+
+def locate_pill(crop_rgb: np.ndarray) -> Optional[PillGeometry]:
+    """
+    Find the energy pill in the crop of the energy region.
+
+    Args:
+        crop_rgb: RGB array of the energy region
+
+    Returns:
+        PillGeometry, or None when no pill outline is found
+    """
+    stroke = cv2.inRange(crop_rgb, np.array(STROKE_LOWER, np.uint8), np.array(STROKE_UPPER, np.uint8))
+    kernel = np.ones((3, 3), np.uint8)
+    stroke = cv2.morphologyEx(stroke, cv2.MORPH_CLOSE, kernel, iterations=2)
+    contours, _ = cv2.findContours(stroke, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    h, w = crop_rgb.shape[:2]
+    outline = max(contours, key=cv2.contourArea)
+    _, _, box_w, box_h = cv2.boundingRect(outline)
+    if cv2.contourArea(outline) < 0.5 * box_w * box_h:
+        # The stroke is not closed (thin and broken after area-averaged
+        # reduced capture): the pill is convex, so its outline is the hull
+        outline = cv2.convexHull(np.concatenate(contours))
+    filled = np.zeros((h, w), dtype=np.uint8)
+    cv2.fillPoly(filled, [outline], 255)
+    interior = cv2.erode(filled, kernel, iterations=3)
+    ys = np.where(interior.any(axis=1))[0]
+    if ys.size == 0:
+        return None
+    mid_y = int((ys[0] + ys[-1]) / 2)
+    cols = np.where(interior[mid_y] > 0)[0]
+    if cols.size == 0:
+        return None
+
+    left = min(max(int(cols[0]) + EDGE_INSET, 0), w - 1)
+    right = max(min(int(cols[-1]) - EDGE_INSET, w - 1), left)
+    # The sampled rows must stay inside the crop
+    mid_y = min(max(mid_y, -min(PROFILE_ROWS)), h - 1 - max(PROFILE_ROWS))
+    return PillGeometry(mid_y, left, right)
+
+
+def _classify_columns(rows_rgb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(filled, empty) column masks from the midline rows"""
+    rows = rows_rgb.astype(np.int16)
+    value = np.median(rows.max(axis=2), axis=0)
+    chroma = np.median(rows.max(axis=2) - rows.min(axis=2), axis=0)
+    filled = chroma >= FILLED_MIN_CHROMA
+    empty = (chroma <= EMPTY_MAX_CHROMA) & (value >= EMPTY_VALUE_RANGE[0]) & (value <= EMPTY_VALUE_RANGE[1])
+    return filled, empty
+
+
+def fill_agreement(rows_rgb: np.ndarray, percentage: float) -> float:
+    """
+    Fraction of the midline columns consistent with a fill level: the
+    confidence measure_fill reports for its own split, for any percentage.
+    """
+    filled, empty = _classify_columns(rows_rgb)
+    n = filled.size
+    if n == 0:
+        return 0.0
+    split = min(max(int(round(percentage / 100.0 * n)), 0), n)
+    return float(np.count_nonzero(filled[:split]) + np.count_nonzero(empty[split:])) / n
+
+
+def measure_fill(rows_rgb: np.ndarray) -> EnergyReading:
+    """
+    Fill level from the midline rows of the pill interior.
+
+    Args:
+        rows_rgb: RGB array (rows x columns x 3) spanning the pill interior
+
+    Returns:
+        EnergyReading: percentage of filled columns before the best
+        filled/empty split, and the fraction of columns agreeing with it
+    """
+    filled, empty = _classify_columns(rows_rgb)
+    n = filled.size
+    if n == 0:
+        return EnergyReading(0.0, 0.0)
+    # agreement[b]: filled columns before b plus empty columns from b on
+    filled_before = np.concatenate(([0], np.cumsum(filled)))
+    empty_from = np.concatenate((np.cumsum(empty[::-1])[::-1], [0]))
+    agreement = filled_before + empty_from
+    split = int(np.argmax(agreement))
+    return EnergyReading(split / n * 100.0, float(agreement[split]) / n)
+
+
+class EnergyBarReader:
+    def __init__(self, region: Tuple[int, int, int, int]):
+        """
+        Args:
+            region: (x, y, width, height) screen region containing the energy pill
+        """
+        self.region = region
+        self._geometry: Dict[Tuple[int, int], PillGeometry] = {}
+        self._lock = threading.Lock()
+
+    def _crop_box(self, offset_y: int = 0, height: Optional[int] = None):
+        x, y, width, region_height = self.region
+        return (x, y + offset_y, x + width, y + offset_y + (region_height if height is None else height))
+
+    def locate(self, screenshot) -> Optional[PillGeometry]:
+        """Locate the pill on screenshot and cache its geometry for that screen size"""
+        crop = np.asarray(screenshot.crop(self._crop_box()).convert("RGB"))
+        geometry = locate_pill(crop)
+        with self._lock:
+            if geometry is None:
+                self._geometry.pop(screenshot.size, None)
+            else:
+                self._geometry[screenshot.size] = geometry
+        log_debug(f"Energy pill located: {geometry}")
+        return geometry
+
+    def _rows(self, screenshot, geometry: PillGeometry) -> np.ndarray:
+        top = geometry.mid_y + min(PROFILE_ROWS)
+        band = np.asarray(screenshot.crop(self._crop_box(top, max(PROFILE_ROWS) - min(PROFILE_ROWS) + 1)))
+        return band[[dy - min(PROFILE_ROWS) for dy in PROFILE_ROWS], geometry.left:geometry.right + 1, :3]
+
+    def _measure(self, screenshot, geometry: PillGeometry) -> EnergyReading:
+        return measure_fill(self._rows(screenshot, geometry))
+
+    def agreement(self, screenshot, percentage: float) -> float:
+        """
+        Confidence (0-1) of a percentage measured some other way (e.g. a full
+        scan): the share of midline columns consistent with it, 0.0 when no
+        pill is found.
+        """
+        with self._lock:
+            geometry = self._geometry.get(screenshot.size)
+        if geometry is None:
+            geometry = self.locate(screenshot)
+            if geometry is None:
+                return 0.0
+        return fill_agreement(self._rows(screenshot, geometry), percentage)
+
+    def read(self, screenshot) -> EnergyReading:
+        """
+        Energy percentage and confidence (0-1) from a lobby screenshot.
+
+        The pill is located on first use for the screen size and again when
+        the confidence on the cached geometry drops below RELOCATE_BELOW.
+        """
+        with self._lock:
+            geometry = self._geometry.get(screenshot.size)
+        reading = None
+        if geometry is not None:
+            reading = self._measure(screenshot, geometry)
+            if reading.confidence >= RELOCATE_BELOW:
+                return reading
+        located = self.locate(screenshot)
+        if located is None:
+            return reading or EnergyReading(0.0, 0.0)
+        if located == geometry:
+            return reading
+        relocated = self._measure(screenshot, located)
+        if reading is not None and reading.confidence > relocated.confidence:
+            return reading
+        return relocated
+
+    def reset(self):
+        with self._lock:
+            self._geometry.clear()
@@ -0,0 +1,329 @@
+"""
+Local stand-in for the adb server, for transport and input tests without a device.
+
+Speaks enough of the adb host ("smart socket") protocol for the stock adb
+client and the bot's adb paths (utils.device.run_adb, AdbCapture,
+main.check_adb_connection) to run unchanged:
+
+    host:version, host:kill, host:devices[-l], host:connect:<addr>,
+    host:disconnect[:<addr>], host[-serial:<serial>]:features / get-state,
+    host:transport[-any|-usb|-local][:<serial>], host:tport:<...>,
+    shell:<command> and exec:<command> on the selected transport
+
+Shell commands emulated: screencap [-p], input tap/swipe/keyevent/text,
+wm size, getprop [name], echo. Frames come from a ReplaySession directory
+(plain screenshots, session.json or a recorded session) and inputs are
+recorded by a ReplayInputSink, which can advance the frames.
+
+Run it on another port and point the adb client at it:
+
+    python -m utils.fake_adb_server FRAMES_DIR --port 5038
+    ANDROID_ADB_SERVER_PORT=5038 python main.py
+"""
+import io
+import os
+import sys
+import shlex
+import struct
+import argparse
+import threading
+import socketserver
+from typing import Dict, Optional
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import log_debug, log_info, log_warning
+from utils.config_loader import load_config_section
+from utils.replay import ReplaySession, ReplayInputSink
+
+# Version reported to clients; adb clients restart servers that report another one
+ADB_SERVER_VERSION = 41
+
+DEFAULT_PROPS = {
+    "ro.product.model": "FakeAdbDevice",
+    "ro.product.manufacturer": "uma-auto-train",
+    "ro.product.cpu.abi": "x86_64",
+    "ro.build.version.release": "9",
+    "ro.build.version.sdk": "28",
+    "ro.serialno": "",
+}
+
+# RGBA_8888 in the screencap raw header
+_SCREENCAP_FORMAT_RGBA = 1
+
+
+def _read_exact(sock, size: int) -> Optional[bytes]:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _read_request(sock) -> Optional[str]:
+    """One request: 4 hex digits of length, then the payload"""
+    header = _read_exact(sock, 4)
+    if header is None:
+        return None
+    payload = _read_exact(sock, int(header.decode("ascii"), 16))
+    return payload.decode("utf-8", errors="replace") if payload is not None else None
+
+
+def _okay(sock, payload: Optional[str] = None):
+    """OKAY, optionally followed by a length-prefixed string"""
+    message = b"OKAY"
+    if payload is not None:
+        data = payload.encode("utf-8")
+        message += f"{len(data):04x}".encode("ascii") + data
+    sock.sendall(message)
+
+
+def _fail(sock, reason: str):
+    data = reason.encode("utf-8")
+    sock.sendall(b"FAIL" + f"{len(data):04x}".encode("ascii") + data)
+
+
+class FakeAdbServer:
+    """
+    Threaded fake adb server bound to host:port.
+
+    Args:
+        frames_dir: ReplaySession directory served by screencap
+        serial: serial of the single fake device
+        advance: ReplaySession advance mode (default: the session's own, on_input for plain directories)
+        input_latency: seconds between an input and the next frame showing
+        props: getprop values (merged over DEFAULT_PROPS)
+    """
+
+    def __init__(self, frames_dir: str, serial: str = "emulator-5554", host: str = "127.0.0.1",
+                 port: int = 5037, advance: Optional[str] = None, input_latency: float = 0.0,
+                 props: Optional[Dict[str, str]] = None):
+        self.serial = serial
+        self.host = host
+        self.port = port
+        self.session = ReplaySession(frames_dir, advance=advance, on_end="hold", input_latency=input_latency)
+        self.sink = ReplayInputSink(self.session)
+        self.props = dict(DEFAULT_PROPS)
+        self.props["ro.serialno"] = serial
+        self.props.update(props or {})
+        # Addresses "connected" with adb connect also name the fake device
+        self.connected = set()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self) -> "FakeAdbServer":
+        fake = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                fake.serve_connection(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        # Port 0 picks a free port
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-adb-server", daemon=True)
+        self._thread.start()
+        log_info(f"Fake adb server listening on {self.host}:{self.port} (device {self.serial})")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # --- protocol -----------------------------------------------------------
+
+    def _known_serial(self, serial: Optional[str]) -> bool:
+        return serial is None or serial == self.serial or serial in self.connected
+
+    def _device_serials(self):
+        return [self.serial] + sorted(self.connected - {self.serial})
+
+    def serve_connection(self, sock):
+        """One host request per connection; a transport request is followed by one device service"""
+        try:
+            request = _read_request(sock)
+            if request is None:
+                return
+            with self._lock:
+                self.requests += 1
+            log_debug(f"fake adb: {request}")
+            if self._handle_host(sock, request):
+                request = _read_request(sock)
+                if request is not None:
+                    self._handle_device(sock, request)
+        except (ConnectionError, OSError) as e:
+            log_debug(f"fake adb: connection closed ({e})")
+        finally:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _handle_host(self, sock, request: str) -> bool:
+        """
+        Answer a host request.
+
+        Returns:
+            bool: True when a transport was selected and a device service follows
+        """
+        serial = None
+        if request.startswith("host-serial:"):
+            serial, _, request = request[len("host-serial:"):].rpartition(":")
+            request = "host:" + request
+        elif request.startswith(("host-local:", "host-usb:", "host-transport-id:")):
+            request = "host:" + request.rsplit(":", 1)[-1]
+        elif request.startswith(("shell:", "exec:")):
+            # Device service without a transport request: adb uses the only device
+            self._handle_device(sock, request)
+            return False
+
+        if not self._known_serial(serial):
+            _fail(sock, f"device '{serial}' not found")
+            return False
+
+        if request == "host:version":
+            _okay(sock, f"{ADB_SERVER_VERSION:04x}")
+        elif request == "host:kill":
+            log_warning("fake adb: client asked the server to exit (adb version mismatch?); ignoring")
+            _okay(sock)
+        elif request in ("host:devices", "host:devices-l"):
+            suffix = " product:fake model:FakeAdbDevice device:fake" if request.endswith("-l") else ""
+            _okay(sock, "".join(f"{s}\tdevice{suffix}\n" for s in self._device_serials()))
+        elif request.startswith("host:connect:"):
+            address = request[len("host:connect:"):]
+            if address in self.connected or address == self.serial:
+                _okay(sock, f"already connected to {address}")
+            else:
+                self.connected.add(address)
+                _okay(sock, f"connected to {address}")
+        elif request.startswith("host:disconnect"):
+            address = request[len("host:disconnect"):].lstrip(":")
+            if address:
+                self.connected.discard(address)
+            else:
+                self.connected.clear()
+            _okay(sock, f"disconnected {address or 'everything'}")
+        elif request in ("host:features", "host:host-features"):
+            # No shell_v2: clients fall back to the raw shell: service
+            _okay(sock, "")
+        elif request == "host:get-state":
+            _okay(sock, "device")
+        elif request in ("host:get-serialno", "host:get-devpath"):
+            _okay(sock, serial or self.serial)
+        elif request.startswith("host:transport") or request.startswith("host:tport:"):
+            return self._select_transport(sock, request)
+        else:
+            _fail(sock, f"unsupported request: {request}")
+        return False
+
+    def _select_transport(self, sock, request: str) -> bool:
+        if request.startswith("host:tport:"):
+            kind = request[len("host:tport:"):]
+            serial = kind[len("serial:"):] if kind.startswith("serial:") else None
+        elif request.startswith("host:transport:"):
+            serial = request[len("host:transport:"):]
+        else:
+            serial = None  # transport-any / -usb / -local
+        if not self._known_serial(serial):
+            _fail(sock, f"device '{serial}' not found")
+            return False
+        sock.sendall(b"OKAY")
+        if request.startswith("host:tport:"):
+            # tport replies with the 64-bit transport id
+            sock.sendall(struct.pack("<Q", 1))
+        return True
+
+    def _handle_device(self, sock, request: str):
+        if request.startswith("shell:"):
+            command = request[len("shell:"):]
+        elif request.startswith("exec:"):
+            command = request[len("exec:"):]
+        else:
+            # shell,v2 is not advertised in features, so clients should not ask for it
+            _fail(sock, f"unsupported service: {request.split(':', 1)[0]}")
+            return
+        output = self.run_shell(command)
+        sock.sendall(b"OKAY")
+        if output:
+            sock.sendall(output)
+
+    # --- device -------------------------------------------------------------
+
+    def run_shell(self, command: str) -> bytes:
+        """Emulate a device shell command; returns its stdout"""
+        try:
+            parts = shlex.split(command)
+        except ValueError:
+            parts = command.split()
+        if not parts:
+            return b""
+        name = parts[0]
+
+        if name == "screencap":
+            return self._screencap(png="-p" in parts[1:])
+        if name == "input":
+            with self._lock:
+                self.sink.handle_adb(["shell"] + parts)
+            return b""
+        if name == "wm" and parts[1:2] == ["size"]:
+            width, height = self.session.load_frame(self.session.current_id).size
+            return f"Physical size: {width}x{height}\n".encode()
+        if name == "getprop":
+            if len(parts) > 1:
+                return (self.props.get(parts[1], "") + "\n").encode()
+            return "".join(f"[{k}]: [{v}]\n" for k, v in sorted(self.props.items())).encode()
+        if name == "echo":
+            return (" ".join(parts[1:]) + "\n").encode()
+        log_debug(f"fake adb: ignoring shell command '{command}'")
+        return b""
+
+    def _screencap(self, png: bool = False) -> bytes:
+        with self._lock:
+            image = self.session.capture()
+        if png:
+            buffer = io.BytesIO()
+            image.save(buffer, "PNG")
+            return buffer.getvalue()
+        rgba = image.convert("RGBA")
+        width, height = rgba.size
+        # width, height, pixel format, color space (Android 9+ header)
+        header = struct.pack("<IIII", width, height, _SCREENCAP_FORMAT_RGBA, 0)
+        return header + rgba.tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake adb server serving frames from a directory")
+    parser.add_argument("frames", help="frames directory (screenshots, session.json or recorded session)")
+    parser.add_argument("--port", type=int, default=5037)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--serial", help="device serial (default: adb_config.device_address or emulator-5554)")
+    parser.add_argument("--advance", choices=("on_input", "on_capture"), default=None)
+    parser.add_argument("--input-latency-ms", type=float, default=0)
+    parser.add_argument("--input-log", help="write the recorded inputs (JSON lines) here on exit")
+    args = parser.parse_args()
+
+    serial = args.serial or load_config_section("adb_config", {}).get("device_address") or "emulator-5554"
+    server = FakeAdbServer(args.frames, serial=serial, host=args.host, port=args.port,
+                           advance=args.advance, input_latency=args.input_latency_ms / 1000.0).start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if args.input_log:
+            server.sink.save_log(args.input_log)
+            log_info(f"Recorded {len(server.sink.log)} inputs to {args.input_log}")
+
+
+if __name__ == "__main__":
+    main()
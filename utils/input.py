@@ -2,8 +2,10 @@ import subprocess
 import time
 from utils.device import run_adb
 from utils.recognizer import locate_on_screen
+from utils.screenshot_unified import get_unified_screenshot
 from utils.config_loader import load_config_section
 from utils.log import log_info, log_warning, log_error, log_debug, log_success
+from utils.profiler import timed
 
 
 def load_config():
@@ -14,16 +16,31 @@ def load_config():
         log_error(f"Error loading config: {e}")
         return {}
 
+def _device_point(x, y):
+    """Screenshot coordinates to device coordinates (reduced capture decimates the frames)"""
+    factor = get_unified_screenshot().reduce_factor
+    if factor == 1:
+        return x, y
+    return int(x) * factor, int(y) * factor
+
+@timed("tap", trace_args=("x", "y"))
 def tap(x, y):
     """Tap at coordinates (x, y) - optimized: no input delay"""
+    x, y = _device_point(x, y)
     return run_adb(['shell', 'input', 'tap', str(x), str(y)], add_input_delay=False)
 
+@timed("swipe", trace_args=("start_x", "start_y", "end_x", "end_y", "duration_ms"))
 def swipe(start_x, start_y, end_x, end_y, duration_ms=20):
     """Swipe from (start_x, start_y) to (end_x, end_y) with duration in milliseconds - optimized: no input delay, faster default duration"""
+    start_x, start_y = _device_point(start_x, start_y)
+    end_x, end_y = _device_point(end_x, end_y)
     return run_adb(['shell', 'input', 'swipe', str(start_x), str(start_y), str(end_x), str(end_y), str(duration_ms)], add_input_delay=False)
 
+@timed("swipe", trace_args=("start_x", "start_y", "end_x", "end_y", "duration_ms"))
 def perform_swipe(start_x, start_y, end_x, end_y, duration_ms=1050):
     """Perform smooth swipe gesture with optional longer duration."""
+    start_x, start_y = _device_point(start_x, start_y)
+    end_x, end_y = _device_point(end_x, end_y)
     swipe_command = ['shell', 'input', 'swipe', str(start_x), str(start_y), str(end_x), str(end_y), str(duration_ms)]
     result = run_adb(swipe_command)
     if result is not None:
@@ -26,6 +26,33 @@ if not logger.handlers:
     
     logger.addHandler(console_handler)
 
+_console_configured = False
+
+
+def configure_console_utf8():
+    """
+    Switch the Windows console to UTF-8 once per process (no-op elsewhere).
+
+    Uses SetConsoleOutputCP instead of running `chcp 65001`, which spawned a
+    shell on every call.
+    """
+    global _console_configured
+    if _console_configured or os.name != 'nt':
+        return
+    _console_configured = True
+    try:
+        import ctypes
+        ctypes.windll.kernel32.SetConsoleOutputCP(65001)
+        ctypes.windll.kernel32.SetConsoleCP(65001)
+    except Exception:
+        pass
+    try:
+        if hasattr(sys.stdout, 'reconfigure'):
+            sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        pass
+
+
 def safe_encode_message(message):
     """Safely encode message to handle Unicode errors"""
     try:
@@ -81,7 +108,7 @@ def log_success(message):
     """Log success level message (treated as info with SUCCESS prefix)"""
     try:
         safe_message = safe_encode_message(message)
-        logger.info(f"SUCCESS: {safe_message}")
+        logger.info(f"SUCCESS: {safe_message}", extra={"event_level": "success"})
         sys.stdout.flush()
     except Exception:
         print(f"[SUCCESS] {safe_encode_message(message)}")
@@ -0,0 +1,93 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.log import log_debug
+
+# The mood badges differ strongly in colour (AWFUL purple, BAD blue, NORMAL
+# yellow, GOOD orange, GREAT pink), so a hue histogram of the saturated pixels
+# of the mood region identifies the mood in one pass. The signature of each
+# mood comes from its template in assets/mood; the white label text and the
+# unsaturated lobby background do not count.
+
+MOOD_TEMPLATES = {
+    "AWFUL": os.path.join("assets", "mood", "awful.png"),
+    "BAD": os.path.join("assets", "mood", "bad.png"),
+    "NORMAL": os.path.join("assets", "mood", "normal.png"),
+    "GOOD": os.path.join("assets", "mood", "good.png"),
+    "GREAT": os.path.join("assets", "mood", "great.png"),
+}
+
+# OpenCV hue runs 0-179; 6 degrees per bin
+HUE_BINS = 30
+MIN_SATURATION = 110
+MIN_VALUE = 110
+# Fewer saturated pixels than this and there is no badge to classify
+MIN_COLOR_PIXELS = 200
+
+_signatures: Optional[Dict[str, np.ndarray]] = None
+_lock = threading.Lock()
+
+
+def color_signature(image) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Normalized hue histogram of the saturated pixels.
+
+    Args:
+        image: PIL Image or RGB numpy array
+
+    Returns:
+        (histogram or None when too few saturated pixels, saturated pixel count)
+    """
+    rgb = np.asarray(image.convert("RGB")) if not isinstance(image, np.ndarray) else image[..., :3]
+    hsv = cv2.cvtColor(np.ascontiguousarray(rgb), cv2.COLOR_RGB2HSV)
+    mask = ((hsv[..., 1] >= MIN_SATURATION) & (hsv[..., 2] >= MIN_VALUE)).astype(np.uint8)
+    count = int(mask.sum())
+    if count < MIN_COLOR_PIXELS:
+        return None, count
+    hist = cv2.calcHist([hsv], [0], mask, [HUE_BINS], [0, 180]).ravel()
+    return hist / hist.sum(), count
+
+
+def _get_signatures() -> Dict[str, np.ndarray]:
+    global _signatures
+    with _lock:
+        if _signatures is None:
+            from utils.template_cache import get_template
+            signatures = {}
+            for label, path in MOOD_TEMPLATES.items():
+                template = get_template(path, cv2.IMREAD_COLOR)
+                if template is None:
+                    continue
+                signature, _ = color_signature(cv2.cvtColor(template, cv2.COLOR_BGR2RGB))
+                if signature is not None:
+                    signatures[label] = signature
+            _signatures = signatures
+        return _signatures
+
+
+def classify_mood(region_image) -> Tuple[Optional[str], float, Dict[str, float]]:
+    """
+    Mood from the colour signature of the mood region.
+
+    Args:
+        region_image: crop of the mood region (PIL Image or RGB array)
+
+    Returns:
+        (label or None, margin, scores): scores are histogram intersections
+        (0-1) with each mood's signature; margin is best minus second best
+    """
+    signature, count = color_signature(region_image)
+    if signature is None:
+        log_debug(f"Mood signature: only {count} saturated pixels")
+        return None, 0.0, {}
+    scores = {label: float(np.minimum(signature, reference).sum())
+              for label, reference in _get_signatures().items()}
+    if not scores:
+        return None, 0.0, {}
+    ranked = sorted(scores.items(), key=lambda item: -item[1])
+    second = ranked[1][1] if len(ranked) > 1 else 0.0
+    return ranked[0][0], ranked[0][1] - second, scores
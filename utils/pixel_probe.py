@@ -0,0 +1,542 @@
+"""
+Declarative pixel probes for simple binary / few-state UI checks.
+
+A probe spec samples a handful of points (or small patches) of a frame and
+votes on which state is showing, instead of template matching the whole
+element. Specs are JSON files in assets/probes/<name>.json:
+
+    {
+      "name": "skip_variant",
+      "origin": "center of the skip button",
+      "states": {
+        "off": {
+          "samples": [
+            {"x": -40, "y": 2, "size": 3, "rgb": [[190, 190, 190], [255, 255, 255]]},
+            {"x": 12, "y": -6, "size": 3, "gray": [0, 120]}
+          ],
+          "vote": {"rule": "fraction", "min": 0.75}
+        },
+        ...
+      }
+    }
+
+x / y are pixel offsets from the origin the caller passes (the frame's
+top-left when omitted; "origin" only documents what callers use), size is
+the side of a square patch centred on the point (its mean colour is used),
+and each sample's range is either "rgb" (per-channel [low, high]) or "gray".
+Vote rules per state:
+
+    fraction   share of samples inside their range >= min
+    mean_gray  mean grey level of all samples >= min (and <= max, if given)
+
+A probe resolves to the state with the best vote that passes (or None). An
+optional top-level "margin" also requires that state's score to beat every
+other state's by that much, so states whose samples can all pass on the same
+frame (a plain light background) resolve to None instead of a guess.
+All samples are gathered in one vectorized pass over the bounding box, which
+takes microseconds.
+
+Specs can be generated from labelled frames:
+
+    python -m utils.pixel_probe generate skip_variant off=frames/off x1=frames/x1 x2=frames/x2 --region 800,1700,1000,1760
+    python -m utils.pixel_probe check assets/probes/skip_variant.json off=frames/off x1=frames/x1 x2=frames/x2
+
+and bright / dimmed buttons get a grid of patches with a mean_gray vote:
+
+    python -m utils.pixel_probe brightness infirmary_active --box 195x111 --grid 6x3 --min 170
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import log_debug, log_info, log_warning
+from utils.resolution import get_profile
+
+PROBE_DIR = os.path.join("assets", "probes")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# PIL "L" conversion weights
+_GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class ProbeResult:
+    """Outcome of one probe evaluation"""
+
+    __slots__ = ("state", "scores", "mean_gray")
+
+    def __init__(self, state: Optional[str], scores: Dict[str, float], mean_gray: float):
+        self.state = state
+        # Per state: share of samples in range (fraction rule) or 1.0 / 0.0 (mean_gray rule)
+        self.scores = scores
+        # Mean grey level over every sample of the spec
+        self.mean_gray = mean_gray
+
+    def __bool__(self):
+        return self.state is not None
+
+    def __repr__(self):
+        return f"ProbeResult({self.state!r}, scores={self.scores}, mean_gray={self.mean_gray:.1f})"
+
+
+class ProbeSpec:
+    """A compiled probe spec; evaluate() runs it on a frame"""
+
+    def __init__(self, spec: dict, scale: float = 1.0):
+        """
+        Args:
+            spec: probe spec (JSON dict), coordinates for 1080x1920
+            scale: device size over 1080x1920 (utils.resolution profile)
+        """
+        self.name = spec.get("name", "probe")
+        self.spec = spec
+        self.margin = float(spec.get("margin", 0.0))
+        self.states: List[str] = []
+        self._votes: List[dict] = []
+        self._state_starts: List[int] = []
+
+        dx, dy, lows, highs, gray = [], [], [], [], []
+        patch_x, patch_y, patch_starts = [], [], []
+        for state, definition in spec.get("states", {}).items():
+            samples = definition.get("samples", [])
+            if not samples:
+                raise ValueError(f"probe {self.name}: state {state} has no samples")
+            self.states.append(state)
+            self._votes.append(definition.get("vote", {"rule": "fraction", "min": 1.0}))
+            self._state_starts.append(len(dx))
+            for sample in samples:
+                x, y = int(round(sample["x"] * scale)), int(round(sample["y"] * scale))
+                half = max(int(round(sample.get("size", 1) * scale)), 1) // 2
+                patch_starts.append(len(patch_x))
+                for oy in range(-half, half + 1):
+                    for ox in range(-half, half + 1):
+                        patch_x.append(x + ox)
+                        patch_y.append(y + oy)
+                dx.append(x)
+                dy.append(y)
+                if "gray" in sample:
+                    low, high = sample["gray"]
+                    lows.append([low] * 3)
+                    highs.append([high] * 3)
+                    gray.append(True)
+                else:
+                    low, high = sample["rgb"]
+                    lows.append(list(low))
+                    highs.append(list(high))
+                    gray.append(False)
+
+        self._patch_x = np.array(patch_x, dtype=np.int64)
+        self._patch_y = np.array(patch_y, dtype=np.int64)
+        self._patch_starts = np.array(patch_starts, dtype=np.int64)
+        self._patch_counts = np.diff(np.append(self._patch_starts, len(patch_x))).astype(np.float32)
+        self._low = np.array(lows, dtype=np.float32)
+        self._high = np.array(highs, dtype=np.float32)
+        self._gray = np.array(gray, dtype=bool)
+        self._state_counts = np.diff(np.append(self._state_starts, len(dx))).astype(np.float32)
+        # Bounding box of every patch pixel, relative to the origin
+        self._box = (int(self._patch_x.min()), int(self._patch_y.min()),
+                     int(self._patch_x.max()) + 1, int(self._patch_y.max()) + 1)
+
+    def _pixels(self, frame, origin: Tuple[int, int]) -> np.ndarray:
+        """RGB values (N, 3) of every patch pixel; pixels outside the frame read as black"""
+        ox, oy = int(origin[0]), int(origin[1])
+        left, top, right, bottom = self._box
+        box = (ox + left, oy + top, ox + right, oy + bottom)
+        if isinstance(frame, np.ndarray):
+            height, width = frame.shape[:2]
+            crop = np.zeros((box[3] - box[1], box[2] - box[0], 3), dtype=np.uint8)
+            x1, y1, x2, y2 = max(box[0], 0), max(box[1], 0), min(box[2], width), min(box[3], height)
+            if x2 > x1 and y2 > y1:
+                region = frame[y1:y2, x1:x2]
+                if region.ndim == 2:
+                    region = region[..., None]
+                crop[y1 - box[1]:y2 - box[1], x1 - box[0]:x2 - box[0]] = region[..., :3]
+        else:
+            # PIL pads crops outside the image with zeros
+            crop = np.asarray(frame.crop(box).convert("RGB"))
+        return crop[self._patch_y - top, self._patch_x - left].astype(np.float32)
+
+    def evaluate(self, frame, origin: Tuple[int, int] = (0, 0)) -> ProbeResult:
+        """
+        Run the probe on a frame.
+
+        Args:
+            frame: PIL Image or RGB(A) numpy array
+            origin: screen position the sample offsets are relative to
+
+        Returns:
+            ProbeResult (truthy when a state's vote passed)
+        """
+        pixels = self._pixels(frame, origin)
+        values = np.add.reduceat(pixels, self._patch_starts, axis=0) / self._patch_counts[:, None]
+        gray_values = values @ _GRAY_WEIGHTS
+        values[self._gray] = gray_values[self._gray, None]
+        inside = np.all((values >= self._low) & (values <= self._high), axis=1)
+        in_range = np.add.reduceat(inside.astype(np.float32), self._state_starts) / self._state_counts
+        state_gray = np.add.reduceat(gray_values, self._state_starts) / self._state_counts
+
+        best, best_score, scores = None, -1.0, {}
+        for index, state in enumerate(self.states):
+            vote = self._votes[index]
+            if vote.get("rule", "fraction") == "mean_gray":
+                level = float(state_gray[index])
+                score = float(level >= vote.get("min", 0) and level <= vote.get("max", 255))
+                passed = score > 0
+            else:
+                score = float(in_range[index])
+                passed = score >= vote.get("min", 1.0)
+            scores[state] = round(score, 3)
+            if passed and score > best_score:
+                best, best_score = state, score
+        if best is not None and self.margin > 0:
+            if any(score > best_score - self.margin for state, score in scores.items() if state != best):
+                best = None
+        return ProbeResult(best, scores, float(gray_values.mean()))
+
+    def check(self, frame, origin: Tuple[int, int] = (0, 0)) -> Optional[str]:
+        """State showing on the frame, or None"""
+        return self.evaluate(frame, origin).state
+
+
+_specs: Dict[str, Optional[ProbeSpec]] = {}
+_specs_lock = threading.Lock()
+
+
+def load_probe(name: str) -> Optional[ProbeSpec]:
+    """
+    Compiled spec assets/probes/<name>.json, loaded once per process.
+
+    Returns:
+        ProbeSpec, or None when the spec is missing or invalid (callers keep
+        their template-matching path then)
+    """
+    with _specs_lock:
+        if name in _specs:
+            return _specs[name]
+        path = os.path.join(PROBE_DIR, f"{name}.json")
+        spec = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                spec = ProbeSpec(json.load(f), get_profile().scale_factor)
+        except FileNotFoundError:
+            log_debug(f"No pixel probe spec {path}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log_warning(f"Pixel probe spec {path} not usable: {e}")
+        _specs[name] = spec
+        return spec
+
+
+# --- spec generation -------------------------------------------------------------
+
+def _patch_means(image: np.ndarray, size: int) -> np.ndarray:
+    import cv2
+    image = image.astype(np.float32)
+    if size <= 1:
+        return image
+    return cv2.blur(image, (size, size), borderType=cv2.BORDER_REPLICATE)
+
+
+def _align(images: List[np.ndarray]) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """Centre images of different sizes on one canvas; returns (images, valid masks)"""
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    aligned, masks = [], []
+    for image in images:
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        mask = np.zeros((height, width), dtype=bool)
+        top = (height - image.shape[0]) // 2
+        left = (width - image.shape[1]) // 2
+        canvas[top:top + image.shape[0], left:left + image.shape[1]] = image
+        mask[top:top + image.shape[0], left:left + image.shape[1]] = True
+        aligned.append(canvas)
+        masks.append(mask)
+    return aligned, masks
+
+
+def generate_spec(name: str, labelled: Dict[str, List[np.ndarray]], samples: int = 8, size: int = 3,
+                  jitter: int = 2, tolerance: float = 24.0, min_fraction: float = 0.75,
+                  use_gray: bool = False, offset: Tuple[int, int] = (0, 0), align_center: bool = False,
+                  origin_note: str = "", margin: float = 0.0) -> dict:
+    """
+    Build a probe spec from labelled crops of the same screen region.
+
+    For every state, the patch colours seen in its crops (widened by jitter
+    pixels of misalignment) are compared with every other state's; the
+    points where the state's colour range is furthest from all others become
+    its samples, with ranges widened by up to tolerance (never past half the
+    gap to the other states).
+
+    Args:
+        name: spec name
+        labelled: state -> RGB crops (all the same size unless align_center)
+        samples: samples per state
+        size: patch side
+        jitter: pixels of position error the ranges must tolerate
+        tolerance: maximum range widening beyond the observed colours
+        min_fraction: vote threshold written to the spec
+        use_gray: sample grey levels instead of RGB
+        offset: added to sample coordinates (crop position on screen)
+        align_center: centre crops of different sizes (e.g. templates) and make
+            coordinates relative to the centre
+        origin_note: what callers must pass as origin (documentation only)
+        margin: lead the winning state's score needs over every other state's
+
+    Returns:
+        spec dict (see module docstring)
+    """
+    import cv2
+
+    states = list(labelled)
+    images = [image for state in states for image in labelled[state]]
+    if align_center:
+        images, masks = _align(images)
+        offset = (offset[0] - images[0].shape[1] // 2, offset[1] - images[0].shape[0] // 2)
+    else:
+        if len({image.shape[:2] for image in images}) != 1:
+            raise ValueError("labelled crops differ in size (use align_center for templates)")
+        masks = [np.ones(images[0].shape[:2], dtype=bool) for _ in images]
+
+    kernel = np.ones((2 * jitter + 1, 2 * jitter + 1), np.uint8)
+    valid = np.logical_and.reduce([cv2.erode(mask.astype(np.uint8), kernel).astype(bool) for mask in masks])
+    half = size // 2
+    valid[:half + jitter, :] = False
+    valid[:, :half + jitter] = False
+    valid[valid.shape[0] - half - jitter:, :] = False
+    valid[:, valid.shape[1] - half - jitter:] = False
+
+    # Per state: lowest / highest patch colour at every position
+    ranges = {}
+    index = 0
+    for state in states:
+        lows, highs = [], []
+        for _ in labelled[state]:
+            means = _patch_means(images[index], size)
+            if use_gray:
+                means = (means @ _GRAY_WEIGHTS)[..., None]
+            lows.append(np.stack([cv2.erode(means[..., c], kernel) for c in range(means.shape[2])], axis=-1))
+            highs.append(np.stack([cv2.dilate(means[..., c], kernel) for c in range(means.shape[2])], axis=-1))
+            index += 1
+        ranges[state] = (np.min(lows, axis=0), np.max(highs, axis=0))
+
+    spacing = max(2 * size, 2 * jitter + 2, 6)
+    spec_states = {}
+    for state in states:
+        low, high = ranges[state]
+        others = [ranges[other] for other in states if other != state]
+        if others:
+            # Gap to the closest other state, on the channel that separates best
+            gaps = [np.max(np.maximum(o_low - high, low - o_high), axis=-1) for o_low, o_high in others]
+            score = np.min(gaps, axis=0)
+        else:
+            # Presence probe: flat patches are the most stable under jitter
+            score = -np.max(high - low, axis=-1)
+        score = np.where(valid, score, -np.inf)
+
+        chosen = []
+        for flat in np.argsort(score, axis=None)[::-1]:
+            y, x = np.unravel_index(flat, score.shape)
+            if not np.isfinite(score[y, x]) or (others and score[y, x] <= 0):
+                break
+            if all(abs(x - cx) >= spacing or abs(y - cy) >= spacing for cx, cy in chosen):
+                chosen.append((x, y))
+                if len(chosen) == samples:
+                    break
+        if not chosen:
+            raise ValueError(f"no pixel separates state {state} from the others")
+
+        sample_specs = []
+        for x, y in chosen:
+            widen = min(tolerance, score[y, x] / 2.0) if others else tolerance
+            lo = np.clip(np.floor(low[y, x] - widen), 0, 255).astype(int).tolist()
+            hi = np.clip(np.ceil(high[y, x] + widen), 0, 255).astype(int).tolist()
+            sample = {"x": int(x) + offset[0], "y": int(y) + offset[1], "size": size}
+            if use_gray:
+                sample["gray"] = [lo[0], hi[0]]
+            else:
+                sample["rgb"] = [lo, hi]
+            sample_specs.append(sample)
+        spec_states[state] = {"samples": sample_specs, "vote": {"rule": "fraction", "min": min_fraction}}
+
+    spec = {"name": name}
+    if origin_note:
+        spec["origin"] = origin_note
+    if margin:
+        spec["margin"] = margin
+    spec["states"] = spec_states
+    return spec
+
+
+def brightness_spec(name: str, width: int, height: int, columns: int, rows: int, minimum: float,
+                    state: str = "bright", size: int = 9, origin_note: str = "") -> dict:
+    """
+    Spec for a bright / dimmed element: a columns x rows grid of patches over a
+    width x height box whose mean grey level must reach minimum.
+    """
+    samples = []
+    for row in range(rows):
+        for column in range(columns):
+            samples.append({"x": int((column + 0.5) * width / columns), "y": int((row + 0.5) * height / rows),
+                            "size": size, "gray": [0, 255]})
+    spec = {"name": name}
+    if origin_note:
+        spec["origin"] = origin_note
+    spec["states"] = {state: {"samples": samples, "vote": {"rule": "mean_gray", "min": minimum}}}
+    return spec
+
+
+def format_spec(spec: dict) -> str:
+    """Spec as JSON text, one line per sample"""
+    lines = ["{", f'  "name": {json.dumps(spec["name"])},']
+    if spec.get("origin"):
+        lines.append(f'  "origin": {json.dumps(spec["origin"])},')
+    if spec.get("margin"):
+        lines.append(f'  "margin": {json.dumps(spec["margin"])},')
+    lines.append('  "states": {')
+    states = list(spec["states"].items())
+    for index, (state, definition) in enumerate(states):
+        lines.append(f'    {json.dumps(state)}: {{')
+        lines.append('      "samples": [')
+        samples = definition["samples"]
+        for position, sample in enumerate(samples):
+            lines.append(f'        {json.dumps(sample)}{"," if position < len(samples) - 1 else ""}')
+        lines.append('      ],')
+        lines.append(f'      "vote": {json.dumps(definition["vote"])}')
+        lines.append(f'    }}{"," if index < len(states) - 1 else ""}')
+    lines.append("  }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_spec(spec: dict, output: str):
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(format_spec(spec))
+
+
+def _load_images(path: str, region: Optional[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+    from PIL import Image
+
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                 if name.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        files = [path]
+    images = []
+    for file in files:
+        with Image.open(file) as img:
+            img = img.convert("RGB")
+            if region:
+                img = img.crop(region)
+            images.append(np.asarray(img))
+    if not images:
+        raise ValueError(f"no images in {path}")
+    return images
+
+
+def _labelled_args(items: List[str]) -> List[Tuple[str, str]]:
+    pairs = []
+    for item in items:
+        label, sep, path = item.partition("=")
+        if not sep:
+            raise SystemExit(f"expected LABEL=PATH, got {item!r}")
+        pairs.append((label, path))
+    return pairs
+
+
+def _ints(text: Optional[str]) -> Optional[Tuple[int, ...]]:
+    return tuple(int(v) for v in text.split(",")) if text else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and check pixel probe specs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="build a spec from labelled frames")
+    generate.add_argument("name")
+    generate.add_argument("labelled", nargs="+", help="LABEL=PATH (image or directory of images)")
+    generate.add_argument("--region", help="x1,y1,x2,y2 screen region of the element in full frames")
+    generate.add_argument("--align-center", action="store_true",
+                          help="inputs are crops of different sizes (e.g. templates); offsets from their centre")
+    generate.add_argument("--samples", type=int, default=8)
+    generate.add_argument("--size", type=int, default=3)
+    generate.add_argument("--jitter", type=int, default=2)
+    generate.add_argument("--tolerance", type=float, default=24.0)
+    generate.add_argument("--min-fraction", type=float, default=0.75)
+    generate.add_argument("--margin", type=float, default=0.0,
+                          help="lead the probed state needs over every other state")
+    generate.add_argument("--gray", action="store_true")
+    generate.add_argument("--origin", default="", help="note on what callers pass as origin")
+    generate.add_argument("-o", "--output", help="default: assets/probes/NAME.json")
+
+    brightness = commands.add_parser("brightness", help="grid spec for a bright / dimmed element")
+    brightness.add_argument("name")
+    brightness.add_argument("--box", required=True, help="WIDTHxHEIGHT of the element (offsets from its top-left)")
+    brightness.add_argument("--grid", default="6x3", help="COLUMNSxROWS of sample patches")
+    brightness.add_argument("--min", type=float, required=True, help="minimum mean grey level")
+    brightness.add_argument("--state", default="bright")
+    brightness.add_argument("--size", type=int, default=9)
+    brightness.add_argument("--origin", default="", help="note on what callers pass as origin")
+    brightness.add_argument("-o", "--output", help="default: assets/probes/NAME.json")
+
+    check = commands.add_parser("check", help="evaluate a spec on labelled frames")
+    check.add_argument("spec")
+    check.add_argument("labelled", nargs="+", help="LABEL=PATH (image or directory of images)")
+    check.add_argument("--origin", help="x,y origin passed to the probe")
+    check.add_argument("--region", help="x1,y1,x2,y2 crop applied to the frames first")
+    args = parser.parse_args()
+
+    if args.command == "brightness":
+        width, height = (int(v) for v in args.box.lower().split("x"))
+        columns, rows = (int(v) for v in args.grid.lower().split("x"))
+        spec = brightness_spec(args.name, width, height, columns, rows, args.min, args.state, args.size, args.origin)
+        output = args.output or os.path.join(PROBE_DIR, f"{args.name}.json")
+        _write_spec(spec, output)
+        log_info(f"Probe spec {args.name} written to {output} ({columns * rows} samples)")
+        return 0
+
+    region = _ints(args.region)
+    labelled = {}
+    for label, path in _labelled_args(args.labelled):
+        labelled.setdefault(label, []).extend(_load_images(path, region))
+
+    if args.command == "generate":
+        offset = (region[0], region[1]) if region else (0, 0)
+        spec = generate_spec(args.name, labelled, samples=args.samples, size=args.size, jitter=args.jitter,
+                             tolerance=args.tolerance, min_fraction=args.min_fraction, use_gray=args.gray,
+                             offset=offset, align_center=args.align_center, origin_note=args.origin,
+                             margin=args.margin)
+        output = args.output or os.path.join(PROBE_DIR, f"{args.name}.json")
+        _write_spec(spec, output)
+        counts = ", ".join(f"{state}: {len(definition['samples'])} samples"
+                           for state, definition in spec["states"].items())
+        log_info(f"Probe spec {args.name} written to {output} ({counts})")
+        return 0
+
+    with open(args.spec, "r", encoding="utf-8") as f:
+        probe = ProbeSpec(json.load(f))
+    origin = _ints(args.origin) or (0, 0)
+    correct = total = 0
+    elapsed = 0.0
+    for label, images in labelled.items():
+        for image in images:
+            start = time.perf_counter()
+            result = probe.evaluate(image, origin)
+            elapsed += time.perf_counter() - start
+            total += 1
+            correct += result.state == label
+            if result.state != label:
+                log_info(f"  {label}: probed {result.state} {result.scores}")
+    log_info(f"{probe.name}: {correct}/{total} correct, {elapsed / max(total, 1) * 1e6:.0f} us per evaluation")
+    return 0 if correct == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
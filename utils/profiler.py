@@ -0,0 +1,401 @@
+import os
+import sys
+import csv
+import json
+import math
+import time
+import inspect
+import functools
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.log import log_debug, log_info, log_warning
+from utils import trace
+
+# Hot-path instrumentation is off unless enabled from config ("profiling": {"enabled": true})
+_enabled = False
+# True while any sink (histograms or trace recorder) is collecting
+_active = False
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Log-spaced buckets: ~5% relative resolution from 10us to ~30 min
+_BUCKET_BASE = 1.05
+_BUCKET_MIN = 1e-5
+_BUCKET_COUNT = int(math.log(2000.0 / _BUCKET_MIN, _BUCKET_BASE)) + 1
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-bucketed latency histogram.
+
+    Memory does not grow with the number of samples; percentiles are accurate
+    to the bucket resolution (~5%).
+    """
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds <= _BUCKET_MIN:
+            index = 0
+        else:
+            index = min(int(math.log(seconds / _BUCKET_MIN, _BUCKET_BASE)) + 1, _BUCKET_COUNT)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "LatencyHistogram"):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in seconds"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100.0))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = _BUCKET_MIN * (_BUCKET_BASE ** index)
+                # Clamp bucket bounds to the observed range
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Summary in milliseconds"""
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class _Profile:
+    """Histograms for the current career, split per turn"""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.career_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.started = time.time()
+        self.career: Dict[str, LatencyHistogram] = {}
+        self.turn_label: Optional[str] = None
+        self.turn_started = time.time()
+        self.turn: Dict[str, LatencyHistogram] = {}
+        self.turns: List[dict] = []
+
+    def record(self, name: str, seconds: float):
+        histogram = self.turn.get(name)
+        if histogram is None:
+            histogram = self.turn[name] = LatencyHistogram()
+        histogram.add(seconds)
+
+    def close_turn(self):
+        """Fold the current turn into the career totals and keep its summary"""
+        if not self.turn:
+            self.turn_started = time.time()
+            return
+        for name, histogram in self.turn.items():
+            career_histogram = self.career.get(name)
+            if career_histogram is None:
+                career_histogram = self.career[name] = LatencyHistogram()
+            career_histogram.merge(histogram)
+        self.turns.append({
+            "turn": self.turn_label or f"turn {len(self.turns) + 1}",
+            "wall_ms": round((time.time() - self.turn_started) * 1000, 3),
+            "operations": {name: h.summary() for name, h in sorted(self.turn.items())},
+        })
+        self.turn = {}
+        self.turn_started = time.time()
+
+
+_profile: Optional[_Profile] = None
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _update_active():
+    global _active
+    _active = _enabled or trace.is_enabled()
+    if _active and (_time_sleeps or trace.is_enabled()):
+        _install_sleep_timer()
+    else:
+        _uninstall_sleep_timer()
+
+
+def enable(output_dir: str = "profiling", time_sleeps: bool = True):
+    """
+    Start collecting timings for a new career.
+
+    Args:
+        output_dir: where career/turn reports are written
+        time_sleeps: also time every time.sleep call site
+    """
+    global _enabled, _profile, _time_sleeps
+    if not os.path.isabs(output_dir):
+        output_dir = os.path.join(_PROJECT_ROOT, output_dir)
+    _profile = _Profile(output_dir)
+    _enabled = True
+    _time_sleeps = time_sleeps
+    _update_active()
+    log_info(f"Profiling enabled, reports will be written to {output_dir}")
+
+
+def reset():
+    """Drop everything recorded so far and start a fresh profile before a new run (warm bot worker)"""
+    global _profile
+    if _profile is not None:
+        _profile = _Profile(_profile.output_dir)
+
+
+def disable():
+    """Stop collecting (already recorded data is kept until the next export/enable)"""
+    global _enabled
+    _enabled = False
+    _update_active()
+
+
+def enable_tracing(output_dir: str = "traces", ring_size: int = 50, fmt: str = "chrome",
+                   slow_iteration_s: float = 30.0):
+    """Start the turn-level trace recorder (see utils.trace); spans and sleeps feed it too"""
+    trace.enable(output_dir, ring_size, fmt, slow_iteration_s)
+    _update_active()
+
+
+def enable_from_config(config: dict) -> bool:
+    """
+    Enable profiling and/or tracing from config["profiling"] / config["tracing"].
+
+    Returns:
+        bool: True if any instrumentation is active
+    """
+    profiling = (config or {}).get("profiling", {}) or {}
+    if profiling.get("enabled", False):
+        enable(profiling.get("output_dir", "profiling"), profiling.get("time_sleeps", True))
+    tracing = (config or {}).get("tracing", {}) or {}
+    if tracing.get("enabled", False):
+        enable_tracing(
+            tracing.get("output_dir", "traces"),
+            tracing.get("ring_size", 50),
+            tracing.get("format", "chrome"),
+            tracing.get("slow_iteration_s", 30.0),
+        )
+    return _active
+
+
+def record(name: str, seconds: float):
+    """Record one duration for an operation"""
+    if _enabled and _profile is not None:
+        _profile.record(name, seconds)
+
+
+def _finish(name: str, start: float, end: float, args: Optional[dict] = None):
+    """Deliver a finished span to the histograms and the trace recorder"""
+    if _enabled and _profile is not None:
+        _profile.record(name, end - start)
+    if trace.is_enabled():
+        trace.add_span(name, start, end, args)
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: Optional[dict]):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _finish(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **args):
+    """
+    Time a block: `with span("ocr.goal"): ...`; keyword args are attached to the trace event.
+
+    Returns a shared no-op context manager when instrumentation is disabled.
+    """
+    if not _active:
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def timed(name: str, trace_args=()):
+    """
+    Decorator timing every call of a function under name.
+
+    Args:
+        name: operation name in histograms and traces
+        trace_args: parameter names whose values are attached to trace events
+            (e.g. the template path of a probe or tap coordinates)
+
+    When instrumentation is disabled the only overhead is one global flag check.
+    """
+    def decorator(func):
+        positions = {}
+        if trace_args:
+            parameters = list(inspect.signature(func).parameters)
+            positions = {arg: parameters.index(arg) for arg in trace_args if arg in parameters}
+
+        def call_args(args, kwargs):
+            if not positions or not trace.is_enabled():
+                return None
+            values = {}
+            for arg, index in positions.items():
+                if arg in kwargs:
+                    values[arg] = kwargs[arg]
+                elif index < len(args):
+                    values[arg] = args[index]
+            return values
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _finish(name, start, time.perf_counter(), call_args(args, kwargs))
+        return wrapper
+    return decorator
+
+
+# Original time.sleep, restored when profiling is disabled
+_real_sleep = time.sleep
+_site_names: Dict[tuple, str] = {}
+_time_sleeps = True
+
+
+def _timed_sleep(seconds):
+    if not _active:
+        return _real_sleep(seconds)
+    frame = sys._getframe(1)
+    key = (frame.f_code.co_filename, frame.f_lineno)
+    name = _site_names.get(key)
+    if name is None:
+        filename = key[0]
+        if filename.startswith(_PROJECT_ROOT):
+            filename = os.path.relpath(filename, _PROJECT_ROOT).replace(os.sep, "/")
+        name = _site_names[key] = f"sleep:{filename}:{key[1]}"
+    start = time.perf_counter()
+    try:
+        return _real_sleep(seconds)
+    finally:
+        _finish(name, start, time.perf_counter(), {"seconds": seconds})
+
+
+def _install_sleep_timer():
+    # Call sites use time.sleep(...) through the module attribute, so one swap covers all of them
+    time.sleep = _timed_sleep
+
+
+def _uninstall_sleep_timer():
+    if time.sleep is _timed_sleep:
+        time.sleep = _real_sleep
+
+
+def begin_turn(label: str):
+    """Close the current turn and start timing a new one labelled with the in-game turn (e.g. year)"""
+    if not _enabled or _profile is None:
+        return
+    if label == _profile.turn_label:
+        return
+    _profile.close_turn()
+    _profile.turn_label = label
+    log_debug(f"Profiling turn: {label}")
+
+
+def get_report() -> dict:
+    """Career report: per-operation totals plus a per-turn breakdown (current turn included)"""
+    if _profile is None:
+        return {}
+    _profile.close_turn()
+    operations = {name: h.summary() for name, h in sorted(_profile.career.items(), key=lambda item: -item[1].total)}
+    return {
+        "career": _profile.career_id,
+        "wall_ms": round((time.time() - _profile.started) * 1000, 3),
+        "operations": operations,
+        "turns": _profile.turns,
+    }
+
+
+def export_report(output_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Write the career report as JSON plus a flat CSV (one row per scope/operation).
+
+    Returns:
+        str: path of the JSON report, or None if nothing was recorded
+    """
+    report = get_report()
+    if not report or not report["operations"]:
+        return None
+    output_dir = output_dir or _profile.output_dir
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, f"career_{report['career']}")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        columns = ["count", "total_ms", "mean_ms", "min_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+        with open(base + ".csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["scope", "operation"] + columns)
+            for name, stats in report["operations"].items():
+                writer.writerow(["career", name] + [stats[c] for c in columns])
+            for turn in report["turns"]:
+                for name, stats in turn["operations"].items():
+                    writer.writerow([turn["turn"], name] + [stats[c] for c in columns])
+        log_info(f"Profiling report written to {base}.json / .csv")
+        return base + ".json"
+    except Exception as e:
+        log_warning(f"Could not write profiling report: {e}")
+        return None
+
+
+def begin_career():
+    """Export the finished career (if any) and start a fresh one with the same settings"""
+    global _profile
+    if not _enabled or _profile is None:
+        return
+    export_report()
+    _profile = _Profile(_profile.output_dir)
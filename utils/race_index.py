@@ -0,0 +1,140 @@
+import os
+import json
+from typing import Dict, List, Optional, Tuple
+
+from utils.log import log_debug, log_warning
+
+_RACE_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "races", "clean_race_data.json")
+
+# Lower number = higher priority; unknown grades sort last
+GRADE_PRIORITY = {
+    "G1": 1,
+    "G2": 2,
+    "G3": 3,
+    "OP": 4,
+    "PRE-OP": 5
+}
+
+
+class RaceIndex:
+    """
+    In-memory index over clean_race_data.json.
+
+    Races are bucketed by (year period, grade, surface, distance type) once at
+    load time, and the ranked candidate list for a given racing config is
+    cached per period so repeated race decisions never touch the JSON file or
+    re-filter the whole period.
+    """
+
+    def __init__(self, race_data: Dict[str, Dict[str, dict]]):
+        self.race_data = race_data or {}
+        self._buckets: Dict[Tuple[str, str, str, str], List[Tuple[str, dict]]] = {}
+        self._candidate_cache: Dict[tuple, List[Tuple[str, dict]]] = {}
+
+        for year, races in self.race_data.items():
+            for race_name, race_info in races.items():
+                key = (
+                    year,
+                    race_info.get("grade", "UNKNOWN"),
+                    race_info.get("surface", "UNKNOWN"),
+                    race_info.get("distance_type", "UNKNOWN"),
+                )
+                self._buckets.setdefault(key, []).append((race_name, race_info))
+
+    def __bool__(self):
+        return bool(self.race_data)
+
+    def get_race(self, year: str, race_name: str) -> Optional[dict]:
+        """Look up a single race's info, or None if it does not run in that period"""
+        return self.race_data.get(year, {}).get(race_name)
+
+    def candidates(self, year: str, allowed_grades, allowed_tracks=None, allowed_distances=None) -> List[Tuple[str, dict]]:
+        """
+        Ranked races for a period that satisfy the racing config.
+
+        Args:
+            year: canonical year label (race data key)
+            allowed_grades: grades to accept
+            allowed_tracks: surfaces to accept; empty/None accepts all
+            allowed_distances: distance types to accept; empty/None accepts all
+
+        Returns:
+            list of (race_name, race_info), best first (grade priority, then fans)
+        """
+        cache_key = (
+            year,
+            tuple(allowed_grades or ()),
+            tuple(allowed_tracks or ()),
+            tuple(allowed_distances or ()),
+        )
+        cached = self._candidate_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        grades = set(allowed_grades or ())
+        tracks = set(allowed_tracks or ())
+        distances = set(allowed_distances or ())
+
+        ranked = []
+        for (bucket_year, grade, surface, distance), races in self._buckets.items():
+            if bucket_year != year or grade not in grades:
+                continue
+            if tracks and surface not in tracks:
+                continue
+            if distances and distance not in distances:
+                continue
+            ranked.extend(races)
+
+        # Stable sort keeps database order among equal candidates (first one wins, as before)
+        order = {name: i for i, name in enumerate(self.race_data.get(year, {}))}
+        ranked.sort(key=lambda item: (
+            GRADE_PRIORITY.get(item[1].get("grade", "UNKNOWN").upper(), 999),
+            -item[1].get("fans", 0),
+            order.get(item[0], 0),
+        ))
+
+        self._candidate_cache[cache_key] = ranked
+        return ranked
+
+    def best_race(self, year: str, allowed_grades, allowed_tracks=None, allowed_distances=None) -> Optional[Tuple[str, dict]]:
+        """Best (race_name, race_info) for the period, or None"""
+        ranked = self.candidates(year, allowed_grades, allowed_tracks, allowed_distances)
+        return ranked[0] if ranked else None
+
+    def has_acceptable_race(self, year: str, allowed_grades, allowed_tracks=None, allowed_distances=None) -> bool:
+        """Cheap check callers can make before navigating into the race screen"""
+        return bool(self.candidates(year, allowed_grades, allowed_tracks, allowed_distances))
+
+
+# Loaded once per process
+_race_index = None
+
+
+def get_race_index() -> RaceIndex:
+    """Get or load the global race index"""
+    global _race_index
+    if _race_index is None:
+        race_data = {}
+        try:
+            with open(_RACE_DATA_PATH, "r", encoding="utf-8") as f:
+                race_data = json.load(f)
+        except Exception as e:
+            log_warning(f"Error loading race data: {e}")
+        _race_index = RaceIndex(race_data)
+        log_debug(f"Race index loaded: {len(race_data)} periods, {len(_race_index._buckets)} buckets")
+    return _race_index
+
+
+def get_racing_filters(racing_config: dict, goal_name: Optional[str] = None) -> Tuple[list, list, list]:
+    """
+    Resolve (allowed_grades, allowed_tracks, allowed_distances) from the racing config.
+
+    A goal containing G1 restricts grades to G1 only.
+    """
+    if goal_name and "G1" in goal_name:
+        allowed_grades = ["G1"]
+    else:
+        allowed_grades = racing_config.get("allowed_grades", ["G1", "G2", "G3", "OP", "PRE-OP"])
+    allowed_tracks = racing_config.get("allowed_tracks", ["Turf", "Dirt"])
+    allowed_distances = racing_config.get("allowed_distances", ["Sprint", "Mile", "Medium", "Long"])
+    return allowed_grades, allowed_tracks, allowed_distances
@@ -4,6 +4,9 @@ from PIL import Image
 import os
 from utils.screenshot import take_screenshot
 from utils.log import log_debug, log_info, log_warning, log_error
+from utils.profiler import timed
+from utils.template_cache import get_template
+from utils.resolution import scaled_template_path
 
 def _get_project_root():
     """Get the project root directory"""
@@ -44,6 +47,7 @@ def _resolve_asset_path(template_path):
     
     return resolved_path
 
+@timed("match_template", trace_args=("template_path", "region"))
 def match_template(screenshot, template_path, confidence=0.8, region=None):
     """
     Match template image on screenshot using OpenCV
@@ -66,9 +70,9 @@ def match_template(screenshot, template_path, confidence=0.8, region=None):
             log_error(f"Template not found: {template_path} (resolved to: {resolved_path})")
             return []
         
-        template_path = resolved_path  # Use resolved path for cv2.imread
+        template_path = resolved_path  # Use resolved path for loading
         
-        template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+        template = get_template(scaled_template_path(template_path))
         if template is None:
             log_error(f"Failed to load template: {template_path}")
             return []
@@ -104,6 +108,7 @@ def match_template(screenshot, template_path, confidence=0.8, region=None):
         log_error(f"Error in template matching: {e}")
         return []
 
+@timed("max_match_confidence", trace_args=("template_path", "region"))
 def max_match_confidence(screenshot, template_path, region=None):
     """
     Compute the maximum template match score for a template against a screenshot.
@@ -124,7 +129,7 @@ def max_match_confidence(screenshot, template_path, region=None):
             log_error(f"Template not found: {template_path} (resolved to: {resolved_path})")
             return 0.0
 
-        template = cv2.imread(resolved_path, cv2.IMREAD_COLOR)
+        template = get_template(scaled_template_path(resolved_path))
         if template is None:
             log_error(f"Failed to load template: {template_path}")
             return 0.0
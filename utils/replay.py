@@ -0,0 +1,252 @@
+import os
+import json
+import time
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from utils.log import log_debug, log_info
+from utils.session_recorder import INDEX_FILE, SessionReader
+
+SESSION_FILE = "session.json"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+class ReplayFinished(BaseException):
+    """
+    Raised by the replay capture when the session has no more frames (on_end="stop").
+
+    Derives from BaseException like KeyboardInterrupt so the bot's broad
+    `except Exception` handlers do not swallow the end of a replay.
+    """
+
+
+class ReplaySession:
+    """
+    A recorded session directory served frame by frame.
+
+    session.json:
+        {
+          "frames": [{"id": "f0001", "file": "frames/f0001.png", "label": "lobby"}, ...],
+          "script": ["f0001", "f0002", ...],          # optional, defaults to frame order
+          "transitions": {                            # optional input -> next frame mapping
+            "f0001": [{"input": "tap", "region": [x1, y1, x2, y2], "next": "f0002"},
+                      {"input": "any", "next": "f0003"}]
+          },
+          "advance": "on_input",                      # or "on_capture"
+          "on_end": "stop"                            # or "hold" / "loop"
+        }
+
+    With transitions, an input on the current frame moves to the first matching
+    rule's frame (inputs without a matching rule keep the frame). Without them
+    the script is followed, one step per input or per capture.
+
+    A directory written by utils.session_recorder (index.jsonl + chunks) is
+    read directly: its captures become the script (advance "on_capture"), or
+    with advance="on_input" the recorded inputs become transitions. A
+    directory with neither file is served as screenshots in file name order.
+
+    input_latency (seconds) models a real device: after an input the old
+    frame keeps being captured until the latency has elapsed.
+    """
+
+    def __init__(self, session_dir: str, advance: Optional[str] = None, on_end: Optional[str] = None,
+                 input_latency: float = 0.0):
+        self.session_dir = session_dir
+        self._reader = None
+        if os.path.exists(os.path.join(session_dir, INDEX_FILE)):
+            self._reader = SessionReader(session_dir)
+            self.meta = self._reader.replay_meta(advance or "on_capture")
+        elif os.path.exists(os.path.join(session_dir, SESSION_FILE)):
+            with open(os.path.join(session_dir, SESSION_FILE), "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+        else:
+            # Plain directory of screenshots: served in file name order
+            files = sorted(name for name in os.listdir(session_dir) if name.lower().endswith(IMAGE_EXTENSIONS))
+            self.meta = {"frames": [{"id": os.path.splitext(name)[0], "file": name} for name in files]}
+
+        self.frames: Dict[str, dict] = {frame["id"]: frame for frame in self.meta.get("frames", [])}
+        self.script: List[str] = list(self.meta.get("script") or [frame["id"] for frame in self.meta.get("frames", [])])
+        self.transitions: Dict[str, list] = self.meta.get("transitions", {}) or {}
+        self.advance = advance or self.meta.get("advance", "on_input")
+        self.on_end = on_end or self.meta.get("on_end", "stop")
+        if not self.script:
+            raise ValueError(f"Replay session has no frames: {session_dir}")
+
+        self.position = 0
+        self.current_id = self.script[0]
+        self.finished = False
+        self.captures = 0
+        self.inputs = 0
+        self.input_latency = max(float(input_latency or 0.0), 0.0)
+        # (frame id, script position or None, perf_counter time it becomes visible)
+        self._pending = None
+        self._images: Dict[str, Image.Image] = {}
+
+    def load_frame(self, frame_id: str) -> Image.Image:
+        """Decode a frame once and keep it (frames are few compared to captures)"""
+        image = self._images.get(frame_id)
+        if image is None:
+            if self._reader is not None:
+                image = self._reader.load_frame(frame_id)
+                # Recorded corpora can hold thousands of frames; keep only recent ones decoded
+                if len(self._images) >= 16:
+                    self._images.pop(next(iter(self._images)))
+            else:
+                frame = self.frames[frame_id]
+                with Image.open(os.path.join(self.session_dir, frame["file"])) as img:
+                    image = img.convert("RGBA")
+            self._images[frame_id] = image
+        return image
+
+    def label(self, frame_id: Optional[str] = None) -> Optional[str]:
+        return self.frames.get(frame_id or self.current_id, {}).get("label")
+
+    def _step(self, delayed: bool = False):
+        if self.position + 1 < len(self.script):
+            position = self.position + 1
+        elif self.on_end == "loop":
+            position = 0
+        elif self.on_end == "hold":
+            return
+        else:
+            self.finished = True
+            return
+        self._move(self.script[position], position, delayed)
+
+    def _move(self, frame_id: str, position: Optional[int] = None, delayed: bool = False):
+        """Show frame_id, after input_latency when the move was caused by an input"""
+        if delayed and self.input_latency > 0:
+            self._pending = (frame_id, position, time.perf_counter() + self.input_latency)
+            return
+        self.current_id = frame_id
+        if position is not None:
+            self.position = position
+
+    def _apply_pending(self, force: bool = False):
+        if self._pending is not None and (force or time.perf_counter() >= self._pending[2]):
+            frame_id, position, _ = self._pending
+            self._pending = None
+            self._move(frame_id, position)
+
+    def capture(self) -> Image.Image:
+        """Current frame (a copy, callers may draw on it)"""
+        if self.finished:
+            raise ReplayFinished(f"Replay finished after {self.captures} captures, {self.inputs} inputs")
+        self.captures += 1
+        self._apply_pending()
+        image = self.load_frame(self.current_id)
+        if self.advance == "on_capture" and not self.transitions:
+            self._step()
+        return image.copy()
+
+    def on_input(self, kind: str, args: list):
+        """Move to the next frame for an input sent on the current frame"""
+        self.inputs += 1
+        # The device already handled the previous input even if it is not on screen yet
+        self._apply_pending(force=True)
+        rules = self.transitions.get(self.current_id)
+        if rules:
+            for rule in rules:
+                if _rule_matches(rule, kind, args):
+                    log_debug(f"Replay: {kind} {args} on {self.current_id} -> {rule['next']}")
+                    self._move(rule["next"], delayed=True)
+                    return
+            return
+        if self.advance == "on_input" and not self.transitions:
+            self._step(delayed=True)
+
+
+def _rule_matches(rule: dict, kind: str, args: list) -> bool:
+    rule_input = rule.get("input", "any")
+    if rule_input not in ("any", kind):
+        return False
+    region = rule.get("region")
+    if region and len(args) >= 2:
+        x, y = float(args[0]), float(args[1])
+        x1, y1, x2, y2 = region
+        return x1 <= x <= x2 and y1 <= y <= y2
+    return True
+
+
+class ReplayCapture:
+    """Capture backend serving frames from a ReplaySession (same interface as AdbCapture)"""
+
+    def __init__(self, session: ReplaySession):
+        self.session = session
+
+    def screenshot(self) -> Image.Image:
+        return self.session.capture()
+
+    @property
+    def size(self) -> tuple:
+        return self.session.load_frame(self.session.current_id).size
+
+
+class ReplayInputSink:
+    """
+    Stand-in for the device: answers run_adb commands during a replay.
+
+    `shell input ...` commands are logged and forwarded to the session so the
+    next frame can be chosen; `wm size` reports the frame size; anything else
+    succeeds with empty output.
+    """
+
+    def __init__(self, session: ReplaySession):
+        self.session = session
+        self.log: List[dict] = []
+        self._start = time.perf_counter()
+
+    def handle_adb(self, command: list, binary: bool = False):
+        command = [str(part) for part in command]
+        if command[:2] == ["shell", "input"] and len(command) >= 3:
+            kind = command[2]
+            args = [_number(arg) for arg in command[3:]]
+            self.log.append({
+                "t": round(time.perf_counter() - self._start, 4),
+                "frame": self.session.current_id,
+                "label": self.session.label(),
+                "input": kind,
+                "args": args,
+            })
+            self.session.on_input(kind, args)
+            output = ""
+        elif command[:3] == ["shell", "wm", "size"]:
+            width, height = self.session.load_frame(self.session.current_id).size
+            output = f"Physical size: {width}x{height}"
+        else:
+            log_debug(f"Replay: ignoring adb command {' '.join(command)}")
+            output = ""
+        return output.encode() if binary else output
+
+    def save_log(self, path: str):
+        """Write the input log as JSON lines"""
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in self.log:
+                f.write(json.dumps(entry) + "\n")
+
+
+def _number(text: str):
+    try:
+        value = float(text)
+        return int(value) if value.is_integer() else value
+    except ValueError:
+        return text
+
+
+def start_replay(session_dir: str, advance: Optional[str] = None, on_end: Optional[str] = None,
+                 input_latency: float = 0.0):
+    """
+    Load a session and route adb commands to its input sink.
+
+    Returns:
+        (ReplayCapture, ReplayInputSink)
+    """
+    from utils.device import set_adb_interceptor
+
+    session = ReplaySession(session_dir, advance=advance, on_end=on_end, input_latency=input_latency)
+    sink = ReplayInputSink(session)
+    set_adb_interceptor(sink.handle_adb)
+    log_info(f"Replay session loaded: {session_dir} ({len(session.frames)} frames, "
+             f"{'transitions' if session.transitions else session.advance})")
+    return ReplayCapture(session), sink
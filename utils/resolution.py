@@ -0,0 +1,349 @@
+"""
+Resolution profiles: run the bot on devices other than 1080x1920.
+
+Every region, coordinate and template in the tree is authored for a
+1080x1920 portrait screen. A resolution profile holds the device size
+(detected once with get_screen_size, or set in config) and rescales those
+values to it:
+
+- the *_REGION constants of utils.constants_unity / constants_ura are
+  rescaled when the module is imported (scale_regions)
+- hard-coded coordinates go through scaled / scaled_point / scaled_region
+- templates are read from a scaled copy of the asset tree, built once per
+  profile and kept on disk under <template_cache>/<width>x<height>/
+
+A 720x1280 device then processes 2.25x fewer pixels per screenshot and
+template match, from the same asset pack. With reduced capture
+("reduced_capture" in config) the profile follows the decimated frames. The profile only covers screens
+with the 9:16 aspect ratio; anything else keeps the 1080x1920 values.
+
+Enable it in config.json:
+
+    "resolution_profile": {"enabled": true, "size": null, "template_cache": "scaled_assets"}
+
+("size": [720, 1280] skips the device query). Without a size, the device is
+queried once the adb connection is up (main.py resolves the profile before
+the mode modules are imported); a failed query raises ResolutionError rather
+than silently using the 1080x1920 values. Pre-build a template set:
+
+    python -m utils.resolution build 720x1280
+"""
+import os
+import sys
+import argparse
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import log_debug, log_info, log_warning
+
+BASE_WIDTH, BASE_HEIGHT = 1080, 1920
+# Relative aspect ratio difference tolerated before a size is rejected
+ASPECT_TOLERANCE = 0.01
+# Asset folders that hold templates, relative to the project root
+TEMPLATE_DIRECTORIES = ("assets", "template")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ResolutionError(RuntimeError):
+    """The device screen size needed for the resolution profile could not be read"""
+
+
+class ResolutionProfile:
+    def __init__(self, width: int, height: int):
+        self.width = int(width)
+        self.height = int(height)
+        self.scale_factor = self.width / BASE_WIDTH
+
+    @property
+    def name(self) -> str:
+        return f"{self.width}x{self.height}"
+
+    @property
+    def is_base(self) -> bool:
+        return (self.width, self.height) == (BASE_WIDTH, BASE_HEIGHT)
+
+    def scale(self, value: float) -> int:
+        """A 1080x1920 length or coordinate on this profile"""
+        return int(round(value * self.scale_factor))
+
+    def point(self, x: float, y: float) -> Tuple[int, int]:
+        return self.scale(x), self.scale(y)
+
+    def region(self, box: Iterable[float]) -> tuple:
+        """
+        A 1080x1920 region on this profile. Both region formats in the tree,
+        (x1, y1, x2, y2) and (x, y, width, height), scale component-wise.
+        """
+        return tuple(self.scale(v) for v in box)
+
+    def __eq__(self, other):
+        return isinstance(other, ResolutionProfile) and (self.width, self.height) == (other.width, other.height)
+
+    def __hash__(self):
+        return hash((self.width, self.height))
+
+    def __repr__(self):
+        return f"ResolutionProfile({self.name}, scale {self.scale_factor:.4g})"
+
+
+BASE_PROFILE = ResolutionProfile(BASE_WIDTH, BASE_HEIGHT)
+
+_profile: Optional[ResolutionProfile] = None
+_template_cache_dir = os.path.join(PROJECT_ROOT, "scaled_assets")
+_lock = threading.Lock()
+# Resolved template paths, so the hot path does not stat files
+_scaled_paths: Dict[str, str] = {}
+
+
+def profile_for_size(width: int, height: int) -> ResolutionProfile:
+    """
+    Profile for a device size; the 1080x1920 profile when the size is not 9:16.
+    """
+    if width > height:
+        # Size reported in landscape orientation
+        width, height = height, width
+    expected = width * BASE_HEIGHT / BASE_WIDTH
+    if width <= 0 or abs(height - expected) > expected * ASPECT_TOLERANCE:
+        log_warning(f"Screen size {width}x{height} is not 9:16; using the {BASE_WIDTH}x{BASE_HEIGHT} coordinates")
+        return BASE_PROFILE
+    return ResolutionProfile(width, height)
+
+
+def profile_needs_device() -> bool:
+    """True while the profile still has to query the device for its screen size"""
+    if _profile is not None:
+        return False
+    from utils.config_loader import load_config_section
+
+    settings = load_config_section("resolution_profile", {}) or {}
+    return bool(settings.get("enabled", False) and not settings.get("size"))
+
+
+def _cache_dir(config: dict) -> str:
+    """Absolute template cache folder from config "resolution_profile"."""
+    cache_dir = (config.get("resolution_profile") or {}).get("template_cache", "scaled_assets")
+    return cache_dir if os.path.isabs(cache_dir) else os.path.join(PROJECT_ROOT, cache_dir)
+
+
+def _frame_profile(size: Iterable[int], factor: int) -> ResolutionProfile:
+    # Reduced capture (utils.screenshot_unified) decimates frames: the
+    # profile is the frame size, the device size divided by the factor
+    return profile_for_size(*(-(-int(v) // factor) for v in size))
+
+
+def profile_from_config(config: dict) -> Optional[ResolutionProfile]:
+    """
+    The profile a config fixes without asking the device.
+
+    Returns:
+        ResolutionProfile, or None when the device's screen size is needed
+    """
+    from utils.screenshot_unified import capture_reduce_factor
+
+    settings = config.get("resolution_profile") or {}
+    factor = capture_reduce_factor(config)
+    if not settings.get("enabled", False):
+        return BASE_PROFILE if factor == 1 else _frame_profile((BASE_WIDTH, BASE_HEIGHT), factor)
+    size = settings.get("size")
+    return _frame_profile(size, factor) if size else None
+
+
+def get_profile() -> ResolutionProfile:
+    """
+    The process's resolution profile, set up from config "resolution_profile" on first use.
+
+    Raises:
+        ResolutionError: the device size had to be queried and could not be read
+    """
+    global _profile, _template_cache_dir
+    with _lock:
+        if _profile is not None:
+            return _profile
+        from utils.config_loader import load_main_config
+        from utils.screenshot_unified import capture_reduce_factor
+
+        config = load_main_config()
+        _template_cache_dir = _cache_dir(config)
+        factor = capture_reduce_factor(config)
+        if not (config.get("resolution_profile") or {}).get("enabled", False) and factor == 1:
+            _profile = BASE_PROFILE
+            return _profile
+        profile = profile_from_config(config)
+        if profile is None:
+            from utils.screenshot import get_screen_size
+            try:
+                size = get_screen_size(strict=True)
+            except Exception as e:
+                # Never cache a profile built from a guessed size
+                raise ResolutionError(f"Could not read the device screen size ({e}); connect the device "
+                                      f"or set resolution_profile.size in config") from e
+            profile = _frame_profile(size, factor)
+        _profile = profile
+    log_info(f"Resolution profile {_profile.name} (scale {_profile.scale_factor:.4g})")
+    if not _profile.is_base:
+        build_template_set(_profile)
+    return _profile
+
+
+def set_profile(profile: Optional[ResolutionProfile]):
+    """Use profile for this process (None detects it again on next use)"""
+    global _profile
+    with _lock:
+        _profile = profile
+        _scaled_paths.clear()
+
+
+def scaled(value: float) -> int:
+    """A 1080x1920 length or coordinate on the device"""
+    return get_profile().scale(value)
+
+
+def scaled_point(x: float, y: float) -> Tuple[int, int]:
+    """A 1080x1920 screen coordinate on the device"""
+    return get_profile().point(x, y)
+
+
+def scaled_region(box: Iterable[float]) -> tuple:
+    """A 1080x1920 region on the device"""
+    return get_profile().region(box)
+
+
+def scale_regions(namespace: dict):
+    """
+    Rescale the region constants (names containing _REGION, 4-tuples) of a
+    constants module in place: scale_regions(globals()) at its end.
+    """
+    profile = get_profile()
+    if profile.is_base:
+        return
+    for name, value in list(namespace.items()):
+        if "_REGION" in name and isinstance(value, tuple) and len(value) == 4:
+            namespace[name] = profile.region(value)
+
+
+def _scaled_template_file(profile: ResolutionProfile, path: str, cache_dir: Optional[str] = None) -> Optional[str]:
+    """Location of path's scaled copy; None for images outside the project"""
+    relative = os.path.relpath(os.path.abspath(path), PROJECT_ROOT)
+    if relative.startswith(os.pardir):
+        return None
+    return os.path.join(cache_dir or _template_cache_dir, profile.name, relative)
+
+
+def _build_template(profile: ResolutionProfile, source: str, target: str) -> bool:
+    """Write the scaled copy of source to target; False when source cannot be read"""
+    import cv2
+
+    image = cv2.imread(source, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return False
+    height, width = image.shape[:2]
+    size = (max(1, profile.scale(width)), max(1, profile.scale(height)))
+    interpolation = cv2.INTER_AREA if profile.scale_factor < 1 else cv2.INTER_CUBIC
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write then rename: another instance may be reading the set
+    partial = f"{target}.{os.getpid()}.tmp{os.path.splitext(target)[1]}"
+    if not cv2.imwrite(partial, cv2.resize(image, size, interpolation=interpolation)):
+        return False
+    os.replace(partial, target)
+    return True
+
+
+def _is_stale(source: str, target: str) -> bool:
+    try:
+        return os.path.getmtime(target) < os.path.getmtime(source)
+    except OSError:
+        return True
+
+
+def build_template_set(profile: ResolutionProfile, directories: Iterable[str] = TEMPLATE_DIRECTORIES,
+                       cache_dir: Optional[str] = None) -> int:
+    """
+    Scale every template under directories for profile, skipping up-to-date copies.
+
+    Returns:
+        number of templates (re)built
+    """
+    cache_dir = cache_dir or _template_cache_dir
+    built = 0
+    for directory in directories:
+        root_dir = os.path.join(PROJECT_ROOT, directory)
+        for root, _, files in os.walk(root_dir):
+            for name in sorted(files):
+                if not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                source = os.path.join(root, name)
+                target = _scaled_template_file(profile, source, cache_dir)
+                if target and _is_stale(source, target) and _build_template(profile, source, target):
+                    built += 1
+    if built:
+        log_info(f"Built {built} templates for {profile.name} in {os.path.join(cache_dir, profile.name)}")
+    return built
+
+
+def template_set_directory(profile: ResolutionProfile, config: dict, directory: str = "assets") -> str:
+    """
+    Folder holding profile's templates for one asset folder: the folder itself
+    on the 1080x1920 profile, else its scaled copy (built here if missing or stale).
+    """
+    source = os.path.join(PROJECT_ROOT, directory)
+    if profile.is_base:
+        return source
+    cache_dir = _cache_dir(config)
+    build_template_set(profile, (directory,), cache_dir)
+    return _scaled_template_file(profile, source, cache_dir)
+
+
+def scaled_template_path(path: str) -> str:
+    """
+    Path of the template to match on this device: path itself on the
+    1080x1920 profile, else its scaled copy (built on first use if missing).
+    """
+    profile = get_profile()
+    if profile.is_base:
+        return path
+    scaled = _scaled_paths.get(path)
+    if scaled is not None:
+        return scaled
+    scaled = path
+    target = _scaled_template_file(profile, path)
+    if target is not None:
+        if not _is_stale(path, target) or _build_template(profile, path, target):
+            scaled = target
+        else:
+            log_debug(f"No scaled template for {path}; matching the original")
+    with _lock:
+        _scaled_paths[path] = scaled
+    return scaled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build scaled template sets for resolution profiles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="scale every template for a device size")
+    build.add_argument("size", help="device size, e.g. 720x1280")
+    build.add_argument("--cache", help="template cache folder (default: config resolution_profile.template_cache)")
+    args = parser.parse_args()
+
+    global _template_cache_dir
+    from utils.config_loader import load_config_section
+
+    settings = dict(load_config_section("resolution_profile", {}) or {})
+    if args.cache:
+        settings["template_cache"] = args.cache
+    _template_cache_dir = _cache_dir({"resolution_profile": settings})
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    profile = profile_for_size(width, height)
+    if profile.is_base:
+        log_info(f"{profile.name} uses the original templates; nothing to build")
+        return
+    built = build_template_set(profile)
+    log_info(f"{profile.name}: {built} templates built, the rest were up to date")
+
+
+if __name__ == "__main__":
+    main()
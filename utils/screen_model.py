@@ -0,0 +1,313 @@
+"""
+Screen transition model for the lobby loop's screen checks.
+
+The lobby loop identifies the current screen by probing templates in a fixed
+priority order (claw machine, OK button, event, ..., career lobby). What
+comes next is very predictable from what just happened: after a training
+tap it is almost always an event or the lobby, after a race the result
+screens. The model counts P(next screen | last screen, last action) from
+recorded sessions (decision labels, utils.session_recorder) and the
+ScreenMatcher probes the likely screens first. A promoted screen that hits
+is only accepted once the screens ahead of it in the fixed order that could
+show on the same frame have been ruled out, so overlapping screens (an OK
+popup over the lobby) resolve exactly as in the fixed order. Full screens
+(EXCLUSIVE_SCREENS) never show together, so those need no probe: that and
+the screens behind the hit are the saving.
+
+Only screens whose probability clears min_probability (with at least
+min_samples observations of the situation) are moved ahead; the rest keep
+the fixed order, so an untrained or unsure model probes exactly as before.
+
+Build a model from recorded sessions:
+
+    python -m utils.screen_model sessions/session_A sessions/session_B -o screen_model.json
+
+and enable it in config.json:
+
+    "screen_model": {"enabled": true, "path": "screen_model.json"}
+
+("exclusive_screens" replaces the EXCLUSIVE_SCREENS list.)
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import log_debug, log_info, log_warning
+
+FORMAT_VERSION = 1
+
+# Lobby-loop decisions taken on a screen found by the screen checks; every
+# other decision is taken in the career lobby
+SCREEN_OF_ACTION = {
+    "claw_machine": "claw",
+    "ok_button": "ok",
+    "event": "event",
+    "inspiration": "inspiration",
+    "cancel_button": "cancel",
+    "close_button": "close",
+    "next_button": "next",
+    "not_in_lobby": "unknown",
+}
+LOBBY = "lobby"
+UNKNOWN = "unknown"
+
+# Screens that fill the display: no two of them show on the same frame.
+# Popups and dialogs (OK, event choices, cancel, ...) may sit over any screen.
+EXCLUSIVE_SCREENS = frozenset({"complete_career", "claw", "unity_cup", LOBBY})
+
+
+def screen_of(action: str) -> str:
+    """Screen a lobby-loop decision was taken on"""
+    return SCREEN_OF_ACTION.get(action, LOBBY)
+
+
+def _key(screen: Optional[str], action: Optional[str]) -> str:
+    return f"{screen or UNKNOWN}|{action or ''}"
+
+
+class TransitionModel:
+    """Counts of next screen per (last screen, last action)"""
+
+    def __init__(self, counts: Optional[Dict[str, Dict[str, int]]] = None):
+        self.counts: Dict[str, Counter] = {key: Counter(nexts) for key, nexts in (counts or {}).items()}
+
+    def observe(self, last_screen: Optional[str], last_action: Optional[str], next_screen: str):
+        self.counts.setdefault(_key(last_screen, last_action), Counter())[next_screen] += 1
+
+    def samples(self, last_screen: Optional[str], last_action: Optional[str]) -> int:
+        return sum(self.counts.get(_key(last_screen, last_action), {}).values())
+
+    def probabilities(self, last_screen: Optional[str], last_action: Optional[str]) -> Dict[str, float]:
+        nexts = self.counts.get(_key(last_screen, last_action))
+        if not nexts:
+            return {}
+        total = sum(nexts.values())
+        return {screen: count / total for screen, count in nexts.items()}
+
+    def order(self, screens: List[str], last_screen: Optional[str], last_action: Optional[str],
+              min_probability: float = 0.5, min_samples: int = 5) -> List[str]:
+        """
+        Probe order for the given screens (listed in fixed priority order).
+
+        Screens at least min_probability likely come first, most likely first;
+        the others follow in their fixed order.
+        """
+        if self.samples(last_screen, last_action) < min_samples:
+            return list(screens)
+        probabilities = self.probabilities(last_screen, last_action)
+        likely = sorted((s for s in screens if probabilities.get(s, 0.0) >= min_probability),
+                        key=lambda s: -probabilities[s])
+        return likely + [s for s in screens if s not in likely]
+
+    def learn_decisions(self, actions: Iterable[str]):
+        """Observe the transitions in one run's sequence of decision actions"""
+        last_screen = last_action = None
+        for action in actions:
+            screen = screen_of(action)
+            if last_action is not None:
+                self.observe(last_screen, last_action, screen)
+            last_screen, last_action = screen, action
+
+    @classmethod
+    def from_sessions(cls, session_dirs: Iterable[str]) -> "TransitionModel":
+        from utils.session_recorder import SessionReader
+
+        model = cls()
+        for session_dir in session_dirs:
+            reader = SessionReader(session_dir)
+            model.learn_decisions(record["label"] for record in reader.label_records)
+        return model
+
+    def to_dict(self) -> dict:
+        return {"version": FORMAT_VERSION,
+                "transitions": {key: dict(nexts) for key, nexts in sorted(self.counts.items())}}
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "TransitionModel":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported screen model version {data.get('version')}")
+        return cls(data.get("transitions", {}))
+
+
+class ScreenMatcher:
+    """
+    Runs the lobby loop's screen probes in the order the model predicts.
+
+    The last decision (from the trace's decision marks) is the situation the
+    next identify() call predicts from. Statistics compare the probes run
+    with the probes the fixed order would have run on the same screen.
+    """
+
+    def __init__(self, model: Optional[TransitionModel] = None, min_probability: float = 0.5,
+                 min_samples: int = 5, exclusive_screens: Iterable[str] = EXCLUSIVE_SCREENS):
+        self.model = model
+        self.min_probability = min_probability
+        self.min_samples = min_samples
+        self.exclusive_screens = frozenset(exclusive_screens)
+        self.last_screen: Optional[str] = None
+        self.last_action: Optional[str] = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.identifications = 0
+        self.probes = 0
+        self.baseline_probes = 0
+        self.predicted_first = 0
+        self.predicted_hits = 0
+        self.turns = 0
+
+    def on_mark(self, name: str, args: dict):
+        if name != "decision":
+            return
+        from utils.bot_control import TURN_ACTIONS
+
+        action = args.get("action")
+        with self._lock:
+            self.last_screen, self.last_action = screen_of(action), action
+            if action in TURN_ACTIONS:
+                self.turns += 1
+
+    def can_overlap(self, screen: str, other: str) -> bool:
+        """True unless both screens fill the display"""
+        return not (screen in self.exclusive_screens and other in self.exclusive_screens)
+
+    def identify(self, probes: List[Tuple[str, Callable[[], Any]]]) -> Tuple[Optional[str], Any]:
+        """
+        Find the current screen.
+
+        Args:
+            probes: (screen, check) in fixed priority order; check() returns a
+                truthy result (e.g. the matches) when the screen is showing
+
+        Returns:
+            (screen, result) of the first probe in fixed order that hits,
+            or (None, None)
+        """
+        names = [name for name, _ in probes]
+        checks = dict(probes)
+        with self._lock:
+            last_screen, last_action = self.last_screen, self.last_action
+        order = names
+        if self.model is not None:
+            order = self.model.order(names, last_screen, last_action, self.min_probability, self.min_samples)
+        reordered = order[0] != names[0]
+
+        screen, result, run = None, None, 0
+        probed = set()
+        for name in order:
+            run += 1
+            probed.add(name)
+            result = checks[name]()
+            if result:
+                screen = name
+                break
+        else:
+            result = None
+
+        if screen is not None:
+            # A promoted screen keeps the fixed order's precedence: the screens
+            # ahead of it that were not probed yet and could show with it must miss
+            for name in names[:names.index(screen)]:
+                if name in probed or not self.can_overlap(name, screen):
+                    continue
+                run += 1
+                earlier = checks[name]()
+                if earlier:
+                    screen, result = name, earlier
+                    break
+
+        baseline = names.index(screen) + 1 if screen is not None else len(names)
+        with self._lock:
+            self.identifications += 1
+            self.probes += run
+            self.baseline_probes += baseline
+            if reordered:
+                self.predicted_first += 1
+                if screen == order[0]:
+                    self.predicted_hits += 1
+        log_debug(f"Screen {screen or UNKNOWN} after {run} probe(s) (fixed order: {baseline})")
+        return screen, result
+
+    def stats(self) -> dict:
+        with self._lock:
+            saved = self.baseline_probes - self.probes
+            return {
+                "identifications": self.identifications,
+                "probes": self.probes,
+                "baseline_probes": self.baseline_probes,
+                "probes_saved": saved,
+                "turns": self.turns,
+                "probes_saved_per_turn": round(saved / self.turns, 2) if self.turns else 0.0,
+                "predicted_first": self.predicted_first,
+                "prediction_hit_rate": round(self.predicted_hits / self.predicted_first, 3)
+                if self.predicted_first else 0.0,
+            }
+
+    def log_stats(self):
+        stats = self.stats()
+        if not stats["identifications"]:
+            return
+        log_info(f"Screen checks: {stats['probes']} probes for {stats['identifications']} screens, "
+                 f"{stats['probes_saved']} saved ({stats['probes_saved_per_turn']}/turn over "
+                 f"{stats['turns']} turns), predictions right {stats['prediction_hit_rate']:.0%}")
+
+
+_matcher: Optional[ScreenMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> ScreenMatcher:
+    """The process's ScreenMatcher, set up from config "screen_model" on first use"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is not None:
+            return _matcher
+        from utils.config_loader import load_config_section
+        from utils.trace import add_mark_listener
+
+        settings = load_config_section("screen_model", {}) or {}
+        model = None
+        if settings.get("enabled", False):
+            path = settings.get("path", "screen_model.json")
+            try:
+                model = TransitionModel.load(path)
+                log_info(f"Screen model loaded from {path} ({len(model.counts)} situations)")
+            except (OSError, ValueError) as e:
+                log_warning(f"Screen model {path} not loaded ({e}); using the fixed screen check order")
+        _matcher = ScreenMatcher(model, settings.get("min_probability", 0.5), settings.get("min_samples", 5),
+                                 settings.get("exclusive_screens", EXCLUSIVE_SCREENS))
+        add_mark_listener(_matcher.on_mark)
+        return _matcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn the screen transition model from recorded sessions")
+    parser.add_argument("sessions", nargs="+", help="recorded session directories (index.jsonl)")
+    parser.add_argument("-o", "--output", default="screen_model.json")
+    args = parser.parse_args()
+
+    model = TransitionModel.from_sessions(args.sessions)
+    model.save(args.output)
+    log_info(f"Screen model with {len(model.counts)} situations written to {args.output}")
+    for key, nexts in sorted(model.counts.items(), key=lambda item: -sum(item[1].values())):
+        total = sum(nexts.values())
+        top, count = nexts.most_common(1)[0]
+        log_info(f"  {key:<32}{total:>6} -> {top} {count / total:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ from utils.screenshot_unified import (
     enhanced_screenshot_for_failure,
     enhanced_screenshot_for_year,
     capture_region,
+    crop_for_ocr,
     get_unified_screenshot,
     UnifiedScreenshot
 )
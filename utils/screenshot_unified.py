@@ -1,14 +1,18 @@
 import os
-import json
 import ctypes
 import time
+import weakref
 import statistics
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from typing import Optional, Union
 from PIL import Image, ImageEnhance
 import numpy as np
 from utils.device import run_adb
+from utils.replay import start_replay
+from utils.session_recorder import get_recorder
 from utils.log import log_debug, log_info, log_warning, log_error
+from utils.profiler import timed
+from utils.config_loader import load_main_config
 
 
 class NemuIpcIncompatible(Exception):
@@ -246,6 +250,10 @@ class AdbCapture:
 
     def screenshot(self) -> Image.Image:
         """Take screenshot using ADB"""
+        return Image.fromarray(self.screenshot_array(), 'RGBA')
+
+    def screenshot_array(self) -> np.ndarray:
+        """Take screenshot using ADB as an RGBA array viewing the screencap output (no copy)"""
         try:
             result = run_adb(['shell', 'screencap'], binary=True, add_input_delay=False)
             if result is None:
@@ -257,10 +265,9 @@ class AdbCapture:
             width = int.from_bytes(cleaned_result[0:4], byteorder='little')
             height = int.from_bytes(cleaned_result[4:8], byteorder='little')
 
-            pixel_data = cleaned_result[16:]  # Skip the header (16 bytes)
-
-            img = Image.frombytes('RGBA', (width, height), pixel_data)
-            return img
+            # Pixels follow the 16-byte header
+            pixels = np.frombuffer(cleaned_result, dtype=np.uint8, count=width * height * 4, offset=16)
+            return pixels.reshape((height, width, 4))
         except Exception as e:
             log_error(f"Error taking ADB screenshot: {e}")
             raise
@@ -269,12 +276,29 @@ class AdbCapture:
 class UnifiedScreenshot:
     """Unified screenshot system that can use either ADB or Nemu IPC"""
 
-    def __init__(self):
-        self.config = self._load_config()
+    def __init__(self, config: Optional[dict] = None):
+        self.config = config if config is not None else self._load_config()
         self.capture_method = self.config.get('capture_method', 'adb')
         self.nemu_capture = None
         self.adb_capture = None
+        self.replay_capture = None
+        self.replay_sink = None
         self.adb_config = self.config.get('adb_config', {})
+        # Frames are decimated by this factor (config "reduced_capture"); OCR
+        # crops still come from the full-resolution buffer of the last frame
+        self.reduce_factor = capture_reduce_factor(self.config)
+        self._last_full = None
+
+        # Recorded session instead of a device (offline benchmarking / regression tests)
+        if self.capture_method == 'replay':
+            replay_config = self.config.get('replay_config', {})
+            self.replay_capture, self.replay_sink = start_replay(
+                replay_config.get('session_dir', 'sessions/replay'),
+                advance=replay_config.get('advance'),
+                on_end=replay_config.get('on_end'),
+                input_latency=replay_config.get('input_latency_ms', 0) / 1000.0,
+            )
+            log_info(f"Using replay capture method: {replay_config.get('session_dir', 'sessions/replay')}")
 
         # Initialize capture method
         if self.capture_method == 'nemu_ipc':
@@ -306,43 +330,97 @@ class UnifiedScreenshot:
     def _load_config(self) -> dict:
         """Load configuration from config.json"""
         try:
-            with open('config.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_main_config()
         except Exception as e:
             log_error(f"Error loading config: {e}")
             return {}
 
+    @timed("take_screenshot")
     def take_screenshot(self) -> Image.Image:
         """Take screenshot using the configured capture method"""
+        img = self._capture()
+        recorder = get_recorder()
+        if recorder is not None:
+            recorder.add_frame(img)
+        return img
+
+    def _capture(self) -> Image.Image:
+        if self.capture_method == 'replay':
+            frame = self.replay_capture.screenshot()
+            if self.reduce_factor == 1:
+                return frame
+            return self._reduce(np.asarray(frame.convert('RGBA')))
+
+        full = self._capture_array()
+        if self.reduce_factor == 1:
+            return Image.fromarray(full, 'RGBA')
+        return self._reduce(full)
+
+    def _capture_array(self) -> np.ndarray:
+        """Full-resolution RGBA frame, as a view of the capture buffer where possible"""
         if self.capture_method == 'nemu_ipc' and self.nemu_capture:
             try:
                 # Use Nemu IPC capture
                 with self.nemu_capture:
                     # Nemu IPC returns RGBA directly - NO conversion needed!
-                    rgba_array = self.nemu_capture.screenshot()
-                    
-                    # Only flip vertically, no color conversion
-                    flipped_array = np.flip(rgba_array, axis=0)
-                    
-                    # Convert to PIL Image
-                    img = Image.fromarray(flipped_array, 'RGBA')
-                    return img
+                    # Only flip vertically (a view; the PIL conversion copies)
+                    return self.nemu_capture.screenshot()[::-1]
             except Exception as e:
                 log_error(f"Nemu IPC capture failed: {e}")
                 log_info("Falling back to ADB capture")
                 self.capture_method = 'adb'
 
         # Fallback to ADB capture
-        if self.adb_capture:
-            return self.adb_capture.screenshot()
-        else:
+        if not self.adb_capture:
             # Initialize ADB capture if not already done
             self.adb_capture = AdbCapture(self.adb_config)
-            return self.adb_capture.screenshot()
+        return self.adb_capture.screenshot_array()
+
+    def _reduce(self, full: np.ndarray) -> Image.Image:
+        """Decimated frame of a full-resolution RGBA array; the array is kept for OCR crops"""
+        import cv2
+
+        factor = self.reduce_factor
+        height, width = full.shape[:2]
+        # Area averaging (factor x factor mean pooling), as the scaled templates
+        # are built (utils.resolution); plain striding aliases thin edges and
+        # costs template scores
+        size = (-(-width // factor), -(-height // factor))
+        frame = Image.fromarray(cv2.resize(full, size, interpolation=cv2.INTER_AREA), 'RGBA')
+        self._last_full = (weakref.ref(frame), full)
+        return frame
+
+    def full_resolution_crop(self, region, screenshot=None) -> Image.Image:
+        """
+        Crop of screenshot at device resolution, for OCR.
+
+        Args:
+            region: (x1, y1, x2, y2) in screenshot coordinates
+            screenshot: frame from take_screenshot(); None captures one
+
+        Returns:
+            PIL Image: region from the full-resolution buffer of the last
+            frame when screenshot is that frame, else screenshot's crop
+            (upscaled when frames are reduced)
+        """
+        if screenshot is None:
+            screenshot = self.take_screenshot()
+        factor = self.reduce_factor
+        if factor == 1:
+            return screenshot.crop(region)
+        last = self._last_full
+        if last is not None and last[0]() is screenshot:
+            x1, y1, x2, y2 = (int(v) * factor for v in region)
+            return Image.fromarray(np.ascontiguousarray(last[1][y1:y2, x1:x2]), 'RGBA')
+        log_debug(f"No full-resolution buffer for this frame; upscaling the reduced crop {region}")
+        cropped = screenshot.crop(region)
+        return cropped.resize((cropped.width * factor, cropped.height * factor), Image.BICUBIC)
 
-    def get_screen_size(self) -> tuple:
-        """Get screen size"""
+    def get_screen_size(self, strict: bool = False) -> tuple:
+        """Get screen size (1080x1920 when it cannot be read, unless strict: then the error is raised)"""
         try:
+            if self.capture_method == 'replay':
+                return self.replay_capture.size
             if self.capture_method == 'nemu_ipc' and self.nemu_capture:
                 with self.nemu_capture:
                     self.nemu_capture.get_resolution()
@@ -363,6 +441,8 @@ class UnifiedScreenshot:
                     screenshot = self.take_screenshot()
                     return screenshot.size
         except Exception as e:
+            if strict:
+                raise
             log_error(f"Error getting screen size: {e}")
             # Default fallback size
             return 1080, 1920
@@ -370,9 +450,7 @@ class UnifiedScreenshot:
     def enhanced_screenshot(self, region, screenshot=None):
         """Take a screenshot of a specific region with enhancement"""
         try:
-            if screenshot is None:
-                screenshot = self.take_screenshot()
-            cropped = screenshot.crop(region)
+            cropped = self.full_resolution_crop(region, screenshot)
 
             # Resize for better OCR (same as PC version)
             cropped = cropped.resize((cropped.width * 2, cropped.height * 2), Image.BICUBIC)
@@ -392,9 +470,7 @@ class UnifiedScreenshot:
     def enhanced_screenshot_for_failure(self, region, screenshot=None):
         """Enhanced screenshot specifically optimized for white and yellow text on orange background"""
         try:
-            if screenshot is None:
-                screenshot = self.take_screenshot()
-            cropped = screenshot.crop(region)
+            cropped = self.full_resolution_crop(region, screenshot)
 
             # Resize for better OCR
             cropped = cropped.resize((cropped.width * 2, cropped.height * 2), Image.BICUBIC)
@@ -455,9 +531,7 @@ class UnifiedScreenshot:
     def enhanced_screenshot_for_year(self, region, screenshot=None):
         """Take a screenshot optimized for year detection"""
         try:
-            if screenshot is None:
-                screenshot = self.take_screenshot()
-            cropped = screenshot.crop(region)
+            cropped = self.full_resolution_crop(region, screenshot)
 
             # Enhance for year text detection
             enhancer = ImageEnhance.Contrast(cropped)
@@ -474,13 +548,23 @@ class UnifiedScreenshot:
     def capture_region(self, region):
         """Capture a specific region of the screen"""
         try:
-            screenshot = self.take_screenshot()
-            return screenshot.crop(region)
+            return self.full_resolution_crop(region)
         except Exception as e:
             log_error(f"Error capturing region: {e}")
             raise
 
 
+def capture_reduce_factor(config: dict) -> int:
+    """
+    Decimation factor of captured frames from config "reduced_capture"
+    ({"enabled": true, "factor": 2}); 1 when disabled.
+    """
+    settings = config.get('reduced_capture') or {}
+    if not settings.get('enabled', False):
+        return 1
+    return max(1, int(settings.get('factor', 2)))
+
+
 # Global instance for backward compatibility
 _unified_screenshot = None
 
@@ -493,22 +577,42 @@ def get_unified_screenshot() -> UnifiedScreenshot:
     return _unified_screenshot
 
 
+def use_replay_capture(session_dir: str, advance: Optional[str] = None, on_end: Optional[str] = None,
+                       input_latency_ms: float = 0) -> UnifiedScreenshot:
+    """
+    Replace the global capture with a replay of a recorded session directory.
+
+    Inputs sent through run_adb are logged by the returned instance's
+    replay_sink and drive the replay to its next frame (after input_latency_ms).
+    """
+    global _unified_screenshot
+    _unified_screenshot = UnifiedScreenshot({
+        'capture_method': 'replay',
+        'replay_config': {'session_dir': session_dir, 'advance': advance, 'on_end': on_end,
+                          'input_latency_ms': input_latency_ms},
+    })
+    return _unified_screenshot
+
+
 def take_screenshot() -> Image.Image:
     """Take screenshot using the configured capture method (backward compatibility)"""
     return get_unified_screenshot().take_screenshot()
 
 
-def get_screen_size() -> tuple:
+def get_screen_size(strict: bool = False) -> tuple:
     """Get screen size using the configured capture method (backward compatibility)"""
-    return get_unified_screenshot().get_screen_size()
+    return get_unified_screenshot().get_screen_size(strict)
+
+
+def crop_for_ocr(screenshot, region) -> Image.Image:
+    """Crop of region for OCR at device resolution (see UnifiedScreenshot.full_resolution_crop)"""
+    return get_unified_screenshot().full_resolution_crop(region, screenshot)
 
 
 def enhanced_screenshot(region, screenshot=None):
     """Take a screenshot of a specific region with enhancement (backward compatibility)"""
     try:
-        if screenshot is None:
-            screenshot = take_screenshot()
-        cropped = screenshot.crop(region)
+        cropped = crop_for_ocr(screenshot, region)
 
         # Resize for better OCR (same as PC version)
         cropped = cropped.resize((cropped.width * 2, cropped.height * 2), Image.BICUBIC)
@@ -529,9 +633,7 @@ def enhanced_screenshot(region, screenshot=None):
 def enhanced_screenshot_for_failure(region, screenshot=None):
     """Enhanced screenshot specifically optimized for white and yellow text on orange background (backward compatibility)"""
     try:
-        if screenshot is None:
-            screenshot = take_screenshot()
-        cropped = screenshot.crop(region)
+        cropped = crop_for_ocr(screenshot, region)
 
         # Resize for better OCR
         cropped = cropped.resize((cropped.width * 2, cropped.height * 2), Image.BICUBIC)
@@ -593,9 +695,7 @@ def enhanced_screenshot_for_failure(region, screenshot=None):
 def enhanced_screenshot_for_year(region, screenshot=None):
     """Take a screenshot optimized for year detection (backward compatibility)"""
     try:
-        if screenshot is None:
-            screenshot = take_screenshot()
-        cropped = screenshot.crop(region)
+        cropped = crop_for_ocr(screenshot, region)
 
         # Enhance for year text detection
         enhancer = ImageEnhance.Contrast(cropped)
@@ -613,8 +713,7 @@ def enhanced_screenshot_for_year(region, screenshot=None):
 def capture_region(region):
     """Capture a specific region of the screen (backward compatibility)"""
     try:
-        screenshot = take_screenshot()
-        return screenshot.crop(region)
+        return crop_for_ocr(None, region)
     except Exception as e:
         log_error(f"Error capturing region: {e}")
         raise
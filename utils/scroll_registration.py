@@ -0,0 +1,108 @@
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.log import log_debug
+
+
+def _region_gray(img, region) -> np.ndarray:
+    """Crop region (x1, y1, x2, y2) from a PIL image or numpy array as grayscale uint8"""
+    if not isinstance(img, np.ndarray):
+        img = np.asarray(img.convert("RGB"))
+    x1, y1, x2, y2 = region
+    crop = img[y1:y2, x1:x2]
+    if crop.ndim == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    return np.ascontiguousarray(crop)
+
+
+def frame_difference(prev_img, curr_img, region) -> float:
+    """Mean absolute grayscale difference between two frames inside region"""
+    prev = _region_gray(prev_img, region)
+    curr = _region_gray(curr_img, region)
+    if prev.shape != curr.shape:
+        return 255.0
+    return float(cv2.absdiff(prev, curr).mean())
+
+
+def estimate_vertical_offset(prev_img, curr_img, region, band_height=96, min_confidence=0.85,
+                             still_tolerance=1.0) -> Tuple[Optional[int], float]:
+    """
+    Estimate how far a vertically scrolling list moved between two frames.
+
+    Textured horizontal bands from the lower part of the previous frame
+    (content scrolls up, so they stay visible longest) are located in the
+    current frame with normalized template matching.
+
+    Args:
+        prev_img, curr_img: PIL Images (or RGB arrays) of consecutive frames
+        region: (x1, y1, x2, y2) of the scrolling list on screen
+        band_height: height of the reference band in pixels
+        min_confidence: minimum match score to trust the estimate
+        still_tolerance: mean pixel difference under which the frames count as identical
+
+    Returns:
+        (offset, confidence): offset in pixels, positive when the list scrolled
+        down (content moved up); offset is None when the band could not be found
+    """
+    prev = _region_gray(prev_img, region)
+    curr = _region_gray(curr_img, region)
+    if prev.shape != curr.shape or prev.shape[0] <= band_height:
+        return None, 0.0
+
+    # Unchanged frame: nothing moved, no need to search
+    if float(cv2.absdiff(prev, curr).mean()) <= still_tolerance:
+        return 0, 1.0
+
+    # Try textured bands from the bottom up: the lowest band survives the longest
+    # scroll, and flat bands (background only) would match anywhere
+    height = prev.shape[0]
+    step = max(band_height // 2, 1)
+    best_confidence = 0.0
+    for band_y in range(height - band_height, height // 2 - 1, -step):
+        band = prev[band_y:band_y + band_height]
+        if float(band.std()) < 2.0:
+            continue
+        result = cv2.matchTemplate(curr, band, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        if max_val >= min_confidence:
+            # Repeated UI (identical buttons on every row) can match several rows; skip ambiguous bands
+            suppress_from = max(max_loc[1] - band_height // 2, 0)
+            result[suppress_from:max_loc[1] + band_height // 2 + 1] = -1.0
+            if float(result.max()) >= min_confidence:
+                continue
+            offset = band_y - max_loc[1]
+            log_debug(f"Scroll registration: offset {offset}px (confidence {max_val:.3f}, band y={band_y})")
+            return int(offset), float(max_val)
+        best_confidence = max(best_confidence, float(max_val))
+
+    log_debug(f"Scroll registration failed (best confidence {best_confidence:.3f})")
+    return None, best_confidence
+
+
+def wait_for_stable_frame(capture, region, interval=0.15, timeout=2.0, tolerance=1.0):
+    """
+    Capture frames until the region stops changing (e.g. a scroll animation settles).
+
+    Args:
+        capture: callable returning a PIL Image (e.g. take_screenshot)
+        region: (x1, y1, x2, y2) to compare between frames
+        interval: seconds between captures
+        timeout: maximum seconds to wait before returning the latest frame
+        tolerance: mean pixel difference under which two frames count as identical
+
+    Returns:
+        PIL Image: the last captured frame
+    """
+    deadline = time.time() + timeout
+    frame = capture()
+    while time.time() < deadline:
+        time.sleep(interval)
+        next_frame = capture()
+        if frame_difference(frame, next_frame, region) <= tolerance:
+            return next_frame
+        frame = next_frame
+    log_debug(f"Frame did not settle within {timeout}s")
+    return frame
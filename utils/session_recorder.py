@@ -0,0 +1,409 @@
+import io
+import os
+import json
+import time
+import zlib
+import queue
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image, features
+
+from utils.log import log_debug, log_info, log_warning
+
+# Session corpus layout:
+#   index.jsonl            append-only records (session header, frames, captures, inputs, labels, evictions)
+#   chunks/chunk_NNNNN.bin concatenated encoded frames
+# Only unique frames (by content hash) are stored. Within a chunk, a frame is stored
+# either as a lossless keyframe (WebP lossless, PNG fallback) or as zlib(XOR with the
+# previous frame) when that is smaller; chunks start with a keyframe so each chunk
+# decodes on its own, and the oldest chunks are evicted to stay under max_bytes.
+INDEX_FILE = "index.jsonl"
+CHUNK_DIR = "chunks"
+FORMAT_VERSION = 1
+
+_KEYFRAME_CODEC = "webp" if features.check("webp") else "png"
+
+
+def _frame_array(img) -> np.ndarray:
+    """Frames are stored as RGB (ADB/Nemu alpha is always opaque)"""
+    if isinstance(img, np.ndarray):
+        return np.ascontiguousarray(img[..., :3])
+    return np.asarray(img.convert("RGB"))
+
+
+def frame_hash(arr: np.ndarray) -> str:
+    return hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest()
+
+
+def _encode_keyframe(arr: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    if _KEYFRAME_CODEC == "webp":
+        Image.fromarray(arr).save(buffer, "WEBP", lossless=True, method=1)
+    else:
+        Image.fromarray(arr).save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def _decode_keyframe(data: bytes) -> np.ndarray:
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+class SessionRecorder:
+    """
+    Records captured frames, inputs and screen labels into a session corpus.
+
+    Hashing, encoding and all index writes run on one background thread;
+    the add_* calls only queue the event.
+    """
+
+    def __init__(self, session_dir: str, max_bytes: int = 500 * 1024 * 1024, chunk_frames: int = 64,
+                 keyframe_interval: int = 16):
+        self.session_dir = session_dir
+        self.max_bytes = max_bytes
+        self.chunk_frames = max(int(chunk_frames), 1)
+        self.keyframe_interval = max(int(keyframe_interval), 1)
+        os.makedirs(os.path.join(session_dir, CHUNK_DIR), exist_ok=True)
+
+        self._start = time.perf_counter()
+        self._index = open(os.path.join(session_dir, INDEX_FILE), "w", encoding="utf-8")
+        self._frame_ids: Dict[str, str] = {}
+        self._last_frame_id: Optional[str] = None
+        self._frame_count = 0
+        self.captures = 0
+        self.inputs = 0
+
+        # Writer state (background thread only)
+        self._chunk_index = -1
+        self._chunk_file = None
+        self._chunk_offset = 0
+        self._chunk_count = 0
+        self._chunk_sizes: Dict[int, int] = {}
+        # Digests stored in each chunk, forgotten on eviction so those screens are stored again
+        self._chunk_digests: Dict[int, List[str]] = {}
+        self._previous: Optional[np.ndarray] = None
+        self._since_keyframe = 0
+        self._keyframe_size = 0
+        self.bytes_written = 0
+
+        self._write_record({
+            "type": "session",
+            "version": FORMAT_VERSION,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "codec": _KEYFRAME_CODEC,
+        })
+        self._queue: "queue.Queue" = queue.Queue(maxsize=16)
+        self._writer = threading.Thread(target=self._write_loop, name="session-recorder", daemon=True)
+        self._writer.start()
+        log_info(f"Recording session to {session_dir} (limit {max_bytes // (1024 * 1024)} MB)")
+
+    def _now(self) -> float:
+        return round(time.perf_counter() - self._start, 4)
+
+    def _write_record(self, record: dict):
+        self._index.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._index.flush()
+
+    def add_frame(self, img):
+        """Record a capture; hashing and storage happen on the writer thread"""
+        self.captures += 1
+        # Blocks if encoding falls behind, so no unique frame is lost
+        self._queue.put(("capture", self._now(), img))
+
+    def add_input(self, kind: str, args: list):
+        """Record an input sent while the last captured frame was on screen"""
+        self.inputs += 1
+        self._queue.put(("input", self._now(), kind, args))
+
+    def add_label(self, label: str, **details):
+        """Label the last captured frame with the recognized screen state / decision"""
+        self._queue.put(("label", self._now(), label, details))
+
+    def _open_chunk(self):
+        if self._chunk_file is not None:
+            self._chunk_file.close()
+        self._chunk_index += 1
+        self._chunk_file = open(self._chunk_path(self._chunk_index), "wb")
+        self._chunk_offset = 0
+        self._chunk_count = 0
+        self._chunk_sizes[self._chunk_index] = 0
+        self._chunk_digests[self._chunk_index] = []
+        self._previous = None
+
+    def _chunk_path(self, chunk: int) -> str:
+        return os.path.join(self.session_dir, CHUNK_DIR, f"chunk_{chunk:05d}.bin")
+
+    def _write_loop(self):
+        # Single consumer: index records keep the order in which events happened
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                kind, t = item[0], item[1]
+                if kind == "capture":
+                    self._capture(t, item[2])
+                elif kind == "input":
+                    self._write_record({"type": "input", "t": t, "frame": self._last_frame_id,
+                                        "input": item[2], "args": item[3]})
+                elif kind == "label" and self._last_frame_id is not None:
+                    record = {"type": "label", "t": t, "frame": self._last_frame_id, "label": item[2]}
+                    if item[3]:
+                        record["details"] = item[3]
+                    self._write_record(record)
+            except Exception as e:
+                log_warning(f"Session recorder could not store {item[0]}: {e}")
+
+    def _capture(self, t: float, img):
+        arr = _frame_array(img)
+        digest = frame_hash(arr)
+        frame_id = self._frame_ids.get(digest)
+        if frame_id is None:
+            frame_id = f"f{self._frame_count:06d}"
+            self._frame_count += 1
+            self._frame_ids[digest] = frame_id
+            self._store(frame_id, digest, arr)
+        self._last_frame_id = frame_id
+        self._write_record({"type": "capture", "t": t, "frame": frame_id})
+
+    def _store(self, frame_id: str, digest: str, arr: np.ndarray):
+        if self._chunk_file is None or self._chunk_count >= self.chunk_frames:
+            self._open_chunk()
+
+        encoding = "key"
+        data = None
+        if (self._previous is not None and self._previous.shape == arr.shape
+                and self._since_keyframe < self.keyframe_interval):
+            delta = zlib.compress(np.bitwise_xor(arr, self._previous).tobytes(), 6)
+            # Mostly-unchanged frames compress far below a keyframe
+            if len(delta) < self._keyframe_size // 2:
+                encoding, data = "delta", delta
+        if data is None:
+            data = _encode_keyframe(arr)
+            self._keyframe_size = len(data)
+            self._since_keyframe = 0
+        else:
+            self._since_keyframe += 1
+
+        self._chunk_file.write(data)
+        self._chunk_file.flush()
+        self._write_record({
+            "type": "frame", "id": frame_id, "hash": digest,
+            "chunk": self._chunk_index, "offset": self._chunk_offset, "length": len(data),
+            "encoding": encoding, "shape": list(arr.shape),
+        })
+        self._chunk_offset += len(data)
+        self._chunk_count += 1
+        self._chunk_sizes[self._chunk_index] += len(data)
+        self._chunk_digests[self._chunk_index].append(digest)
+        self.bytes_written += len(data)
+        self._previous = arr
+        self._evict()
+
+    def _evict(self):
+        """Delete the oldest finished chunks while the corpus is over budget"""
+        while sum(self._chunk_sizes.values()) > self.max_bytes and len(self._chunk_sizes) > 1:
+            oldest = min(self._chunk_sizes)
+            try:
+                os.remove(self._chunk_path(oldest))
+            except OSError as e:
+                log_warning(f"Could not evict chunk {oldest}: {e}")
+            del self._chunk_sizes[oldest]
+            for digest in self._chunk_digests.pop(oldest, []):
+                self._frame_ids.pop(digest, None)
+            self._write_record({"type": "evict", "chunk": oldest})
+            log_debug(f"Session recorder evicted chunk {oldest}")
+
+    def close(self):
+        """Flush pending frames and close files"""
+        self._queue.put(None)
+        self._writer.join()
+        if self._chunk_file is not None:
+            self._chunk_file.close()
+        self._write_record({"type": "end", "t": self._now(), "captures": self.captures,
+                            "frames": self._frame_count, "inputs": self.inputs})
+        self._index.close()
+        log_info(f"Session recorded: {self.captures} captures, {self._frame_count} unique frames, "
+                 f"{self.inputs} inputs, {self.bytes_written / (1024 * 1024):.1f} MB")
+
+
+class SessionReader:
+    """Reads a recorded session corpus (index.jsonl + chunks)"""
+
+    def __init__(self, session_dir: str):
+        self.session_dir = session_dir
+        self.header: dict = {}
+        self.frames: Dict[str, dict] = {}
+        self.captures: List[dict] = []
+        self.inputs: List[dict] = []
+        self.labels: Dict[str, str] = {}
+        # Every label in recording order (a frame can carry several decisions)
+        self.label_records: List[dict] = []
+        self.evicted = set()
+        order = []
+
+        with open(os.path.join(session_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a session that was killed mid-write
+                    continue
+                kind = record.get("type")
+                if kind == "session":
+                    self.header = record
+                elif kind == "frame":
+                    self.frames[record["id"]] = record
+                    order.append(record["id"])
+                elif kind == "capture":
+                    self.captures.append(record)
+                elif kind == "input":
+                    self.inputs.append(record)
+                elif kind == "label":
+                    self.labels[record["frame"]] = record["label"]
+                    self.label_records.append(record)
+                elif kind == "evict":
+                    self.evicted.add(record["chunk"])
+
+        # Frames from evicted chunks (or never written) are not available
+        self.available = [fid for fid in order if self.frames[fid]["chunk"] not in self.evicted]
+        self._available_set = set(self.available)
+        self._chunk_order: Dict[int, List[str]] = {}
+        for fid in order:
+            self._chunk_order.setdefault(self.frames[fid]["chunk"], []).append(fid)
+        self._decoded: Dict[str, np.ndarray] = {}
+
+    def _read(self, record: dict) -> bytes:
+        path = os.path.join(self.session_dir, CHUNK_DIR, f"chunk_{record['chunk']:05d}.bin")
+        with open(path, "rb") as f:
+            f.seek(record["offset"])
+            return f.read(record["length"])
+
+    def frame_array(self, frame_id: str) -> np.ndarray:
+        """Decode a frame (delta frames decode from the preceding frames of their chunk)"""
+        cached = self._decoded.get(frame_id)
+        if cached is not None:
+            return cached
+        record = self.frames[frame_id]
+        if frame_id not in self._available_set:
+            raise KeyError(f"Frame {frame_id} was evicted from the session")
+
+        chunk_frames = self._chunk_order[record["chunk"]]
+        position = chunk_frames.index(frame_id)
+        # Walk back to the keyframe this frame depends on
+        start = position
+        while start > 0 and self.frames[chunk_frames[start]]["encoding"] == "delta":
+            start -= 1
+        arr = None
+        for fid in chunk_frames[start:position + 1]:
+            if fid in self._decoded:
+                arr = self._decoded[fid]
+                continue
+            rec = self.frames[fid]
+            data = self._read(rec)
+            if rec["encoding"] == "delta":
+                delta = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(rec["shape"])
+                arr = np.bitwise_xor(arr, delta)
+            else:
+                arr = _decode_keyframe(data)
+        # Keep only the latest decode per chunk; replays read mostly forward
+        for fid in chunk_frames:
+            self._decoded.pop(fid, None)
+        self._decoded[frame_id] = arr
+        return arr
+
+    def load_frame(self, frame_id: str) -> Image.Image:
+        return Image.fromarray(self.frame_array(frame_id)).convert("RGBA")
+
+    def replay_meta(self, advance: str = "on_capture") -> dict:
+        """
+        ReplaySession metadata for this corpus.
+
+        on_capture replays frames exactly in the recorded capture order;
+        on_input derives an input -> next-frame transition map from the recording.
+        """
+        frames = [{"id": fid, "label": self.labels.get(fid)} for fid in self.available]
+        script = [c["frame"] for c in self.captures if c["frame"] in self._available_set]
+        meta = {"frames": frames, "script": script, "advance": advance}
+        if advance == "on_input":
+            meta["transitions"] = self._derive_transitions()
+        return meta
+
+    def _derive_transitions(self, tap_radius: int = 40) -> Dict[str, list]:
+        """For each input, the next different frame captured after it"""
+        transitions: Dict[str, list] = {}
+        capture_index = 0
+        for entry in self.inputs:
+            source = entry.get("frame")
+            while capture_index < len(self.captures) and self.captures[capture_index]["t"] <= entry["t"]:
+                capture_index += 1
+            target = None
+            for capture in self.captures[capture_index:]:
+                if capture["frame"] != source:
+                    target = capture["frame"]
+                    break
+            if source not in self._available_set or target not in self._available_set:
+                continue
+            rule = {"input": entry["input"], "next": target}
+            args = entry.get("args", [])
+            if entry["input"] == "tap" and len(args) >= 2:
+                x, y = args[0], args[1]
+                rule["region"] = [x - tap_radius, y - tap_radius, x + tap_radius, y + tap_radius]
+            rules = transitions.setdefault(source, [])
+            if rule not in rules:
+                rules.append(rule)
+        return transitions
+
+
+# Active recorder for this process (None when not recording)
+_recorder: Optional[SessionRecorder] = None
+
+
+def get_recorder() -> Optional[SessionRecorder]:
+    return _recorder
+
+
+def start_recording(output_dir: str = "sessions", max_mb: int = 500, chunk_frames: int = 64) -> SessionRecorder:
+    """Start recording into a new timestamped directory under output_dir"""
+    global _recorder
+    from utils.trace import add_mark_listener
+
+    if _recorder is not None:
+        return _recorder
+    session_dir = os.path.join(output_dir, datetime.now().strftime("session_%Y%m%d_%H%M%S"))
+    _recorder = SessionRecorder(session_dir, max_bytes=int(max_mb) * 1024 * 1024, chunk_frames=chunk_frames)
+    # Decision marks from the lobby loop label the frame they were taken on
+    add_mark_listener(_on_mark)
+    return _recorder
+
+
+def _on_mark(name: str, args: dict):
+    if _recorder is not None and name == "decision":
+        details = {k: v for k, v in args.items() if k != "action"}
+        _recorder.add_label(str(args.get("action")), **details)
+
+
+def start_recording_from_config(config: dict) -> Optional[SessionRecorder]:
+    """Start recording if config["recording"]["enabled"] is set"""
+    recording = (config or {}).get("recording", {}) or {}
+    if not recording.get("enabled", False):
+        return None
+    return start_recording(
+        recording.get("output_dir", "sessions"),
+        recording.get("max_mb", 500),
+        recording.get("chunk_frames", 64),
+    )
+
+
+def stop_recording():
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
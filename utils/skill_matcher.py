@@ -0,0 +1,194 @@
+import re
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.log import log_debug
+
+# Character buckets for count signatures; anything else shares the last bucket,
+# which can only raise the bound, so pruning stays exact
+_SIGNATURE_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 "
+_SIGNATURE_INDEX = {c: i for i, c in enumerate(_SIGNATURE_ALPHABET)}
+_SIGNATURE_SIZE = len(_SIGNATURE_ALPHABET) + 1
+
+
+def normalize_skill_name(text: str) -> str:
+    """Lowercase and strip punctuation/extra spaces for comparison."""
+    if not text:
+        return ""
+    normalized = re.sub(r"[^\w\s]", "", text.lower())
+    return " ".join(normalized.split())
+
+
+def char_signatures(texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Character-count signatures for a batch of strings.
+
+    Returns:
+        (counts, lengths): int32 array (N, alphabet) and int32 array (N,)
+    """
+    texts = list(texts)
+    counts = np.zeros((len(texts), _SIGNATURE_SIZE), dtype=np.int32)
+    lengths = np.zeros(len(texts), dtype=np.int32)
+    other = _SIGNATURE_SIZE - 1
+    for row, text in enumerate(texts):
+        lengths[row] = len(text)
+        for c in text:
+            counts[row, _SIGNATURE_INDEX.get(c, other)] += 1
+    return counts, lengths
+
+
+def common_char_counts(counts_a: np.ndarray, counts_b: np.ndarray) -> np.ndarray:
+    """Size of the character multiset intersection for every (a, b) pair -> (A, B)"""
+    if counts_a.size == 0 or counts_b.size == 0:
+        return np.zeros((counts_a.shape[0], counts_b.shape[0]), dtype=np.int32)
+    return np.minimum(counts_a[:, None, :], counts_b[None, :, :]).sum(axis=2)
+
+
+def ratio_upper_bounds(counts_a, lengths_a, counts_b, lengths_b) -> np.ndarray:
+    """
+    Upper bound of SequenceMatcher.ratio() for every pair (same as quick_ratio()).
+    """
+    common = common_char_counts(counts_a, counts_b)
+    total = lengths_a[:, None] + lengths_b[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bounds = np.where(total > 0, 2.0 * common / np.maximum(total, 1), 1.0)
+    return bounds
+
+
+def levenshtein_similarity_upper_bounds(counts, lengths) -> np.ndarray:
+    """
+    Upper bound of 1 - levenshtein / max_len for every pair within one batch.
+
+    Levenshtein distance is at least max_len - common characters.
+    """
+    common = common_char_counts(counts, counts)
+    longest = np.maximum(lengths[:, None], lengths[None, :])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bounds = np.where(longest > 0, common / np.maximum(longest, 1), 1.0)
+    return bounds
+
+
+class SkillMatchTable:
+    """
+    Match results between a matcher's targets and one batch of OCR'd skills.
+
+    Similarities are only computed for pairs whose character-count bound can
+    reach the threshold; lookups afterwards are dictionary/array reads.
+    """
+
+    def __init__(self, matcher: "SkillMatcher", available_skills: List[dict]):
+        self.matcher = matcher
+        self.available_skills = list(available_skills)
+
+        names = [skill.get('name', '') for skill in self.available_skills]
+        self._exact_keys = [name.lower().strip() for name in names]
+        normalized = [normalize_skill_name(name) for name in names]
+        counts, lengths = char_signatures(normalized)
+
+        threshold = matcher.threshold
+        bounds = ratio_upper_bounds(matcher._counts, matcher._lengths, counts, lengths)
+        self.scores = np.zeros(bounds.shape, dtype=np.float64)
+        self.comparisons = 0
+        for t, s in zip(*np.nonzero(bounds >= threshold)):
+            self.scores[t, s] = SequenceMatcher(None, normalized[s], matcher._normalized[t]).ratio()
+            self.comparisons += 1
+
+    def find(self, target_name: str, excluded_skills=None) -> Tuple[Optional[dict], float]:
+        """
+        Best available skill for a configured name, same rules as find_matching_skill:
+        exact (case-insensitive) match first, otherwise the first skill with the
+        highest normalized similarity >= threshold. Skills whose OCR name is in
+        excluded_skills are skipped.
+
+        Returns:
+            (skill, score): skill dict or None, and its similarity
+        """
+        if excluded_skills is None:
+            excluded_skills = set()
+
+        exact_key = target_name.lower().strip()
+        for skill, key in zip(self.available_skills, self._exact_keys):
+            if key == exact_key and skill['name'] not in excluded_skills:
+                return skill, 1.0
+
+        row = self.matcher._row_of.get(target_name)
+        if row is None:
+            return None, 0.0
+
+        best_skill = None
+        best_score = 0.0
+        for s in np.nonzero(self.scores[row] >= self.matcher.threshold)[0]:
+            skill = self.available_skills[s]
+            if skill['name'] in excluded_skills:
+                continue
+            score = float(self.scores[row, s])
+            if score > best_score:
+                best_skill = skill
+                best_score = score
+        return best_skill, best_score
+
+
+class SkillMatcher:
+    """
+    Precomputed normalized forms and signatures for a list of configured skill names.
+
+    Build once per skill config, then call build_table() per OCR scan to match
+    every target against every OCR'd skill in one batched pass.
+    """
+
+    def __init__(self, target_names: Iterable[str], threshold: float = 0.9):
+        self.threshold = threshold
+        self.target_names: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        for name in target_names:
+            if name and name not in self._row_of:
+                self._row_of[name] = len(self.target_names)
+                self.target_names.append(name)
+        self._normalized = [normalize_skill_name(name) for name in self.target_names]
+        self._counts, self._lengths = char_signatures(self._normalized)
+
+    @classmethod
+    def from_config(cls, config: dict, threshold: float = 0.9) -> "SkillMatcher":
+        """Targets are every priority skill plus every base skill of a gold upgrade"""
+        skill_priority = config.get("skill_priority", [])
+        gold_upgrades = config.get("gold_skill_upgrades", {})
+        names = list(skill_priority)
+        for priority_skill in skill_priority:
+            if priority_skill in gold_upgrades:
+                names.append(gold_upgrades[priority_skill])
+        return cls(names, threshold=threshold)
+
+    def build_table(self, available_skills: List[dict]) -> SkillMatchTable:
+        table = SkillMatchTable(self, available_skills)
+        log_debug(f"Skill match table: {len(self.target_names)} targets x {len(table.available_skills)} skills, "
+                  f"{table.comparisons} similarity checks")
+        return table
+
+
+# Matchers are cached per skill config content so repeated purchase plans reuse them
+_matcher_cache: Dict[tuple, SkillMatcher] = {}
+
+
+def get_skill_matcher(config: dict, threshold: float = 0.9) -> SkillMatcher:
+    """Get a cached SkillMatcher for a skills.json config dict"""
+    key = (
+        tuple(config.get("skill_priority", [])),
+        tuple(sorted(config.get("gold_skill_upgrades", {}).items())),
+        threshold,
+    )
+    matcher = _matcher_cache.get(key)
+    if matcher is None:
+        matcher = SkillMatcher.from_config(config, threshold=threshold)
+        _matcher_cache[key] = matcher
+    return matcher
+
+
+def find_duplicate_candidates(names: List[str], similarity_threshold: float) -> np.ndarray:
+    """
+    Boolean (N, N) mask of name pairs that may reach similarity_threshold under
+    Levenshtein similarity; pairs outside the mask can be skipped safely.
+    """
+    counts, lengths = char_signatures(names)
+    return levenshtein_similarity_upper_bounds(counts, lengths) >= similarity_threshold
@@ -0,0 +1,146 @@
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+import cv2
+import numpy as np
+
+from utils.log import log_debug, log_info, log_warning
+
+# Decoded template images, keyed by (absolute path, imread flags). Arrays are
+# read-only: callers share them. A multi-instance parent can decode every asset
+# once into shared memory (export_shared) and children map it (attach_shared)
+# instead of each holding its own copy.
+
+_cache: Dict[tuple, np.ndarray] = {}
+_lock = threading.Lock()
+# Shared memory block backing attached/exported templates (kept open while in use)
+_shared = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def _key(path: str, flags: int) -> tuple:
+    return (os.path.normcase(os.path.abspath(path)), int(flags))
+
+
+def get_template(path: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """
+    Decoded template (read-only), loaded once per process.
+
+    Returns:
+        numpy array, or None when the file cannot be read (not cached, so a
+        template added later is still picked up)
+    """
+    key = _key(path, flags)
+    template = _cache.get(key)
+    if template is not None:
+        return template
+    template = cv2.imread(key[0], flags)
+    if template is None:
+        return None
+    template.setflags(write=False)
+    with _lock:
+        _cache.setdefault(key, template)
+    return _cache[key]
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def _asset_files(directories: Iterable[str]):
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def export_shared(directories: Iterable[str], flags: int = cv2.IMREAD_COLOR) -> Optional[dict]:
+    """
+    Decode every image under directories into one shared memory block.
+
+    Args:
+        directories: asset folders (e.g. ["assets"])
+        flags: imread flags the templates are used with
+
+    Returns:
+        manifest for attach_shared() (picklable), or None when nothing was loaded
+    """
+    global _shared
+    from multiprocessing import shared_memory
+
+    images = []
+    for path in _asset_files(directories):
+        image = cv2.imread(path, flags)
+        if image is not None:
+            images.append((path, image))
+    if not images:
+        return None
+
+    total = sum(image.nbytes for _, image in images)
+    block = shared_memory.SharedMemory(create=True, size=total)
+    entries = {}
+    offset = 0
+    for path, image in images:
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf, offset=offset)
+        view[...] = image
+        view.setflags(write=False)
+        key = _key(path, flags)
+        entries[key[0]] = (offset, image.shape, image.dtype.str)
+        with _lock:
+            _cache[key] = view
+        offset += image.nbytes
+    _shared = block
+    log_info(f"Shared {len(entries)} templates ({total / 1e6:.1f} MB) in shared memory {block.name}")
+    return {"name": block.name, "flags": int(flags), "entries": entries}
+
+
+def attach_shared(manifest: Optional[dict]) -> int:
+    """
+    Map the templates exported by the parent process into this process's cache.
+
+    Returns:
+        number of templates attached (0 when the block is gone)
+    """
+    global _shared
+    if not manifest:
+        return 0
+    from multiprocessing import shared_memory
+
+    try:
+        try:
+            # Python 3.13+: the parent owns the block; do not unlink it when this process exits
+            block = shared_memory.SharedMemory(name=manifest["name"], track=False)
+        except TypeError:
+            block = shared_memory.SharedMemory(name=manifest["name"])
+    except FileNotFoundError:
+        log_warning(f"Shared templates {manifest['name']} not found; loading templates from disk")
+        return 0
+
+    flags = manifest["flags"]
+    with _lock:
+        for path, (offset, shape, dtype) in manifest["entries"].items():
+            view = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            view.setflags(write=False)
+            _cache[(path, flags)] = view
+    _shared = block
+    log_debug(f"Attached {len(manifest['entries'])} shared templates")
+    return len(manifest["entries"])
+
+
+def release_shared(unlink: bool = False):
+    """Drop the shared views and close the block (the exporting process unlinks it)"""
+    global _shared
+    if _shared is None:
+        return
+    clear()
+    block, _shared = _shared, None
+    try:
+        block.close()
+        if unlink:
+            block.unlink()
+    except (BufferError, FileNotFoundError, OSError) as e:
+        log_debug(f"Shared template block cleanup: {e}")
@@ -0,0 +1,239 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from utils.log import log_info, log_warning
+
+# Turn-level trace recorder: spans/marks of the last N lobby iterations kept in memory,
+# written out on error, on slow iterations or on request. Fed by utils.profiler spans.
+_enabled = False
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cap per iteration so a stuck loop cannot grow one iteration without bound
+MAX_EVENTS_PER_ITERATION = 5000
+
+_lock = threading.Lock()
+_origin = time.perf_counter()
+_pid = os.getpid()
+
+_ring: Optional[deque] = None
+_current: Optional[dict] = None
+_output_dir = "traces"
+_format = "chrome"
+_slow_iteration_s = 30.0
+_iteration_count = 0
+# Callbacks receiving (name, args) for every mark, even while recording is off
+_mark_listeners = []
+
+
+def _us(t: float) -> float:
+    """perf_counter seconds -> trace microseconds"""
+    return round((t - _origin) * 1e6, 1)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(output_dir: str = "traces", ring_size: int = 50, fmt: str = "chrome", slow_iteration_s: float = 30.0):
+    """
+    Start recording.
+
+    Args:
+        output_dir: where flushed traces are written
+        ring_size: number of most recent lobby iterations kept in memory
+        fmt: "chrome" (trace-event JSON for chrome://tracing / Perfetto) or "jsonl"
+        slow_iteration_s: iterations slower than this are flushed automatically (0 disables)
+    """
+    global _enabled, _ring, _current, _output_dir, _format, _slow_iteration_s
+    if not os.path.isabs(output_dir):
+        output_dir = os.path.join(_PROJECT_ROOT, output_dir)
+    with _lock:
+        _ring = deque(maxlen=max(int(ring_size), 1))
+        _current = None
+        _output_dir = output_dir
+        _format = "jsonl" if fmt == "jsonl" else "chrome"
+        _slow_iteration_s = float(slow_iteration_s or 0)
+        _enabled = True
+    log_info(f"Trace recording enabled (last {ring_size} iterations, {_format}) -> {output_dir}")
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def _new_iteration(name: str, args: Optional[dict] = None) -> dict:
+    global _iteration_count
+    _iteration_count += 1
+    return {
+        "name": name,
+        "index": _iteration_count,
+        "start": time.perf_counter(),
+        "end": None,
+        "args": dict(args or {}),
+        "events": [],
+        "dropped": 0,
+    }
+
+
+def _append(event: dict):
+    """Add an event to the open iteration (opening an implicit one if needed). Caller holds _lock."""
+    global _current
+    if _current is None:
+        _current = _new_iteration("outside lobby loop")
+    if len(_current["events"]) >= MAX_EVENTS_PER_ITERATION:
+        _current["dropped"] += 1
+        return
+    _current["events"].append(event)
+
+
+def _close_current() -> Optional[dict]:
+    """Move the open iteration into the ring. Caller holds _lock."""
+    global _current
+    iteration = _current
+    if iteration is None:
+        return None
+    iteration["end"] = time.perf_counter()
+    _ring.append(iteration)
+    _current = None
+    return iteration
+
+
+def begin_iteration(name: str = "career_lobby iteration", **args):
+    """Close the previous iteration and open a new one; slow iterations are flushed to disk"""
+    global _current
+    if not _enabled:
+        return
+    with _lock:
+        finished = _close_current()
+        _current = _new_iteration(name, args)
+    if finished is not None and _slow_iteration_s > 0:
+        duration = finished["end"] - finished["start"]
+        if duration >= _slow_iteration_s:
+            flush(f"slow iteration {finished['index']} ({duration:.1f}s)")
+
+
+def annotate(**args):
+    """Attach key/values (year, mood, decision...) to the open iteration"""
+    if not _enabled:
+        return
+    with _lock:
+        if _current is not None:
+            _current["args"].update(args)
+
+
+def add_span(name: str, start: float, end: float, args: Optional[dict] = None):
+    """Record a finished span (perf_counter start/end in seconds)"""
+    if not _enabled:
+        return
+    event = {
+        "name": name,
+        "cat": name.split(":", 1)[0].split(".", 1)[0],
+        "ph": "X",
+        "ts": _us(start),
+        "dur": round((end - start) * 1e6, 1),
+        "pid": _pid,
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    with _lock:
+        _append(event)
+
+
+def add_mark_listener(callback):
+    """Register callback(name, args) for marks (e.g. the session recorder labels frames with decisions)"""
+    if callback not in _mark_listeners:
+        _mark_listeners.append(callback)
+
+
+def mark(name: str, **args):
+    """Record an instant event, e.g. mark("decision", action="rest")"""
+    for callback in _mark_listeners:
+        try:
+            callback(name, args)
+        except Exception as e:
+            log_warning(f"Mark listener failed: {e}")
+    if not _enabled:
+        return
+    event = {
+        "name": name,
+        "cat": "mark",
+        "ph": "i",
+        "s": "t",
+        "ts": _us(time.perf_counter()),
+        "pid": _pid,
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    with _lock:
+        _append(event)
+        if _current is not None and name == "decision":
+            _current["args"]["decision"] = args.get("action")
+
+
+def _iteration_events(iteration: dict) -> list:
+    end = iteration["end"] if iteration["end"] is not None else time.perf_counter()
+    args = dict(iteration["args"])
+    args["iteration"] = iteration["index"]
+    if iteration["dropped"]:
+        args["dropped_events"] = iteration["dropped"]
+    outer = {
+        "name": iteration["name"],
+        "cat": "iteration",
+        "ph": "X",
+        "ts": _us(iteration["start"]),
+        "dur": round((end - iteration["start"]) * 1e6, 1),
+        "pid": _pid,
+        "tid": threading.main_thread().ident,
+        "args": args,
+    }
+    return [outer] + iteration["events"]
+
+
+def flush(reason: str = "manual") -> Optional[str]:
+    """
+    Write the buffered iterations (including the open one) to a trace file.
+
+    Returns:
+        str: path of the written file, or None if nothing was buffered
+    """
+    if _ring is None:
+        return None
+    with _lock:
+        iterations = list(_ring) + ([_current] if _current is not None else [])
+        events = []
+        for iteration in iterations:
+            events.extend(_iteration_events(iteration))
+    if not events:
+        return None
+
+    slug = re.sub(r"[^a-z0-9]+", "_", reason.lower()).strip("_")[:40] or "trace"
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    extension = "jsonl" if _format == "jsonl" else "json"
+    path = os.path.join(_output_dir, f"trace_{stamp}_{slug}.{extension}")
+    try:
+        os.makedirs(_output_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if _format == "jsonl":
+                for event in events:
+                    f.write(json.dumps(event, separators=(",", ":"), default=str) + "\n")
+            else:
+                json.dump({
+                    "traceEvents": events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"reason": reason, "iterations": len(iterations)},
+                }, f, separators=(",", ":"), default=str)
+        log_info(f"Trace of last {len(iterations)} iterations written to {path} ({reason})")
+        return path
+    except Exception as e:
+        log_warning(f"Could not write trace: {e}")
+        return None
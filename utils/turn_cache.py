@@ -0,0 +1,94 @@
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from utils.log import log_debug
+
+# Game state that only changes when the turn advances (year, goal, criteria,
+# skill points) is read once per turn. The turn is recognized by a signature
+# of the turn counter and year regions: both change every turn, and hashing a
+# downscaled, coarsely quantized crop costs well under a millisecond against
+# ~50-100 ms per OCR call. Lobby visits after popups, events or failed actions
+# in the same turn reuse the values; any pixel change there (a new turn, or
+# a screen other than the lobby) just means the values are read again.
+# Some turns look alike: the three URA finale race days all show "Finale
+# Underway" / "Race Day", so the values are also dropped on every
+# turn-ending decision mark (on_mark).
+
+# Crop downscale factor and grey-level quantization of the signature
+_REDUCE = 4
+_QUANT_SHIFT = 4
+
+
+class TurnStateCache:
+    def __init__(self, signal_regions: Iterable[Tuple[int, int, int, int]]):
+        """
+        Args:
+            signal_regions: (x1, y1, x2, y2) screen regions whose content changes
+                on every turn (turn counter, year)
+        """
+        self.signal_regions = tuple(signal_regions)
+        self._signature: Optional[str] = None
+        self._values: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, screenshot) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for region in self.signal_regions:
+            crop = screenshot.crop(region).convert("L")
+            crop = crop.reduce(_REDUCE)
+            digest.update(np.right_shift(np.asarray(crop), _QUANT_SHIFT).tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str, screenshot, compute: Callable[[Any], Any]) -> Any:
+        """
+        Value of key for the turn on screenshot, computed with compute(screenshot)
+        the first time it is needed in that turn.
+
+        Args:
+            key: state name ("year", "goal_name", ...)
+            screenshot: lobby screenshot (PIL Image); None captures one
+            compute: reads the value from a screenshot
+        """
+        if screenshot is None:
+            from utils.screenshot import take_screenshot
+            screenshot = take_screenshot()
+        signature = self.signature(screenshot)
+        with self._lock:
+            if signature != self._signature:
+                # New turn (or another screen): forget the previous turn's values
+                self._signature = signature
+                self._values = {}
+            elif key in self._values:
+                self.hits += 1
+                log_debug(f"Turn state '{key}' reused: {self._values[key]!r}")
+                return self._values[key]
+            self.misses += 1
+        value = compute(screenshot)
+        with self._lock:
+            if signature == self._signature:
+                self._values[key] = value
+        return value
+
+    def forget(self, key: str):
+        """Drop one value that changed within the turn (e.g. skill points after buying skills)"""
+        with self._lock:
+            self._values.pop(key, None)
+
+    def on_mark(self, name: str, args: dict):
+        """utils.trace mark listener: a turn-ending decision ends the cached turn"""
+        if name != "decision":
+            return
+        from utils.bot_control import TURN_ACTIONS
+
+        if args.get("action") in TURN_ACTIONS:
+            self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._signature = None
+            self._values = {}
@@ -0,0 +1,237 @@
+import os
+import json
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from utils.log import log_debug, log_warning
+
+# Calendar order used for the turn index: Junior Year Early Jan = 0 ... Senior Year Late Dec = 71
+YEAR_NAMES = ["Junior Year", "Classic Year", "Senior Year"]
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+PRE_DEBUT_YEAR = "Junior Year Pre-Debut"
+FINALE_YEAR = "Finale Underway"
+UNKNOWN_YEAR = "Unknown Year"
+
+# Lobby criteria statuses that mean "goal satisfied"; anything else is free text (e.g. fan counts)
+CRITERIA_MET = ["Entry criteria met", "Goal achieved"]
+# Their negations sit within one OCR slip of a "met" label, so they are part of the
+# vocabulary and snap to themselves instead of to the status they contradict
+CRITERIA_NOT_MET = ["Entry criteria not met", "Goal not achieved"]
+CRITERIA_VOCABULARY = CRITERIA_MET + CRITERIA_NOT_MET
+UNKNOWN_CRITERIA = "Unknown Criteria"
+
+_RACE_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "races", "clean_race_data.json")
+
+# Cache for the ordered year vocabulary and its turn index
+_year_vocabulary_cache = None
+_year_turn_index_cache = None
+
+
+def _calendar_periods() -> List[str]:
+    """All 72 half-month periods of a career in calendar order."""
+    periods = []
+    for year_name in YEAR_NAMES:
+        for month in MONTH_NAMES:
+            periods.append(f"{year_name} Early {month}")
+            periods.append(f"{year_name} Late {month}")
+    return periods
+
+
+def load_year_vocabulary() -> List[str]:
+    """
+    Load the closed set of year strings that can appear in the lobby header.
+
+    The race database keys enumerate the racing periods; Pre-Debut, the summer
+    periods without races and Finale Underway are added from the calendar.
+
+    Returns:
+        list[str]: canonical year labels in calendar order
+    """
+    global _year_vocabulary_cache, _year_turn_index_cache
+
+    if _year_vocabulary_cache is not None:
+        return _year_vocabulary_cache
+
+    race_periods = set()
+    try:
+        with open(_RACE_DATA_PATH, "r", encoding="utf-8") as f:
+            race_periods = set(json.load(f).keys())
+    except Exception as e:
+        log_warning(f"Could not load race periods for year vocabulary: {e}")
+
+    calendar = _calendar_periods()
+    turn_index = {label: i for i, label in enumerate(calendar)}
+    turn_index[PRE_DEBUT_YEAR] = 0
+    turn_index[FINALE_YEAR] = len(calendar)
+
+    # Junior Year Early Jan - Late Jun is shown as Pre-Debut in game
+    vocabulary = [PRE_DEBUT_YEAR] + calendar[12:] + [FINALE_YEAR]
+    for label in sorted(race_periods - set(vocabulary)):
+        log_debug(f"Race period '{label}' not in calendar, adding to year vocabulary")
+        turn_index.setdefault(label, len(calendar))
+        vocabulary.append(label)
+
+    _year_vocabulary_cache = vocabulary
+    _year_turn_index_cache = turn_index
+    return vocabulary
+
+
+def year_turn_index(year: str) -> int:
+    """
+    Get the calendar turn index of a canonical year label.
+
+    Returns:
+        int: 0-71 for calendar periods (Pre-Debut = 0), 72 for Finale Underway, -1 if unknown
+    """
+    load_year_vocabulary()
+    return _year_turn_index_cache.get(year, -1)
+
+
+def normalize_vocabulary_text(text: str) -> str:
+    """Lowercase and strip everything but letters and digits (OCR drops/merges spaces freely)"""
+    return re.sub(r"[^a-z0-9]", "", (text or "").lower())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class VocabularyRecognizer:
+    """
+    Constrained text recognizer over a small closed vocabulary.
+
+    Two layers keep tesseract off the hot path:
+    - crop templates: every confidently recognized crop is remembered as a
+      binarized thumbnail; a later crop that matches one pixel-for-pixel is
+      labelled without OCR (the header text is rendered identically each turn)
+    - nearest-vocabulary snapping: OCR output is snapped to the closest label
+      using a precomputed normalized/trigram index instead of ad-hoc fixes
+    """
+
+    def __init__(self, vocabulary: List[str], snap_threshold: float = 0.6,
+                 template_tolerance: float = 0.02, max_templates_per_label: int = 3):
+        self.vocabulary = list(vocabulary)
+        self.snap_threshold = snap_threshold
+        self.template_tolerance = template_tolerance
+        self.max_templates_per_label = max_templates_per_label
+
+        # Precomputed index: normalized form and trigram signature per label
+        self._normalized = [normalize_vocabulary_text(label) for label in self.vocabulary]
+        self._exact = {norm: label for norm, label in zip(self._normalized, self.vocabulary)}
+        self._trigram_sets = [_trigrams(norm) for norm in self._normalized]
+
+        # Characters tesseract is allowed to emit
+        chars = sorted({c for label in self.vocabulary for c in label if c != " "})
+        self.char_whitelist = "".join(chars)
+
+        self._templates: Dict[str, List[np.ndarray]] = {}
+
+    def snap(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Snap free OCR text to the nearest vocabulary label.
+
+        Returns:
+            (label, score): best label and similarity in [0, 1]; label is None
+            when the score is below snap_threshold
+        """
+        norm = normalize_vocabulary_text(text)
+        if not norm:
+            return None, 0.0
+        if norm in self._exact:
+            return self._exact[norm], 1.0
+
+        # Rank by trigram overlap, then refine the few best with a full ratio
+        grams = _trigrams(norm)
+        overlaps = []
+        for i, label_grams in enumerate(self._trigram_sets):
+            union = len(grams | label_grams)
+            overlaps.append((len(grams & label_grams) / union if union else 0.0, i))
+        overlaps.sort(reverse=True)
+
+        best_label = None
+        best_score = 0.0
+        for _, i in overlaps[:5]:
+            score = SequenceMatcher(None, norm, self._normalized[i]).ratio()
+            if score > best_score:
+                best_label = self.vocabulary[i]
+                best_score = score
+
+        if best_score < self.snap_threshold:
+            return None, best_score
+        return best_label, best_score
+
+    @staticmethod
+    def _binarize(img) -> np.ndarray:
+        if isinstance(img, Image.Image):
+            arr = np.asarray(img.convert("L"), dtype=np.uint8)
+        else:
+            arr = np.asarray(img, dtype=np.uint8)
+            if arr.ndim == 3:
+                arr = arr.mean(axis=2).astype(np.uint8)
+        binary = arr > arr.mean()
+        # Text is the minority class whether it is light-on-dark or dark-on-light
+        if binary.mean() > 0.5:
+            binary = ~binary
+        return binary
+
+    def match_template(self, img) -> Tuple[Optional[str], float]:
+        """
+        Label a crop against previously learned crop templates.
+
+        Returns:
+            (label, mismatch): label is None when no template is within tolerance
+        """
+        if not self._templates:
+            return None, 1.0
+        binary = self._binarize(img)
+        best_label = None
+        best_mismatch = 1.0
+        for label, templates in self._templates.items():
+            for template in templates:
+                if template.shape != binary.shape:
+                    continue
+                ink = max(int(template.sum()), 1)
+                mismatch = float(np.count_nonzero(template != binary)) / ink
+                if mismatch < best_mismatch:
+                    best_label = label
+                    best_mismatch = mismatch
+        if best_mismatch <= self.template_tolerance:
+            return best_label, best_mismatch
+        return None, best_mismatch
+
+    def learn(self, img, label: str):
+        """Remember a crop as a template for label (only call for confident results)"""
+        if label not in self._exact.values():
+            return
+        templates = self._templates.setdefault(label, [])
+        if len(templates) >= self.max_templates_per_label:
+            return
+        templates.append(self._binarize(img))
+
+    def recognize(self, img, ocr_func) -> Tuple[Optional[str], float, str]:
+        """
+        Recognize a crop, trying learned templates before OCR.
+
+        Args:
+            img: PIL Image of the (enhanced) crop
+            ocr_func: callable(img, char_whitelist) -> str, only invoked on template miss
+
+        Returns:
+            (label, score, raw_text): label is None when the crop does not snap to
+            the vocabulary; raw_text is the OCR output ("" on a template hit)
+        """
+        label, mismatch = self.match_template(img)
+        if label is not None:
+            log_debug(f"Vocabulary template hit: '{label}' (mismatch {mismatch:.3f})")
+            return label, 1.0 - mismatch, ""
+
+        raw_text = ocr_func(img, self.char_whitelist) or ""
+        label, score = self.snap(raw_text)
+        if label is not None and score >= 0.9:
+            self.learn(img, label)
+        return label, score, raw_text